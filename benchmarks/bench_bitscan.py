@@ -0,0 +1,108 @@
+"""
+Micro-benchmark comparing the bit-scan iteration in engine.square against the previous numpy.binary_repr based
+conversions, on the opening position and on dense midgame positions.
+
+Usage: python benchmarks/bench_bitscan.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from engine.chess_engine import BitBoard
+from engine.engine_constants import DEFAULT_BOARD_STATE, BIT_BOARD_WIDTH, N_FILES
+from engine.square import bitboard_to_squares, iter_locations, squares_by_piece_class
+
+MIDGAME_BOARD_STATES = {
+    'midgame_a': np.array([
+        ['r', '.', 'e', 'a', 'g', 'a', 'e', '.', 'r'],
+        ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+        ['.', 'c', 'h', '.', '.', '.', 'h', 'c', '.'],
+        ['p', '.', 'p', '.', 'p', '.', 'p', '.', 'p'],
+        ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+        ['.', '.', 'P', '.', '.', '.', 'P', '.', '.'],
+        ['P', '.', '.', '.', 'P', '.', '.', '.', 'P'],
+        ['.', 'C', 'H', '.', 'C', '.', 'H', '.', '.'],
+        ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+        ['R', '.', 'E', 'A', 'G', 'A', 'E', '.', 'R'],
+    ]),
+    'midgame_b': np.array([
+        ['.', '.', 'e', 'a', 'g', 'a', 'e', '.', '.'],
+        ['.', '.', '.', '.', '.', '.', '.', '.', 'r'],
+        ['r', 'c', 'h', '.', '.', '.', 'h', '.', '.'],
+        ['p', '.', 'p', '.', 'p', '.', '.', '.', 'p'],
+        ['.', '.', '.', '.', '.', '.', 'p', 'c', '.'],
+        ['.', '.', 'P', '.', '.', '.', '.', '.', '.'],
+        ['P', '.', '.', '.', 'P', '.', 'P', '.', 'P'],
+        ['.', 'C', 'H', '.', 'C', '.', 'H', '.', '.'],
+        ['R', '.', '.', '.', '.', '.', '.', '.', 'R'],
+        ['.', '.', 'E', 'A', 'G', 'A', 'E', '.', '.'],
+    ]),
+}
+
+
+def legacy_bitboard_to_locations(single_piece_bit_board):
+    """ The previous implementation of engine_util.bitboard_to_locations. """
+    locations = []
+    binary_rep = np.binary_repr(single_piece_bit_board, width=BIT_BOARD_WIDTH)
+
+    for i in range(len(binary_rep)):
+        if binary_rep[i] == '1':
+            locations.append((i % N_FILES, i // N_FILES))
+
+    return locations
+
+
+def legacy_get_locations_by_piece_class(bit_boards):
+    """ The previous implementation of BitBoard.get_locations_by_piece_class. """
+    locations = {}
+
+    for piece_class in bit_boards:
+        binary_rep = np.array(list(np.binary_repr(bit_boards[piece_class], width=BIT_BOARD_WIDTH)), dtype='b')
+        locations[piece_class] = np.nonzero(binary_rep)
+
+    return locations
+
+
+def run(repeat):
+    positions = {'opening': DEFAULT_BOARD_STATE}
+    positions.update(MIDGAME_BOARD_STATES)
+
+    print(f"{'position':<12}{'operation':<28}{'legacy (us)':>14}{'bit-scan (us)':>16}{'speedup':>10}")
+    for name, board_state in positions.items():
+        bit_boards = BitBoard(board_state, verbose=False)
+        boards = [bit_boards[k] for k in bit_boards]
+
+        # Sanity check that both implementations agree before timing them.
+        for board in boards:
+            assert legacy_bitboard_to_locations(board) == list(iter_locations(board))
+        legacy = legacy_get_locations_by_piece_class(bit_boards)
+        for piece_class, squares in squares_by_piece_class(bit_boards).items():
+            assert list(legacy[piece_class][0]) == squares
+
+        cases = [
+            ('locations (14 boards)',
+             lambda: [legacy_bitboard_to_locations(b) for b in boards],
+             lambda: [list(iter_locations(b)) for b in boards]),
+            ('squares (14 boards)',
+             lambda: [np.nonzero(np.array(list(np.binary_repr(b, width=BIT_BOARD_WIDTH)), dtype='b')) for b in boards],
+             lambda: [bitboard_to_squares(b) for b in boards]),
+            ('bulk by piece class',
+             lambda: legacy_get_locations_by_piece_class(bit_boards),
+             lambda: squares_by_piece_class(bit_boards)),
+        ]
+
+        for operation, legacy_fn, new_fn in cases:
+            legacy_time = min(timeit.repeat(legacy_fn, number=repeat, repeat=3)) / repeat * 1e6
+            new_time = min(timeit.repeat(new_fn, number=repeat, repeat=3)) / repeat * 1e6
+            print(f"{name:<12}{operation:<28}{legacy_time:>14.2f}{new_time:>16.2f}{legacy_time / new_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000, help='number of calls per timing sample')
+    args = parser.parse_args()
+    run(args.repeat)
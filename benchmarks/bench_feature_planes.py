@@ -0,0 +1,74 @@
+"""
+Throughput of the feature plane encoder: positions per second from BitBoard objects, from packed byte arrays, and for
+the reverse decoder, against filling the planes from get_locations_by_piece_class one position at a time.
+
+Usage: python benchmarks/bench_feature_planes.py [--positions N] [--dtype uint8|float32]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from engine.chess_engine import BitBoard
+from engine.engine_constants import N_FILES, PIECE_CLASSES
+from engine.feature_planes import encode_planes, decode_planes, pack_bit_boards
+from engine.piece_movement import generate_moves
+
+
+def random_bit_boards(n_positions, seed=0):
+    # Positions from random games, copied so that each BitBoard is independent.
+    rng = random.Random(seed)
+    positions = []
+    bit_board = BitBoard(verbose=False)
+    while len(positions) < n_positions:
+        moves = generate_moves(bit_board, bit_board.side_to_move)
+        if not moves or not bit_board['g'] or not bit_board['G'] or rng.random() < 0.01:
+            bit_board = BitBoard(verbose=False)
+            continue
+        bit_board.make_move(rng.choice(moves))
+        positions.append(bit_board.copy())
+    return positions
+
+
+def encode_by_locations(positions, out):
+    out[...] = 0
+    for index, position in enumerate(positions):
+        for piece_class, squares in position.get_locations_by_piece_class().items():
+            plane = out[index, PIECE_CLASSES.index(piece_class)]
+            for square in squares:
+                plane[square // N_FILES, square % N_FILES] = 1
+    return out
+
+
+def rate(function, n_positions, *args):
+    start = time.perf_counter()
+    function(*args)
+    return n_positions / (time.perf_counter() - start)
+
+
+def run(n_positions, dtype):
+    positions = random_bit_boards(n_positions)
+    out = np.empty((n_positions, len(PIECE_CLASSES), 10, N_FILES), dtype=dtype)
+    packed = pack_bit_boards(positions)
+    planes = encode_planes(packed, out=out).copy()
+
+    print(f"{'conversion':<36}{'positions/s':>14}")
+    for name, function, args in (
+            ('per position via locations', encode_by_locations, (positions, out)),
+            ('BitBoards -> planes', encode_planes, (positions, out)),
+            ('BitBoards -> packed bytes', pack_bit_boards, (positions,)),
+            ('packed bytes -> planes', encode_planes, (packed, out)),
+            ('planes -> packed bytes', decode_planes, (planes,))):
+        print(f"{name:<36}{rate(function, n_positions, *args):>14,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--positions', type=int, default=100000, help='number of positions to convert')
+    parser.add_argument('--dtype', choices=('uint8', 'float32'), default='uint8', help='output dtype')
+    args = parser.parse_args()
+    run(args.positions, np.dtype(args.dtype))
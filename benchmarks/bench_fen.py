@@ -0,0 +1,36 @@
+"""
+Positions per second when building BitBoards from FEN strings, against the numpy string array constructor, and when
+serializing them back to FEN.
+
+Usage: python benchmarks/bench_fen.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from engine.chess_engine import BitBoard
+from engine.perft import REFERENCE_POSITIONS, reference_bit_board
+
+
+def run(repeat):
+    fens = [reference_bit_board(name).to_fen() for name in REFERENCE_POSITIONS]
+    arrays = [np.array([list(row) for row in rows]) for rows, _, _ in REFERENCE_POSITIONS.values()]
+    bit_boards = [BitBoard.from_fen(fen) for fen in fens]
+
+    print(f"{'conversion':<28}{'positions/s':>14}")
+    for name, function in (('string array -> BitBoard', lambda: [BitBoard(array, verbose=False) for array in arrays]),
+                           ('FEN -> BitBoard', lambda: [BitBoard.from_fen(fen) for fen in fens]),
+                           ('BitBoard -> FEN', lambda: [bit_board.to_fen() for bit_board in bit_boards])):
+        seconds = min(timeit.repeat(function, number=repeat, repeat=3))
+        print(f"{name:<28}{repeat * len(fens) / seconds:>14,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000, help='conversions of each position per measurement')
+    args = parser.parse_args()
+    run(args.repeat)
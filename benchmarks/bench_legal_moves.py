@@ -0,0 +1,42 @@
+"""
+Positions per second when generating legal moves with the check and pin masks of piece_movement, against making and
+unmaking every pseudo-legal move to test it.
+
+Usage: python benchmarks/bench_legal_moves.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from engine.perft import REFERENCE_POSITIONS, reference_bit_board
+from engine.piece_movement import generate_moves, generate_legal_moves, is_general_attacked
+
+
+def make_unmake_legal_moves(bit_board, team):
+    legal_moves = []
+    for move in generate_moves(bit_board, team):
+        bit_board.make_move(move)
+        if not is_general_attacked(bit_board, team):
+            legal_moves.append(move)
+        bit_board.unmake_move(move)
+    return legal_moves
+
+
+def run(repeat):
+    bit_boards = [reference_bit_board(name) for name in REFERENCE_POSITIONS]
+
+    print(f"{'generator':<20}{'positions/s':>14}")
+    for name, generator in (('make/unmake', make_unmake_legal_moves), ('check/pin masks', generate_legal_moves)):
+        function = lambda: [generator(bit_board, bit_board.side_to_move) for bit_board in bit_boards]
+        seconds = min(timeit.repeat(function, number=repeat, repeat=3))
+        print(f"{name:<20}{repeat * len(bit_boards) / seconds:>14,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=500, help='generations in each position per measurement')
+    args = parser.parse_args()
+    run(args.repeat)
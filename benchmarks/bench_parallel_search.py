@@ -0,0 +1,60 @@
+"""
+Scaling benchmark of the root-splitting parallel search: searches reference positions to a fixed depth with an
+increasing number of worker processes and reports the speedup and efficiency (speedup / workers) against one worker.
+Every worker count must return the same move and score; the single-process Searcher is timed for reference.
+
+Usage: python benchmarks/bench_parallel_search.py [--position NAME] [--depth N] [--workers 1 2 4 ...]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from engine.moves import move_to_string
+from engine.parallel_search import parallel_search
+from engine.perft import REFERENCE_POSITIONS, reference_bit_board
+from engine.search import Searcher
+from engine.transposition_table import TranspositionTable
+
+
+def run(names, depth, worker_counts):
+    print(f"{'position':<12}{'workers':>8}{'seconds':>10}{'nodes/s':>12}{'speedup':>9}{'efficiency':>12}  best move")
+    for name in names:
+        bit_board = reference_bit_board(name)
+
+        start = time.perf_counter()
+        serial = Searcher(bit_board, TranspositionTable(16)).search(depth)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<12}{'serial':>8}{elapsed:>10.2f}{serial.nps:>12,.0f}{'':>9}{'':>12}  "
+              f"{move_to_string(serial.best_move)} ({serial.score})")
+
+        baseline, reference = None, None
+        for workers in worker_counts:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Start the workers before timing.
+                list(executor.map(abs, range(workers)))
+                start = time.perf_counter()
+                result = parallel_search(bit_board, depth, executor=executor)
+                elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline, reference = elapsed, result
+            assert (result.best_move, result.score) == (reference.best_move, reference.score), \
+                f"{workers} workers disagree with {worker_counts[0]}"
+
+            speedup = baseline / elapsed
+            print(f"{name:<12}{workers:>8}{elapsed:>10.2f}{result.nodes / elapsed:>12,.0f}{speedup:>8.2f}x"
+                  f"{speedup / workers * worker_counts[0]:>11.0%}  {move_to_string(result.best_move)} ({result.score})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--position', choices=sorted(REFERENCE_POSITIONS), action='append',
+                        help='reference position to search (may be repeated, defaults to opening and midgame)')
+    parser.add_argument('--depth', type=int, default=4, help='search depth in plies (default: 4)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='worker counts to compare')
+    args = parser.parse_args()
+    run(args.position or ['opening', 'midgame'], args.depth, args.workers)
@@ -0,0 +1,84 @@
+"""
+Benchmark of chariot and cannon attack generation: the rank/file occupancy lookups in piece_movement against walking
+the precomputed rays point by point. Reports attacks generated per second.
+
+Usage: python benchmarks/bench_sliding_attacks.py [--positions N] [--seconds S]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from engine.attack_tables import RAYS
+from engine.engine_constants import BIT_BOARD_WIDTH
+from engine.piece_movement import chariot_targets, cannon_targets
+
+
+def ray_walk_chariot_targets(square, team, occupancy):
+    targets = 0
+    for ray in RAYS[square]:
+        for point in ray:
+            targets |= point
+            if occupancy & point:
+                break
+    return targets
+
+
+def ray_walk_cannon_targets(square, team, occupancy):
+    targets = 0
+    for ray in RAYS[square]:
+        screened = False
+        for point in ray:
+            if not screened:
+                if occupancy & point:
+                    screened = True
+                else:
+                    targets |= point
+            elif occupancy & point:
+                targets |= point
+                break
+    return targets
+
+
+def attacks_per_second(targets_function, cases, seconds):
+    # Runs over all (square, occupancy) cases repeatedly until the time budget is spent.
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for square, occupancy in cases:
+            targets_function(square, 'r', occupancy)
+        count += len(cases)
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def run(n_positions, seconds):
+    rng = random.Random(0)
+    cases = []
+    for _ in range(n_positions):
+        # Roughly 32 pieces, the density of an opening or early middlegame position.
+        occupied = rng.sample(range(BIT_BOARD_WIDTH), 32)
+        occupancy = sum(1 << (BIT_BOARD_WIDTH - 1 - square) for square in occupied)
+        cases.extend((square, occupancy) for square in occupied[:4])
+
+    print(f"{'piece':<10}{'ray walk (attacks/s)':>24}{'lookup (attacks/s)':>22}{'speedup':>10}")
+    for name, reference, lookup in (('chariot', ray_walk_chariot_targets, chariot_targets),
+                                    ('cannon', ray_walk_cannon_targets, cannon_targets)):
+        for square, occupancy in cases:
+            assert reference(square, 'r', occupancy) == lookup(square, 'r', occupancy)
+
+        reference_rate = attacks_per_second(reference, cases, seconds)
+        lookup_rate = attacks_per_second(lookup, cases, seconds)
+        print(f"{name:<10}{reference_rate:>24,.0f}{lookup_rate:>22,.0f}{lookup_rate / reference_rate:>9.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--positions', type=int, default=500, help='number of random positions to sample')
+    parser.add_argument('--seconds', type=float, default=1.0, help='time budget per measurement')
+    args = parser.parse_args()
+    run(args.positions, args.seconds)
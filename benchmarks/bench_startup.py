@@ -0,0 +1,101 @@
+"""
+Startup time of the engine, from launching a fresh interpreter to its first move, and the per-call overhead of the
+engine's small entry points. Each stage runs in its own interpreter, so module imports are paid every time, as they are
+by a new worker process. The engine core is also checked to import without numpy.
+
+For CI, --max-startup-ms fails the run (exit status 1) when the first searched move takes longer than the given time,
+or when importing the engine imports numpy.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--calls N] [--max-startup-ms MS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+# name -> code run by a fresh interpreter. Each stage includes the ones before it.
+STAGES = {
+    'interpreter': 'pass',
+    'import engine': 'from engine.chess_engine import ChessEngine\n'
+                     'from engine.fen import DEFAULT_FEN',
+    'legal moves': 'from engine.chess_engine import ChessEngine\n'
+                   'from engine.fen import DEFAULT_FEN\n'
+                   'ChessEngine(fen=DEFAULT_FEN).generate_moves()',
+    'first move': 'from engine.chess_engine import ChessEngine\n'
+                  'from engine.fen import DEFAULT_FEN\n'
+                  'ChessEngine(fen=DEFAULT_FEN, transposition_table_mb=1).search(depth=1)',
+}
+
+NUMPY_CHECK = 'import sys\n' \
+              'import engine.chess_engine, engine.search, engine.tablebase, engine.ucci\n' \
+              'print("numpy" in sys.modules)'
+
+
+def stage_time(code, runs):
+    # The median wall time of running code in a new interpreter, in seconds.
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=SRC, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def imports_numpy():
+    output = subprocess.run([sys.executable, '-c', NUMPY_CHECK], cwd=SRC, check=True, capture_output=True, text=True)
+    return output.stdout.strip() == 'True'
+
+
+def call_overheads(calls):
+    # Microseconds per call of entry points that are called once per click, command or position.
+    from engine.bit_board import BitBoard
+    from engine.chess_engine import ChessEngine
+    from engine.engine_util import piece_class_by_location, location_to_bitboard
+    from engine.fen import DEFAULT_FEN
+    from engine.piece_movement import return_valid_moves_by_type_and_location
+
+    engine = ChessEngine(fen=DEFAULT_FEN)
+    bit_board = engine.bit_board
+    functions = {
+        'BitBoard()': lambda: BitBoard(),
+        'location_to_bitboard': lambda: location_to_bitboard((4, 9)),
+        'piece_class_by_location': lambda: piece_class_by_location(bit_board, (4, 9)),
+        'valid moves by location': lambda: return_valid_moves_by_type_and_location(bit_board, 'H', (1, 9)),
+        'ChessEngine.generate_moves': engine.generate_moves,
+    }
+    return {name: min(timeit.repeat(function, number=calls, repeat=3)) / calls * 1e6
+            for name, function in functions.items()}
+
+
+def run(runs, calls, max_startup_ms=None):
+    print(f"{'stage':<28}{'ms':>10}")
+    times = {name: stage_time(code, runs) * 1e3 for name, code in STAGES.items()}
+    for name, milliseconds in times.items():
+        print(f"{name:<28}{milliseconds:>10.1f}")
+    numpy_imported = imports_numpy()
+    print(f"{'engine imports numpy':<28}{str(numpy_imported):>10}")
+
+    print(f"\n{'call':<28}{'us':>10}")
+    for name, microseconds in call_overheads(calls).items():
+        print(f"{name:<28}{microseconds:>10.2f}")
+
+    if max_startup_ms is not None and (times['first move'] > max_startup_ms or numpy_imported):
+        print(f"FAIL: first move after {times['first move']:.1f} ms (limit {max_startup_ms} ms), "
+              f"numpy imported: {numpy_imported}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='interpreters started per stage')
+    parser.add_argument('--calls', type=int, default=1000, help='calls per measurement of each entry point')
+    parser.add_argument('--max-startup-ms', type=float, default=None, help='fail above this time to the first move')
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.calls, args.max_startup_ms))
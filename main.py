@@ -1,10 +1,15 @@
-from engine.engine_constants import DEFAULT_BOARD_STATE
+import argparse
 from engine.chess_engine import ChessEngine
+from engine.fen import DEFAULT_FEN
+from visuals.engine_player import DEFAULT_THINKING_TIME
 from visuals.xiangqi_board import Board
 
 if __name__ == "__main__":
-    tweaked_board = DEFAULT_BOARD_STATE
-    tweaked_board[1][4] = 'P'
-    xiangqi_engine = ChessEngine()
-    xiangqi_board = Board(xiangqi_engine)
+    parser = argparse.ArgumentParser(description='Play XiangQi, against another player or against the engine.')
+    parser.add_argument('--engine', choices=['r', 'b'], default=None, help='the team the engine plays')
+    parser.add_argument('--time', type=float, default=DEFAULT_THINKING_TIME, help='seconds the engine thinks per move')
+    args = parser.parse_args()
+
+    xiangqi_engine = ChessEngine(fen=DEFAULT_FEN)
+    xiangqi_board = Board(xiangqi_engine, engine_team=args.engine, engine_time_limit=args.time)
     xiangqi_board.on_execute()
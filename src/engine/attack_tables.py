@@ -0,0 +1,202 @@
+"""
+This file contains the precomputed per-square movement tables used by the move generator. Every table is built once,
+when the module is first imported.
+
+Tables that depend on the team are dictionaries keyed by 'r' (red) or 'b' (black), each holding a tuple indexed by
+square. Black starts at the top of the board (y = 0) and red at the bottom (y = N_RANKS - 1).
+
+Chariot and cannon attacks are looked up by line occupancy rather than walked ray by ray. A rank occupies 9
+contiguous bits of a bitboard, so its occupancy is a shift and a mask away and indexes a 512-entry table directly. The
+points of a file are 9 bits apart; shifting the file onto the last file (x = N_FILES - 1) gives one of 1024 sparse
+patterns, which is used as the key of a per-rank lookup dictionary. Either result is shifted back into place.
+"""
+from .engine_constants import N_FILES, N_RANKS, BIT_BOARD_WIDTH, BLACK_PALACE_LOCATIONS, RED_PALACE_LOCATIONS
+from .square import SQUARES, SQUARE_MASKS, SQUARE_LOCATIONS, is_on_board
+
+ORTHOGONAL_DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+DIAGONAL_DIRECTIONS = ((1, -1), (1, 1), (-1, 1), (-1, -1))
+
+PALACE_LOCATIONS = {'b': frozenset(BLACK_PALACE_LOCATIONS), 'r': frozenset(RED_PALACE_LOCATIONS)}
+
+# The direction each team's pawns move forward in.
+FORWARD = {'b': 1, 'r': -1}
+
+
+def _mask(location):
+    return SQUARE_MASKS[location[1] * N_FILES + location[0]]
+
+
+def _own_half(team, location):
+    # Black's half of the board is ranks 0-4, red's half is ranks 5-9.
+    return location[1] < N_RANKS // 2 if team == 'b' else location[1] >= N_RANKS // 2
+
+
+def _general_moves(team, square):
+    x, y = SQUARE_LOCATIONS[square]
+    moves = 0
+    for dx, dy in ORTHOGONAL_DIRECTIONS:
+        if (x + dx, y + dy) in PALACE_LOCATIONS[team]:
+            moves |= _mask((x + dx, y + dy))
+    return moves
+
+
+def _adviser_moves(team, square):
+    x, y = SQUARE_LOCATIONS[square]
+    moves = 0
+    for dx, dy in DIAGONAL_DIRECTIONS:
+        if (x + dx, y + dy) in PALACE_LOCATIONS[team]:
+            moves |= _mask((x + dx, y + dy))
+    return moves
+
+
+def _elephant_moves(team, square):
+    # Elephants move exactly two points diagonally, may not cross the river, and are blocked by a piece on the point
+    # in between (the elephant's eye).
+    x, y = SQUARE_LOCATIONS[square]
+    moves = []
+    for dx, dy in DIAGONAL_DIRECTIONS:
+        target = (x + 2 * dx, y + 2 * dy)
+        if is_on_board(target) and _own_half(team, target):
+            moves.append((_mask((x + dx, y + dy)), _mask(target)))
+    return tuple(moves)
+
+
+def _horse_moves(square):
+    # Horses move one point orthogonally and then one point diagonally outwards. The orthogonal point (the horse's leg)
+    # must be empty. Each entry groups the two targets that share a leg.
+    x, y = SQUARE_LOCATIONS[square]
+    moves = []
+    for dx, dy in ORTHOGONAL_DIRECTIONS:
+        leg = (x + dx, y + dy)
+        if not is_on_board(leg):
+            continue
+
+        targets = 0
+        for side in (-1, 1):
+            target = (x + 2 * dx + side * dy, y + 2 * dy + side * dx)
+            if is_on_board(target):
+                targets |= _mask(target)
+
+        if targets:
+            moves.append((_mask(leg), targets))
+    return tuple(moves)
+
+
+def _pawn_moves(team, square):
+    # Pawns only move forward until they cross the river, after which they may also move sideways.
+    x, y = SQUARE_LOCATIONS[square]
+    moves = 0
+    if is_on_board((x, y + FORWARD[team])):
+        moves |= _mask((x, y + FORWARD[team]))
+
+    if not _own_half(team, (x, y)):
+        for dx in (-1, 1):
+            if is_on_board((x + dx, y)):
+                moves |= _mask((x + dx, y))
+    return moves
+
+
+def _rays(square):
+    # The squares along each orthogonal direction, ordered outwards from the square.
+    x, y = SQUARE_LOCATIONS[square]
+    rays = []
+    for dx, dy in ORTHOGONAL_DIRECTIONS:
+        ray = []
+        location = (x + dx, y + dy)
+        while is_on_board(location):
+            ray.append(_mask(location))
+            location = (location[0] + dx, location[1] + dy)
+        rays.append(tuple(ray))
+    return tuple(rays)
+
+
+GENERAL_MOVES = {team: tuple(_general_moves(team, square) for square in SQUARES) for team in ('r', 'b')}
+ADVISER_MOVES = {team: tuple(_adviser_moves(team, square) for square in SQUARES) for team in ('r', 'b')}
+ELEPHANT_MOVES = {team: tuple(_elephant_moves(team, square) for square in SQUARES) for team in ('r', 'b')}
+HORSE_MOVES = tuple(_horse_moves(square) for square in SQUARES)
+PAWN_MOVES = {team: tuple(_pawn_moves(team, square) for square in SQUARES) for team in ('r', 'b')}
+RAYS = tuple(_rays(square) for square in SQUARES)
+
+
+def _horse_attackers(square):
+    # The horses that attack a square, grouped by the leg they need empty (one of the square's diagonal neighbours).
+    attackers = {}
+    for horse_square in SQUARES:
+        for leg, targets in HORSE_MOVES[horse_square]:
+            if targets & SQUARE_MASKS[square]:
+                attackers[leg] = attackers.get(leg, 0) | SQUARE_MASKS[horse_square]
+    return tuple(attackers.items())
+
+
+# Square -> tuple of (leg, horses): a horse on any of the squares of horses attacks the square when leg is empty.
+HORSE_ATTACKERS = tuple(_horse_attackers(square) for square in SQUARES)
+
+# Team -> square -> the squares from which a pawn of the team attacks the square.
+PAWN_ATTACKERS = {team: tuple(sum(SQUARE_MASKS[pawn_square] for pawn_square in SQUARES
+                                  if PAWN_MOVES[team][pawn_square] & SQUARE_MASKS[square]) for square in SQUARES)
+                  for team in ('r', 'b')}
+
+
+def _line_attack_table(position, length, cannon):
+    # For a line of points 0..length-1 where point p is stored at bit p, the points a chariot or cannon at position
+    # attacks, indexed by the line's occupancy. The piece's own bit is ignored.
+    table = []
+    for occupancy in range(1 << length):
+        attacks = 0
+        for step in (-1, 1):
+            screened = False
+            point = position + step
+            while 0 <= point < length:
+                occupied = occupancy >> point & 1
+                if not screened:
+                    if occupied and not cannon:
+                        attacks |= 1 << point
+                        break
+                    elif occupied:
+                        screened = True
+                    else:
+                        attacks |= 1 << point
+                elif occupied:
+                    attacks |= 1 << point
+                    break
+                point += step
+        table.append(attacks)
+    return table
+
+
+# Bit offset of each rank's 9 bits, and the mask of a single rank once shifted down. Within a rank, file x is stored
+# at bit (N_FILES - 1 - x).
+RANK_SHIFTS = tuple(BIT_BOARD_WIDTH - N_FILES * (y + 1) for y in range(N_RANKS))
+RANK_MASK = (1 << N_FILES) - 1
+
+# Shift that moves file x onto the last file, and the mask of the last file. On the last file, rank y is stored at bit
+# N_FILES * (N_RANKS - 1 - y).
+FILE_SHIFTS = tuple(N_FILES - 1 - x for x in range(N_FILES))
+FILE_MASK = sum(1 << (N_FILES * (N_RANKS - 1 - y)) for y in range(N_RANKS))
+
+# Spreads a contiguous file pattern (rank y at bit y) onto the last file.
+_FILE_SPREAD = tuple(sum(1 << (N_FILES * (N_RANKS - 1 - y)) for y in range(N_RANKS) if pattern >> y & 1)
+                     for pattern in range(1 << N_RANKS))
+
+
+def _rank_attack_table(x, cannon):
+    # Index and value both use the rank layout, which is a line with file x at point (N_FILES - 1 - x).
+    return tuple(_line_attack_table(N_FILES - 1 - x, N_FILES, cannon))
+
+
+def _file_attack_table(y, cannon):
+    # Key and value both use the last file's layout.
+    return {_FILE_SPREAD[occupancy]: _FILE_SPREAD[attacks]
+            for occupancy, attacks in enumerate(_line_attack_table(y, N_RANKS, cannon))}
+
+
+CHARIOT_RANK_ATTACKS = tuple(_rank_attack_table(x, False) for x in range(N_FILES))
+CANNON_RANK_ATTACKS = tuple(_rank_attack_table(x, True) for x in range(N_FILES))
+CHARIOT_FILE_ATTACKS = tuple(_file_attack_table(y, False) for y in range(N_RANKS))
+CANNON_FILE_ATTACKS = tuple(_file_attack_table(y, True) for y in range(N_RANKS))
+
+# Square -> (rank shift, rank table, file shift, file table), so that a lookup needs a single index per square.
+CHARIOT_LOOKUP = tuple((RANK_SHIFTS[y], CHARIOT_RANK_ATTACKS[x], FILE_SHIFTS[x], CHARIOT_FILE_ATTACKS[y])
+                       for x, y in SQUARE_LOCATIONS)
+CANNON_LOOKUP = tuple((RANK_SHIFTS[y], CANNON_RANK_ATTACKS[x], FILE_SHIFTS[x], CANNON_FILE_ATTACKS[y])
+                      for x, y in SQUARE_LOCATIONS)
@@ -0,0 +1,397 @@
+"""
+This file contains the BitBoard, the game state shared by move generation, search and the GUI.
+"""
+from collections.abc import MutableMapping
+from .engine_constants import N_FILES, N_RANKS, BIT_BOARD_WIDTH, PIECE_CLASSES, PIECE_CODES, FIRST_RED_PIECE_CODE, \
+    NO_PIECE
+from .evaluation import PIECE_SQUARE_VALUES, compute_score
+from .fen import DEFAULT_FEN, parse_fen, board_to_fen
+from .square import SQUARES, SQUARE_MASKS, iter_squares, squares_by_piece_class
+from .zobrist import ZOBRIST_PIECE_SQUARE, ZOBRIST_BLACK_TO_MOVE, compute_zobrist_key
+
+
+class BitBoard(MutableMapping):
+    """
+    The game state: one bitboard per piece class, stored in a list indexed by piece code (see engine.moves), and a
+    mailbox of the piece code on each of the 90 squares (NO_PIECE when empty), kept in sync so that finding the piece on
+    a square is a single lookup. The mapping interface (piece class -> bitboard) reads and writes the same storage.
+    """
+    __slots__ = ('boards', 'mailbox', 'red_occupancy', 'black_occupancy', 'occupancy', 'side_to_move', 'zobrist_key',
+                 'score', 'halfmove_clock', 'fullmove_number')
+
+    # When enabled, the occupancy boards are verified against the piece boards after every mutation (used in tests).
+    CHECK_CONSISTENCY = False
+
+    def __init__(self, board_state=None, verbose=True):
+        """
+        Initialize a BitBoard object to encapsulate the board's game state. If no initial board state is specified, then
+        the starting position is used.
+
+        :param board_state: shape: (N_RANK, N_FILE) string array, containing the game's board state.
+        :param verbose: whether to print the board state while loading it.
+        """
+        self._clear()
+        if board_state is None:
+            # The starting position, read from its FEN string so that no numpy array is needed.
+            self.load_fen(DEFAULT_FEN)
+        else:
+            self.string_array_to_bit_board(board_state, verbose)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Create a BitBoard from a FEN string (see engine.fen).
+
+        :param fen: a Xiangqi FEN string.
+        :return: a BitBoard object.
+        """
+        bit_board = cls.__new__(cls)
+        bit_board._clear()
+        bit_board.load_fen(fen)
+        return bit_board
+
+    @classmethod
+    def from_bit_boards(cls, bit_boards, side_to_move='r'):
+        """
+        Create a BitBoard from the bitboard of each piece class.
+
+        :param bit_boards: a mapping of piece class -> bitboard. Missing piece classes are empty.
+        :param side_to_move: either 'r' for the red team or 'b' for the black team.
+        :return: a BitBoard object.
+        """
+        bit_board = cls.__new__(cls)
+        bit_board._clear()
+        bit_board.set_position(bit_boards, side_to_move)
+        return bit_board
+
+    def copy(self):
+        """
+        :return: an independent BitBoard holding the same position.
+        """
+        bit_board = BitBoard.__new__(BitBoard)
+        for name in BitBoard.__slots__:
+            setattr(bit_board, name, getattr(self, name))
+        bit_board.boards = self.boards.copy()
+        bit_board.mailbox = self.mailbox.copy()
+        return bit_board
+
+    def _clear(self):
+        # The bitboard of each piece code. Index NO_PIECE is always empty, so that a move's captured code can index it.
+        self.boards = [0] * (len(PIECE_CLASSES) + 1)
+        # The piece code on each square, one byte each.
+        self.mailbox = bytearray(len(SQUARES))
+
+        # Aggregate boards, kept in sync with the piece boards on every mutation.
+        self.red_occupancy = 0
+        self.black_occupancy = 0
+        self.occupancy = 0
+
+        # Red always moves first.
+        self.side_to_move = 'r'
+
+        # 64-bit Zobrist key of the position, updated incrementally by every mutation (see engine.zobrist).
+        self.zobrist_key = 0
+
+        # Material and piece-square score from red's point of view, updated incrementally by every mutation (see
+        # engine.evaluation).
+        self.score = 0
+
+        # FEN move counters. They are not changed by make_move/unmake_move; ChessEngine keeps them up to date.
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+    @property
+    def bit_boards(self):
+        """
+        :return: a new dictionary of piece class -> bitboard, in PIECE_CLASSES order. Writing to it does not change the
+        BitBoard; assign through the mapping interface (bit_board[piece_class] = ...) instead.
+        """
+        return dict(zip(PIECE_CLASSES, self.boards[1:]))
+
+    def __getitem__(self, piece_name):
+        code = PIECE_CODES.get(piece_name)
+        return None if code is None else self.boards[code]
+
+    def __str__(self):
+        return '\n'.join(f"{k}: {format(self[k], f'0{BIT_BOARD_WIDTH}b')}" for k in PIECE_CLASSES)
+
+    def __iter__(self):
+        return iter(PIECE_CLASSES)
+
+    def __len__(self):
+        return len(PIECE_CLASSES)
+
+    def __setitem__(self, key, value):
+        code = PIECE_CODES[key]
+        # Pieces of the same team never overlap, so the squares that changed can be toggled in the team's occupancy.
+        changed = self.boards[code] ^ value
+        self.boards[code] = value
+
+        if code >= FIRST_RED_PIECE_CODE:
+            self.red_occupancy ^= changed
+        else:
+            self.black_occupancy ^= changed
+        self.occupancy = self.red_occupancy | self.black_occupancy
+
+        zobrist_squares = ZOBRIST_PIECE_SQUARE[code]
+        square_values = PIECE_SQUARE_VALUES[code]
+        mailbox = self.mailbox
+        for square in iter_squares(changed):
+            self.zobrist_key ^= zobrist_squares[square]
+            if value & SQUARE_MASKS[square]:
+                self.score += square_values[square]
+                mailbox[square] = code
+            else:
+                self.score -= square_values[square]
+                if mailbox[square] == code:
+                    mailbox[square] = NO_PIECE
+
+        if self.CHECK_CONSISTENCY:
+            self.check_consistency()
+
+    def __delitem__(self, key):
+        # The piece classes are fixed, so deleting one only empties its board.
+        self[key] = 0
+
+    def piece_at(self, square):
+        """
+        :param square: an integer in [0, 90), see engine.square.
+        :return: the piece code on the square, or NO_PIECE if it is empty.
+        """
+        return self.mailbox[square]
+
+    def make_move(self, move):
+        """
+        Play an encoded move (see engine.moves). The move is assumed to be valid for the current position; only the
+        boards of the moving and the captured piece are touched.
+
+        :param move: an encoded move.
+        :return: void, the board is updated in place.
+        """
+        self._toggle_move(move)
+        mailbox = self.mailbox
+        mailbox[move & 0x7F] = NO_PIECE
+        mailbox[move >> 7 & 0x7F] = move >> 14 & 0xF
+        self.score += _score_change(move)
+        self.set_side_to_move('b' if (move >> 14 & 0xF) >= FIRST_RED_PIECE_CODE else 'r')
+
+        if self.CHECK_CONSISTENCY:
+            self.check_consistency()
+
+    def unmake_move(self, move):
+        """
+        Take back an encoded move that was the last move played with make_move.
+
+        :param move: an encoded move.
+        :return: void, the board is updated in place.
+        """
+        self._toggle_move(move)
+        mailbox = self.mailbox
+        mailbox[move & 0x7F] = move >> 14 & 0xF
+        mailbox[move >> 7 & 0x7F] = move >> 18 & 0xF
+        self.score -= _score_change(move)
+        self.set_side_to_move('r' if (move >> 14 & 0xF) >= FIRST_RED_PIECE_CODE else 'b')
+
+        if self.CHECK_CONSISTENCY:
+            self.check_consistency()
+
+    def _toggle_move(self, move):
+        # Every change a move makes to the bitboards is an XOR, so applying it a second time takes the move back. The
+        # mailbox is not, so make_move and unmake_move update it themselves.
+        from_square = move & 0x7F
+        to_square = move >> 7 & 0x7F
+        to_mask = SQUARE_MASKS[to_square]
+        from_to = SQUARE_MASKS[from_square] | to_mask
+        moved_code = move >> 14 & 0xF
+        captured_code = move >> 18 & 0xF
+        boards = self.boards
+
+        # A captured code of NO_PIECE hashes to 0.
+        self.zobrist_key ^= ZOBRIST_PIECE_SQUARE[moved_code][from_square] ^ \
+            ZOBRIST_PIECE_SQUARE[moved_code][to_square] ^ \
+            ZOBRIST_PIECE_SQUARE[captured_code][to_square]
+
+        boards[moved_code] ^= from_to
+
+        if moved_code >= FIRST_RED_PIECE_CODE:
+            self.red_occupancy ^= from_to
+            if captured_code != NO_PIECE:
+                boards[captured_code] ^= to_mask
+                self.black_occupancy ^= to_mask
+        else:
+            self.black_occupancy ^= from_to
+            if captured_code != NO_PIECE:
+                boards[captured_code] ^= to_mask
+                self.red_occupancy ^= to_mask
+        self.occupancy = self.red_occupancy | self.black_occupancy
+
+    def set_side_to_move(self, team):
+        """
+        Set which team moves next, keeping the Zobrist key in sync.
+
+        :param team: either 'r' for the red team or 'b' for the black team.
+        :return: void
+        """
+        if team != self.side_to_move:
+            self.side_to_move = team
+            self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    def team_occupancy(self, team):
+        """
+        Obtains the squares occupied by one team.
+
+        :param team: either 'r' for the red team or 'b' for the black team.
+        :return: a bitboard of every square occupied by the team's pieces.
+        """
+        return self.red_occupancy if team == 'r' else self.black_occupancy
+
+    def update_occupancy(self):
+        """
+        Recomputes the occupancy boards and the mailbox from scratch. Only needed after writing to self.boards directly.
+
+        :return: void, the occupancy boards are updated in place.
+        """
+        self.red_occupancy = 0
+        self.black_occupancy = 0
+        mailbox = self.mailbox
+        mailbox[:] = bytes(len(SQUARES))
+
+        for code in range(1, len(self.boards)):
+            board = self.boards[code]
+            if code >= FIRST_RED_PIECE_CODE:
+                self.red_occupancy |= board
+            else:
+                self.black_occupancy |= board
+            for square in iter_squares(board):
+                mailbox[square] = code
+
+        self.occupancy = self.red_occupancy | self.black_occupancy
+
+    def check_consistency(self):
+        """
+        Verifies that the occupancy boards, the mailbox, the Zobrist key and the score agree with the piece boards, and
+        that no two pieces share a square.
+
+        :return: void, an AssertionError is raised if the BitBoard is inconsistent.
+        """
+        red_occupancy, black_occupancy, seen = 0, 0, 0
+        mailbox = bytearray(len(SQUARES))
+
+        assert self.boards[NO_PIECE] == 0, "the NO_PIECE board is not empty"
+        for code in range(1, len(self.boards)):
+            board = self.boards[code]
+            assert board & seen == 0, f"piece class {PIECE_CLASSES[code - 1]} overlaps another piece"
+            seen |= board
+
+            if code >= FIRST_RED_PIECE_CODE:
+                red_occupancy |= board
+            else:
+                black_occupancy |= board
+            for square in iter_squares(board):
+                mailbox[square] = code
+
+        assert self.red_occupancy == red_occupancy, "red occupancy is out of sync"
+        assert self.black_occupancy == black_occupancy, "black occupancy is out of sync"
+        assert self.occupancy == red_occupancy | black_occupancy, "occupancy is out of sync"
+        assert self.mailbox == mailbox, "mailbox is out of sync"
+        assert self.zobrist_key == compute_zobrist_key(self), "zobrist key is out of sync"
+        assert self.score == compute_score(self), "score is out of sync"
+
+    def get_locations_by_piece_class(self):
+        """
+        Obtains the squares occupied by every piece class.
+
+        :return: A dictionary of piece class -> list of square indices (y * N_FILES + x), in reading order.
+        """
+        return squares_by_piece_class(self)
+
+    def get_class_by_location(self, location):
+        """
+        Obtains the class of the piece at a given location
+
+        :param location: 2-Tuple (x,y) of the piece
+        :return: A string containing the internal representation of the piece if a piece exists, or "" otherwise.
+        """
+        code = self.mailbox[location[1] * N_FILES + location[0]]
+        return PIECE_CLASSES[code - 1] if code != NO_PIECE else ""
+
+    def load_fen(self, fen):
+        """
+        Replace the position with one read from a FEN string (see engine.fen).
+
+        :param fen: a Xiangqi FEN string.
+        :return: void, all bit boards are updated in place.
+        """
+        bit_boards, side_to_move, self.halfmove_clock, self.fullmove_number = parse_fen(fen)
+        self.set_position(bit_boards, side_to_move)
+
+    def set_position(self, bit_boards, side_to_move):
+        """
+        Replace the position, recomputing the occupancy boards, the Zobrist key and the score.
+
+        :param bit_boards: a mapping of piece class -> bitboard. Missing piece classes are empty.
+        :param side_to_move: either 'r' for the red team or 'b' for the black team.
+        :return: void, all bit boards are updated in place.
+        """
+        self.boards[1:] = [bit_boards.get(piece_class, 0) for piece_class in PIECE_CLASSES]
+        self.side_to_move = side_to_move
+        self.update_occupancy()
+        self.zobrist_key = compute_zobrist_key(self)
+        self.score = compute_score(self)
+
+    def to_fen(self):
+        """
+        Serialize the position to a FEN string (see engine.fen).
+
+        :return: the FEN string.
+        """
+        return board_to_fen(self, self.side_to_move, self.halfmove_clock, self.fullmove_number)
+
+    def string_array_to_bit_board(self, string_game_state, verbose=True):
+        """
+        Update the bitboards from 2D string array representation of a game state.
+
+        Board Pieces Key:
+            r/R: Chariot (rook)\n
+            h/H: Horse\n
+            e/E: Elephant\n
+            a/A: Adviser\n
+            g/G: General\n
+            c/C: Cannon\n
+            p/P: Pawn/Soldier\n
+              .: Empty space
+
+        :param string_game_state: a 2D array containing the individual pieces of the board, encoded via the key above.
+        Any sequence of N_RANKS rows of N_FILES pieces works, e.g. a numpy array or a list of strings.
+        :param verbose: whether to display more detailed output.
+        :return: void, all bit boards are updated in place.
+        """
+        # Ensure that the string representation is of the right dimensions.
+        assert len(string_game_state) == N_RANKS and all(len(row) == N_FILES for row in string_game_state)
+
+        if verbose:
+            print(string_game_state)
+
+        for y in range(N_RANKS):
+            for x in range(N_FILES):
+                # Determine the piece's type. If the piece is blank (.), then move to the next piece.
+                piece = string_game_state[y][x]
+
+                if piece == '.':
+                    continue
+
+                # Add the current position's binary to the correct bit board.
+                if piece in PIECE_CODES:
+                    self.boards[PIECE_CODES[piece]] |= SQUARE_MASKS[y * N_FILES + x]
+
+        self.update_occupancy()
+        self.zobrist_key = compute_zobrist_key(self)
+        self.score = compute_score(self)
+
+
+def _score_change(move):
+    # The change in BitBoard.score when a move is played. A captured code of NO_PIECE is worth 0.
+    from_square = move & 0x7F
+    to_square = move >> 7 & 0x7F
+    moved_values = PIECE_SQUARE_VALUES[move >> 14 & 0xF]
+    return moved_values[to_square] - moved_values[from_square] - PIECE_SQUARE_VALUES[move >> 18 & 0xF][to_square]
@@ -1,115 +1,131 @@
-from collections import MutableMapping
+from .bit_board import BitBoard
+from .parallel_search import parallel_search
+from .piece_movement import generate_legal_moves
+from .search import Searcher, SearchResult
+from .tablebase import Tablebase
+from .transposition_table import TranspositionTable
 
 
 class ChessEngine:
-    # TODO: Add in rules to generate legal moves
-    # TODO: Build an AI
 
-    def __init__(self, board_state=None):
-        self.bit_board = BitBoard(board_state)
-
-
-class BitBoard(MutableMapping):
-    def __init__(self, board_state=None):
+    def __init__(self, board_state=None, transposition_table_mb=16, fen=None, opening_book=None, tablebase=None):
         """
-        Initialize a BitBoard object to encapsulate the board's game state. If no initial board state is specified, then
-        the default board state is used.
-
-        :param board_state: shape: (N_RANK, N_FILE) string array, containing the game's board state.
+        Initialize the engine with a position.
+
+        :param board_state: shape: (N_RANK, N_FILE) string array, containing the game's board state. Uses the default
+        board state if not specified.
+        :param transposition_table_mb: memory budget of the search's transposition table, allocated on the first search.
+        :param fen: a FEN string (see engine.fen) to start from instead of board_state.
+        :param opening_book: an OpeningBook, or the path of a book file, that search consults before searching.
+        :param tablebase: a Tablebase, or the directory of tablebase files, that search probes in the endgame.
         """
-        from engine.engine_constants import DEFAULT_BOARD_STATE
-
-        self.bit_boards = {
-            'r': 0, 'h': 0, 'e': 0, 'a': 0, 'g': 0, 'c': 0, 'p': 0,  # black's pieces
-            'R': 0, 'H': 0, 'E': 0, 'A': 0, 'G': 0, 'C': 0, 'P': 0,  # red's pieces
-        }
-
-        self.string_array_to_bit_board(DEFAULT_BOARD_STATE if board_state is None else board_state)
-
-    def __getitem__(self, piece_name):
-        return self.bit_boards[piece_name] if piece_name in self.bit_boards else None
-
-    def __str__(self):
-        import numpy as np
-        from engine.engine_constants import BIT_BOARD_WIDTH
-        return '\n'.join(f"{k}: {np.binary_repr(self.bit_boards[k], width=BIT_BOARD_WIDTH)}" for k in self.bit_boards)
+        self.bit_board = BitBoard.from_fen(fen) if fen is not None else BitBoard(board_state)
+        # Every move made through make_move, most recent last. Each encoded move is its own undo record.
+        self.move_stack = []
+        # The Zobrist key of the position before each move in move_stack, for repetition detection.
+        self.key_history = []
+        # The halfmove clock before each move in move_stack, which a capture resets.
+        self.clock_history = []
+
+        self.transposition_table_mb = transposition_table_mb
+        self.transposition_table = None
+
+        if isinstance(opening_book, str):
+            # Opening books are read with numpy, which the rest of the engine does without.
+            from .opening_book import OpeningBook
+            opening_book = OpeningBook(opening_book)
+        self.opening_book = opening_book
+
+        if isinstance(tablebase, str):
+            tablebase = Tablebase(tablebase)
+        self.tablebase = tablebase
+
+    def search(self, depth=None, time_limit=None, node_limit=None, info_callback=None, workers=1, stop_event=None):
+        """
+        Search the current position for the best move of the side to move, with iterative deepening alpha-beta (see
+        engine.search). The position is unchanged afterwards.
+
+        :param depth: the maximum depth in plies. If no limit at all is given, a default depth is used.
+        :param time_limit: the maximum time to search, in seconds.
+        :param node_limit: the maximum number of nodes to search. Not supported by the parallel search.
+        :param info_callback: optional function called with a SearchResult after every completed iteration.
+        :param workers: the number of processes to search with. More than one splits the root moves across a process
+        pool (see engine.parallel_search), whose time limit only stops further iterations from starting.
+        :param stop_event: optional threading.Event that stops the search when set, e.g. by another thread. Not
+        supported by the parallel search.
+        :return: a SearchResult (best_move, score, pv, depth, nodes, time, nps). The score is in centipawns from the
+        side to move's point of view. A move from the opening book is returned without searching, with depth 0.
+        """
+        if self.opening_book is not None:
+            book_move = self.opening_book.choose(
+                self.bit_board, generate_legal_moves(self.bit_board, self.bit_board.side_to_move))
+            if book_move:
+                return SearchResult(book_move, 0, [book_move], 0, 0, 0.0, 0.0)
 
-    def __iter__(self):
-        return self.bit_boards.__iter__()
+        if workers > 1:
+            if node_limit is not None or stop_event is not None:
+                raise ValueError("node_limit and stop_event are not supported by the parallel search")
+            return parallel_search(self.bit_board, depth, time_limit, workers, self.key_history, info_callback)
 
-    def __len__(self):
-        return self.bit_boards.__len__()
+        if self.transposition_table is None:
+            self.transposition_table = TranspositionTable(self.transposition_table_mb)
 
-    def __setitem__(self, key, value):
-        self.bit_boards[key] = value
+        searcher = Searcher(self.bit_board, self.transposition_table, self.key_history, self.tablebase)
+        return searcher.search(depth, time_limit, node_limit, info_callback, stop_event)
 
-    def __delitem__(self, key):
-        self.bit_boards.__delitem__(key)
+    def load_fen(self, fen):
+        """
+        Start again from a new position, forgetting the moves made so far. The transposition table is kept.
 
-    def get_locations_by_piece_class(self):
-        from engine.engine_constants import BIT_BOARD_WIDTH
-        import numpy as np
-        locations = {}
+        :param fen: a FEN string (see engine.fen).
+        :return: void
+        """
+        self.bit_board.load_fen(fen)
+        self.move_stack.clear()
+        self.key_history.clear()
+        self.clock_history.clear()
 
-        for piece_class in self.bit_boards:
-            # convert a piece's location to binary
-            binary_rep = np.array(list(np.binary_repr(self.bit_boards[piece_class], width=BIT_BOARD_WIDTH)), dtype='b')
-            # obtain the locations of all non-zero entries
-            locations[piece_class] = np.nonzero(binary_rep)
+    def generate_moves(self):
+        """
+        Generate the legal moves of the side to move. An empty list means the side to move has lost, by checkmate or
+        stalemate.
 
-        return locations
+        :return: a list of encoded moves (see engine.moves).
+        """
+        return generate_legal_moves(self.bit_board, self.bit_board.side_to_move)
 
-    def get_class_by_location(self, location):
+    def make_move(self, move):
         """
-        Obtains the class of the piece at a given location
+        Play a move on the engine's board and remember it so that it can be taken back.
 
-        :param location: 2-Tuple (x,y) of the piece
-        :return: A string containing the internal representation of the piece if a piece exists, or "" otherwise.
+        :param move: an encoded move (see engine.moves), as produced by generate_moves.
+        :return: void, the board is updated in place.
         """
-        from engine.engine_util import location_to_bitboard
-        # Convert the location to a bitboard representation
-        bitboard = location_to_bitboard(location)
+        bit_board = self.bit_board
+        self.key_history.append(bit_board.zobrist_key)
+        self.clock_history.append(bit_board.halfmove_clock)
 
-        for key in self.bit_boards:
-            if self.bit_boards[key] & bitboard != 0:
-                return key
+        bit_board.halfmove_clock = 0 if move >> 18 & 0xF else bit_board.halfmove_clock + 1
+        if bit_board.side_to_move == 'b':
+            bit_board.fullmove_number += 1
 
-        return ""
+        bit_board.make_move(move)
+        self.move_stack.append(move)
 
-    def string_array_to_bit_board(self, string_game_state, verbose=True):
-        """
-        Update the bitboards from 2D string array representation of a game state.
-
-        Board Pieces Key:
-            r/R: Chariot (rook)\n
-            h/H: Horse\n
-            e/E: Elephant\n
-            a/A: Adviser\n
-            g/G: General\n
-            c/C: Cannon\n
-            p/P: Pawn/Soldier\n
-              .: Empty space
-
-        :param string_game_state: a 2D array containing the individual pieces of the board, encoded via the key above.
-        :param verbose: whether to display more detailed output.
-        :return: void, all bit boards are updated in place.
+    def unmake_move(self):
         """
-        from engine.engine_constants import N_RANKS, N_FILES
-        from engine.engine_util import location_to_bitboard
-        # Ensure that the string representation is of the right dimensions.
-        assert (string_game_state.shape == (N_RANKS, N_FILES))
+        Take back the most recent move made through make_move.
 
-        if verbose:
-            print(string_game_state)
-
-        for y in range(N_RANKS):
-            for x in range(N_FILES):
-                # Determine the piece's type. If the piece is blank (.), then move to the next piece.
-                piece = string_game_state[y][x]
+        :return: the encoded move that was taken back, or None if no moves have been made.
+        """
+        if not self.move_stack:
+            return None
 
-                if piece is '.':
-                    continue
+        move = self.move_stack.pop()
+        self.key_history.pop()
+        self.bit_board.unmake_move(move)
 
-                # Add the current position's binary to the correct bit board.
-                if piece in self.bit_boards:
-                    self.bit_boards[piece] += location_to_bitboard((x, y))
+        self.bit_board.halfmove_clock = self.clock_history.pop()
+        if self.bit_board.side_to_move == 'b':
+            self.bit_board.fullmove_number -= 1
+        return move
@@ -1,22 +1,31 @@
-import numpy as np
-from .engine_util import locations_to_bitboard
-
 N_FILES = 9
 N_RANKS = 10
 BIT_BOARD_WIDTH = N_FILES * N_RANKS
 
-DEFAULT_BOARD_STATE = np.array([
-            ['r', 'h', 'e', 'a', 'g', 'a', 'e', 'h', 'r'],
-            ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
-            ['.', 'c', '.', '.', '.', '.', '.', 'c', '.'],
-            ['p', '.', 'p', '.', 'p', '.', 'p', '.', 'p'],
-            ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
-            ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
-            ['P', '.', 'P', '.', 'P', '.', 'P', '.', 'P'],
-            ['.', 'C', '.', '.', '.', '.', '.', 'C', '.'],
-            ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
-            ['R', 'H', 'E', 'A', 'G', 'A', 'E', 'H', 'R'],
-        ])
+# Internal piece classes of each team (see BitBoard.string_array_to_bit_board for the key).
+BLACK_PIECE_CLASSES = ('r', 'h', 'e', 'a', 'g', 'c', 'p')
+RED_PIECE_CLASSES = ('R', 'H', 'E', 'A', 'G', 'C', 'P')
+
+# Small integer piece codes, used wherever a piece class has to be packed into an integer. Code 0 means no piece, black
+# pieces are 1-7 and red pieces are 8-14.
+NO_PIECE = 0
+PIECE_CLASSES = BLACK_PIECE_CLASSES + RED_PIECE_CLASSES
+PIECE_CODES = {piece_class: code for code, piece_class in enumerate(PIECE_CLASSES, start=1)}
+FIRST_RED_PIECE_CODE = PIECE_CODES['R']
+
+# The starting position, rank by rank from black's back rank. DEFAULT_BOARD_STATE is the same as a numpy array.
+_DEFAULT_ROWS = [
+    ['r', 'h', 'e', 'a', 'g', 'a', 'e', 'h', 'r'],
+    ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+    ['.', 'c', '.', '.', '.', '.', '.', 'c', '.'],
+    ['p', '.', 'p', '.', 'p', '.', 'p', '.', 'p'],
+    ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+    ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+    ['P', '.', 'P', '.', 'P', '.', 'P', '.', 'P'],
+    ['.', 'C', '.', '.', '.', '.', '.', 'C', '.'],
+    ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+    ['R', 'H', 'E', 'A', 'G', 'A', 'E', 'H', 'R'],
+]
 
 # Due to the backwards implementation of positions in this engine, rank 9 is actually the first location.
 RANK_9 = int('1'*N_FILES + '0' * N_FILES * (N_RANKS - 1), 2)
@@ -42,9 +51,21 @@ BLACK_PALACE_LOCATIONS = [
 ]
 
 RED_PALACE_LOCATIONS = [
-    (3,  8), (4,  8), (5,  8),
-    (3,  9), (4,  9), (5,  9),
-    (3, 10), (4, 10), (5, 10)
+    (3, 7), (4, 7), (5, 7),
+    (3, 8), (4, 8), (5, 8),
+    (3, 9), (4, 9), (5, 9)
 ]
 
-BLACK_PALACE_BITBOARD = locations_to_bitboard(BLACK_PALACE_LOCATIONS)
+# Built directly from the square layout (square = y * N_FILES + x, stored from the most significant bit), so that this
+# module does not depend on the rest of the engine.
+BLACK_PALACE_BITBOARD = sum(1 << (BIT_BOARD_WIDTH - 1 - (y * N_FILES + x)) for x, y in BLACK_PALACE_LOCATIONS)
+RED_PALACE_BITBOARD = sum(1 << (BIT_BOARD_WIDTH - 1 - (y * N_FILES + x)) for x, y in RED_PALACE_LOCATIONS)
+
+
+def __getattr__(name):
+    # DEFAULT_BOARD_STATE is a numpy array, built on first use so that importing the engine does not import numpy.
+    if name == 'DEFAULT_BOARD_STATE':
+        import numpy as np
+        globals()[name] = np.array(_DEFAULT_ROWS)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,9 @@
+from .engine_constants import N_FILES, PIECE_CLASSES, PIECE_CODES, NO_PIECE
+from .moves import encode_move
+from .piece_movement import return_valid_moves_by_type_and_location
+from .square import SQUARE_MASKS, iter_locations, location_to_square
+
+
 def piece_class_by_location(bit_board, location):
     """
     Find the class of the piece at a given board position
@@ -6,13 +12,8 @@ def piece_class_by_location(bit_board, location):
     :param just_class: whether to just return the internal name of the piece or not.
     :return: the piece's class at location, or None if it does not exist.
     """
-    location_bitboard = location_to_bitboard(location)
-
-    for key in bit_board:
-        if bit_board[key] & location_bitboard != 0:
-            return key
-
-    return None
+    code = bit_board.mailbox[location_to_square(location)]
+    return PIECE_CLASSES[code - 1] if code != NO_PIECE else None
 
 
 def bitboard_to_locations(single_piece_bit_board):
@@ -21,22 +22,7 @@ def bitboard_to_locations(single_piece_bit_board):
     :param single_piece_bit_board: integer containing the bitboard of a single piece
     :return: a list containing 2-tuples (x,y) of all the locations.
     """
-    from .engine_constants import N_FILES, N_RANKS
-    import numpy as np
-    locations = []
-
-    # Convert the bit board into a string
-    binary_rep = np.binary_repr(single_piece_bit_board, width=N_FILES * N_RANKS)
-
-    for i in range(len(binary_rep)):
-        if binary_rep[i] == '1':
-            # Decode the position into its x and y grid coordinates
-            x_location = i % N_FILES
-            y_location = i // N_FILES
-            locations.append((x_location, y_location))
-
-    # Return the list of all locations, as specified by the bit board.
-    return locations
+    return list(iter_locations(single_piece_bit_board))
 
 
 def locations_to_bitboard(locations):
@@ -48,7 +34,7 @@ def locations_to_bitboard(locations):
     bit_board = 0
 
     for location in locations:
-        bit_board += location_to_bitboard(location)
+        bit_board |= SQUARE_MASKS[location[1] * N_FILES + location[0]]
 
     return bit_board
 
@@ -59,16 +45,7 @@ def location_to_bitboard(location):
     :param location: a 2-Tuple (x,y) of grid coordinates.
     :return: an integer containing the underlying bitboard representation.
     """
-    from engine.engine_constants import BIT_BOARD_WIDTH, N_FILES
-    # Create a string of 0s with capacity to store the entire board state.
-    binary = '0' * BIT_BOARD_WIDTH
-
-    # Denote the current position with a 1.
-    loc = location[1] * N_FILES + location[0]
-    binary = binary[:loc] + '1' + binary[loc + 1:]
-
-    # Return the corresponding bit board as a number.
-    return int(binary, 2)
+    return SQUARE_MASKS[location[1] * N_FILES + location[0]]
 
 
 def move_piece_by_location(bit_boards, old_location, new_location):
@@ -80,20 +57,12 @@ def move_piece_by_location(bit_boards, old_location, new_location):
     :param new_location: 2-tuple (x,y), The location to move the piece to.
     :return: boolean, True if the movement is valid, and False otherwise.
     """
-    from .piece_movement import return_valid_moves_by_type_and_location
     # Convert the locations into their bitboard representations.
     old_bitboard = location_to_bitboard(old_location)
     new_bitboard = location_to_bitboard(new_location)
 
     # The type of the piece we're moving
-    piece_type = None
-
-    # Determine the piece class by its location:
-    for key in bit_boards:
-        # Remove the position from the old bit board
-        if bit_boards[key] & old_bitboard != 0:
-            piece_type = key
-            break
+    piece_type = piece_class_by_location(bit_boards, old_location)
 
     if piece_type is not None:
         # Determine the bitboard of valid locations for movement by the piece
@@ -104,17 +73,11 @@ def move_piece_by_location(bit_boards, old_location, new_location):
         if new_bitboard & valid_movement_options == 0:
             return False
 
-        # Update the board positions
-        bit_boards[piece_type] &= ~old_bitboard
-        bit_boards[piece_type] |= new_bitboard
-
-        # Black team pieces are represented by lower case letters.
-        team = 'b' if str.islower(piece_type) else 'r'
-        # Handle capturing the other team's pieces (if they exist):
-        for key in bit_boards:
-            # Case of capturing a red piece.
-            if (team == 'b' and str.isupper(key)) or (team == 'r' and str.islower(key)):
-                bit_boards[key] &= ~new_bitboard
+        # Update the board positions, capturing whatever stands on the new location (valid moves never land on the
+        # team's own pieces).
+        new_square = location_to_square(new_location)
+        bit_boards.make_move(encode_move(location_to_square(old_location), new_square, PIECE_CODES[piece_type],
+                                         bit_boards.mailbox[new_square]))
 
         return True
 
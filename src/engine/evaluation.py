@@ -0,0 +1,77 @@
+"""
+This file contains the static evaluation: a material value per piece type plus a piece-square bonus per point of the
+board, both loaded from a data file (res/piece_square_tables.json by default). The file gives red's tables with one
+row per rank (y = 0 at the top); black uses the same tables mirrored vertically.
+
+The two are folded into one signed value per (piece code, square), positive for red and negative for black, so a
+position's score from red's point of view is the sum of the values of its pieces. BitBoard keeps that sum up to date
+incrementally; compute_score recomputes it from scratch for verification.
+"""
+import json
+import os
+from .engine_constants import N_FILES, N_RANKS, PIECE_CLASSES
+from .square import SQUARES, SQUARE_LOCATIONS, iter_squares
+
+PIECE_SQUARE_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'res',
+                                        'piece_square_tables.json')
+
+
+def load_evaluation(path=PIECE_SQUARE_TABLES_PATH):
+    """
+    Load material values and piece-square tables from a JSON file with a "material" object (piece type -> value) and
+    a "piece_square_tables" object (piece type -> N_RANKS rows of N_FILES values, for red).
+    :param path: the file to load.
+    :return: a 2-tuple (material, piece_square_values): a dictionary of piece type -> value, and a list indexed by
+    piece code of tuples indexed by square. Code 0 (no piece) is 0 on every square.
+    """
+    with open(path) as file:
+        data = json.load(file)
+
+    material = {piece_type: int(value) for piece_type, value in data['material'].items()}
+    tables = data['piece_square_tables']
+
+    piece_square_values = [tuple(0 for _ in SQUARES)]
+    for piece_class in PIECE_CLASSES:
+        piece_type = piece_class.lower()
+        table = tables[piece_type]
+        if len(table) != N_RANKS or any(len(row) != N_FILES for row in table):
+            raise ValueError(f"piece-square table '{piece_type}' in {path} is not {N_RANKS} rows of {N_FILES} values")
+
+        if piece_class.isupper():
+            values = (material[piece_type] + table[y][x] for x, y in SQUARE_LOCATIONS)
+        else:
+            values = (-(material[piece_type] + table[N_RANKS - 1 - y][x]) for x, y in SQUARE_LOCATIONS)
+        piece_square_values.append(tuple(int(value) for value in values))
+
+    return material, piece_square_values
+
+
+MATERIAL_VALUES, PIECE_SQUARE_VALUES = load_evaluation()
+
+
+def use_evaluation(path):
+    """
+    Replace the evaluation tables with those of another file. The tables are updated in place, so modules holding a
+    reference to them see the change; the scores of existing BitBoards must be reset with compute_score.
+    :param path: the file to load (see load_evaluation).
+    :return: void
+    """
+    material, piece_square_values = load_evaluation(path)
+    MATERIAL_VALUES.clear()
+    MATERIAL_VALUES.update(material)
+    PIECE_SQUARE_VALUES[:] = piece_square_values
+
+
+def compute_score(bit_boards):
+    """
+    Computes the score of a position from scratch.
+    :param bit_boards: a BitBoard object
+    :return: the score in centipawns, from red's point of view.
+    """
+    score = 0
+    for code, piece_class in enumerate(PIECE_CLASSES, start=1):
+        values = PIECE_SQUARE_VALUES[code]
+        for square in iter_squares(bit_boards[piece_class]):
+            score += values[square]
+
+    return score
@@ -0,0 +1,118 @@
+"""
+This file contains the batch conversion between positions and feature planes, the (N, 14, N_RANKS, N_FILES) arrays
+used to train evaluation models. Plane i holds the pieces of class PIECE_CLASSES[i] (piece code i + 1), with a 1 at
+[y][x] for every occupied point.
+
+Positions are first packed into 12 big-endian bytes per bitboard, shape (N, 14, PACKED_BYTES). Because square 0 is
+the most significant of the 90 bits, unpacking those bytes yields the squares in reading order after PADDING_BITS
+leading zeros, so a whole batch converts with one numpy.unpackbits and a reshape. Packed arrays can also be given
+directly, e.g. when they were read from disk.
+"""
+import numpy as np
+from .bit_board import BitBoard
+from .engine_constants import N_FILES, N_RANKS, BIT_BOARD_WIDTH, PIECE_CLASSES
+
+N_PLANES = len(PIECE_CLASSES)
+PACKED_BYTES = (BIT_BOARD_WIDTH + 7) // 8
+PADDING_BITS = PACKED_BYTES * 8 - BIT_BOARD_WIDTH
+
+# Positions are unpacked this many at a time, to bound the size of the temporary array.
+CHUNK_SIZE = 4096
+
+
+def pack_bit_boards(positions, out=None):
+    """
+    Pack positions into bytes.
+    :param positions: a sequence of BitBoard objects (or other mappings of piece class -> bitboard), or of sequences
+    of 14 bitboards in plane order.
+    :param out: optional uint8 array of shape (len(positions), N_PLANES, PACKED_BYTES) to write into.
+    :return: the packed uint8 array.
+    """
+    to_bytes = int.to_bytes
+    chunks = []
+    for position in positions:
+        if isinstance(position, BitBoard):
+            # BitBoard stores its boards by piece code, which follows PIECE_CLASSES from code 1.
+            boards = position.boards[1:]
+        elif hasattr(position, 'values'):
+            boards = [position[piece_class] for piece_class in PIECE_CLASSES]
+        else:
+            boards = position
+        if len(boards) != N_PLANES:
+            raise ValueError(f"every position must have {N_PLANES} bitboards")
+
+        chunks.extend([to_bytes(board, PACKED_BYTES, 'big') for board in boards])
+
+    n_positions = len(positions)
+    packed = np.frombuffer(b''.join(chunks), dtype=np.uint8).reshape(n_positions, N_PLANES, PACKED_BYTES)
+    if out is None:
+        return packed
+    out[...] = packed
+    return out
+
+
+def encode_planes(positions, out=None, dtype=np.uint8):
+    """
+    Convert a batch of positions to feature planes.
+    :param positions: a packed uint8 array of shape (N, N_PLANES, PACKED_BYTES), or anything pack_bit_boards accepts.
+    :param out: optional preallocated array of shape (N, N_PLANES, N_RANKS, N_FILES) to fill, of any numeric dtype.
+    :param dtype: the dtype of the array to allocate when out is not given, e.g. numpy.uint8 or numpy.float32.
+    :return: the planes array.
+    """
+    packed = positions if isinstance(positions, np.ndarray) else pack_bit_boards(positions)
+    if packed.dtype != np.uint8 or packed.shape[1:] != (N_PLANES, PACKED_BYTES):
+        raise ValueError(f"packed positions must be uint8 with shape (N, {N_PLANES}, {PACKED_BYTES})")
+
+    n_positions = len(packed)
+    if out is None:
+        out = np.empty((n_positions, N_PLANES, N_RANKS, N_FILES), dtype=dtype)
+    elif out.shape != (n_positions, N_PLANES, N_RANKS, N_FILES):
+        raise ValueError(f"out must have shape ({n_positions}, {N_PLANES}, {N_RANKS}, {N_FILES})")
+
+    for start in range(0, n_positions, CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE, n_positions)
+        bits = np.unpackbits(packed[start:end], axis=-1)[..., PADDING_BITS:]
+        out[start:end] = bits.reshape(end - start, N_PLANES, N_RANKS, N_FILES)
+
+    return out
+
+
+def decode_planes(planes):
+    """
+    Convert feature planes back to packed positions. Any non-zero value counts as an occupied point.
+    :param planes: an array of shape (N, N_PLANES, N_RANKS, N_FILES).
+    :return: a packed uint8 array of shape (N, N_PLANES, PACKED_BYTES).
+    """
+    planes = np.asarray(planes)
+    if planes.shape[1:] != (N_PLANES, N_RANKS, N_FILES):
+        raise ValueError(f"planes must have shape (N, {N_PLANES}, {N_RANKS}, {N_FILES})")
+
+    n_positions = len(planes)
+    bits = np.zeros((n_positions, N_PLANES, PACKED_BYTES * 8), dtype=np.uint8)
+    bits[..., PADDING_BITS:] = planes.reshape(n_positions, N_PLANES, BIT_BOARD_WIDTH) != 0
+    return np.packbits(bits, axis=-1)
+
+
+def unpack_bit_boards(packed):
+    """
+    Convert packed positions to bitboard integers.
+    :param packed: a uint8 array of shape (N, N_PLANES, PACKED_BYTES).
+    :return: a list of N lists of 14 bitboards in plane order.
+    """
+    data = np.ascontiguousarray(packed, dtype=np.uint8).tobytes()
+    boards = [int.from_bytes(data[offset:offset + PACKED_BYTES], 'big')
+              for offset in range(0, len(data), PACKED_BYTES)]
+    return [boards[index:index + N_PLANES] for index in range(0, len(boards), N_PLANES)]
+
+
+def planes_to_bit_boards(planes, sides_to_move=None):
+    """
+    Convert feature planes back to BitBoard objects.
+    :param planes: an array of shape (N, N_PLANES, N_RANKS, N_FILES).
+    :param sides_to_move: optional sequence of N teams ('r' or 'b'). The planes do not record whose turn it is, so red
+    is to move by default.
+    :return: a list of BitBoard objects.
+    """
+    return [BitBoard.from_bit_boards(dict(zip(PIECE_CLASSES, boards)),
+                                     sides_to_move[index] if sides_to_move is not None else 'r')
+            for index, boards in enumerate(unpack_bit_boards(decode_planes(planes)))]
@@ -0,0 +1,100 @@
+"""
+This file contains the parsing and serialization of Xiangqi FEN strings, e.g. the opening position:
+
+    rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1
+
+The board lists the ranks from black's back rank (y = 0) to red's, with digits for runs of empty points. Red pieces
+are upper case and black lower case, using the FEN letters R(chariot) N(horse) B(elephant) A(adviser) K(general)
+C(cannon) P(pawn); the engine's own letters H, E and G are accepted as well. The side to move is 'w' or 'r' for red
+and 'b' for black, followed by two unused fields ('-'), the halfmove clock and the fullmove number. Everything after
+the board is optional.
+"""
+from .engine_constants import N_FILES, N_RANKS, PIECE_CLASSES
+from .square import SQUARE_MASKS, iter_squares
+
+DEFAULT_FEN = 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1'
+
+# Piece class -> FEN letter
+PIECE_CLASS_TO_FEN = dict(zip('rheagcpRHEAGCP', 'rnbakcpRNBAKCP'))
+
+# FEN letter (or the engine's own letter) -> piece class
+FEN_TO_PIECE_CLASS = {**{piece_class: piece_class for piece_class in PIECE_CLASSES},
+                      **{fen_letter: piece_class for piece_class, fen_letter in PIECE_CLASS_TO_FEN.items()}}
+
+FEN_TO_TEAM = {'w': 'r', 'r': 'r', 'b': 'b'}
+
+
+def parse_fen(fen):
+    """
+    Parse a FEN string.
+    :param fen: a Xiangqi FEN string.
+    :return: a 4-tuple (bit_boards, side_to_move, halfmove_clock, fullmove_number), where bit_boards is a dictionary
+    of piece class -> bitboard holding every piece class.
+    """
+    fields = fen.split()
+    if not fields:
+        raise ValueError("empty FEN string")
+
+    bit_boards = dict.fromkeys(PIECE_CLASSES, 0)
+    ranks = fields[0].split('/')
+    if len(ranks) != N_RANKS:
+        raise ValueError(f"FEN board must have {N_RANKS} ranks: {fen!r}")
+
+    for y, rank in enumerate(ranks):
+        square = y * N_FILES
+        end = square + N_FILES
+        for letter in rank:
+            if letter.isdigit():
+                square += int(letter)
+            elif letter in FEN_TO_PIECE_CLASS and square < end:
+                bit_boards[FEN_TO_PIECE_CLASS[letter]] |= SQUARE_MASKS[square]
+                square += 1
+            else:
+                raise ValueError(f"invalid FEN rank {rank!r}: {fen!r}")
+        if square != end:
+            raise ValueError(f"FEN rank {rank!r} does not have {N_FILES} points: {fen!r}")
+
+    side_to_move = 'r'
+    if len(fields) > 1:
+        if fields[1] not in FEN_TO_TEAM:
+            raise ValueError(f"invalid FEN side to move {fields[1]!r}: {fen!r}")
+        side_to_move = FEN_TO_TEAM[fields[1]]
+
+    try:
+        halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+    except ValueError:
+        raise ValueError(f"invalid FEN move counters: {fen!r}") from None
+
+    return bit_boards, side_to_move, halfmove_clock, fullmove_number
+
+
+def board_to_fen(bit_boards, side_to_move='r', halfmove_clock=0, fullmove_number=1):
+    """
+    Serialize a position to FEN.
+    :param bit_boards: a BitBoard object, or a mapping of piece class -> bitboard.
+    :param side_to_move: either 'r' for the red team or 'b' for the black team.
+    :param halfmove_clock: the number of moves since the last capture.
+    :param fullmove_number: the move number, starting at 1 and incremented after black moves.
+    :return: the FEN string.
+    """
+    points = [''] * (N_FILES * N_RANKS)
+    for piece_class in PIECE_CLASSES:
+        fen_letter = PIECE_CLASS_TO_FEN[piece_class]
+        for square in iter_squares(bit_boards[piece_class]):
+            points[square] = fen_letter
+
+    ranks = []
+    for y in range(N_RANKS):
+        rank, empty = '', 0
+        for point in points[y * N_FILES:(y + 1) * N_FILES]:
+            if point:
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += point
+            else:
+                empty += 1
+        ranks.append(rank + str(empty) if empty else rank)
+
+    return f"{'/'.join(ranks)} {'w' if side_to_move == 'r' else 'b'} - - {halfmove_clock} {fullmove_number}"
@@ -0,0 +1,343 @@
+"""
+This file contains the match runner, which plays engine-vs-engine games across a pool of worker processes, for testing
+and tuning. Each game is played from a position of an opening suite by two ChessEngine instances with their own search
+limits (EngineSettings), and every opening is played twice with the colours swapped.
+
+Results are streamed to a JSON lines file as games finish, one object per game holding the game record (starting FEN
+and encoded moves, see engine.moves), the result and why the game ended, each side's nodes and search time, and the
+match totals so far (score, games per second and, with SPRT, the log-likelihood ratio).
+
+A match can stop early with a sequential probability ratio test (SPRT): H0 is that the first engine is elo0 Elo
+stronger than the second, H1 that it is elo1 stronger, and the match ends as soon as the log-likelihood ratio of the
+results leaves the bounds set by the error rates alpha and beta.
+
+Games end when the side to move has no legal move (it loses), on a threefold repetition, when max_quiet_plies plies
+pass without a capture, when neither side has a piece that can cross the river, or after max_plies plies; all but the
+first are draws. Perpetual check and chase rules are not modelled.
+
+Usage (from src): python -m engine.match --engine depth=3 --engine depth=2,name=shallow --games 200 \
+    [--openings FILE] [--workers N] [--output match.jsonl] [--sprt ELO0 ELO1]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .chess_engine import ChessEngine
+from .fen import DEFAULT_FEN
+from .piece_movement import checkers
+
+DEFAULT_MAX_PLIES = 400
+DEFAULT_MAX_QUIET_PLIES = 120
+
+# The limits of each move: depth in plies, time_limit in seconds, node_limit in nodes (see ChessEngine.search).
+EngineSettings = namedtuple('EngineSettings', ['name', 'depth', 'time_limit', 'node_limit', 'transposition_table_mb',
+                                               'opening_book', 'tablebase'],
+                            defaults=(None, None, None, 16, None, None))
+
+# Hypotheses (in Elo, for the first engine) and error rates of a sequential probability ratio test.
+SPRTParameters = namedtuple('SPRTParameters', ['elo0', 'elo1', 'alpha', 'beta'], defaults=(0.05, 0.05))
+
+MatchResult = namedtuple('MatchResult', ['wins', 'draws', 'losses', 'games', 'elo', 'llr', 'decision', 'time',
+                                         'games_per_second', 'nps'])
+
+# Pieces that can cross the river. Without any of them, neither side can mate.
+_ATTACKING_CLASSES = ('R', 'H', 'C', 'P', 'r', 'h', 'c', 'p')
+
+
+def play_game(task):
+    """
+    Play one game. Runs in a worker process.
+
+    :param task: a tuple (game_id, fen, red settings, black settings, max_plies, max_quiet_plies).
+    :return: the game record, a dictionary that can be serialized to JSON.
+    """
+    game_id, fen, red, black, max_plies, max_quiet_plies = task
+    start = time.perf_counter()
+    engines = {team: ChessEngine(fen=fen, transposition_table_mb=settings.transposition_table_mb,
+                                 opening_book=settings.opening_book, tablebase=settings.tablebase)
+               for team, settings in (('r', red), ('b', black))}
+    settings = {'r': red, 'b': black}
+    nodes = {'r': 0, 'b': 0}
+    search_time = {'r': 0.0, 'b': 0.0}
+
+    # Both engines play every move, so either one's board is the game's.
+    referee = engines['r']
+    bit_board = referee.bit_board
+    repetitions = {bit_board.zobrist_key: 1}
+    winner, reason = None, None
+
+    while True:
+        team = bit_board.side_to_move
+        legal_moves = referee.generate_moves()
+        if not legal_moves:
+            winner = 'b' if team == 'r' else 'r'
+            reason = 'checkmate' if checkers(bit_board, team) else 'stalemate'
+            break
+        if len(referee.move_stack) >= max_plies:
+            reason = 'move limit'
+            break
+        if bit_board.halfmove_clock >= max_quiet_plies:
+            reason = 'no captures'
+            break
+        if not any(bit_board[piece_class] for piece_class in _ATTACKING_CLASSES):
+            reason = 'insufficient material'
+            break
+
+        limits = settings[team]
+        result = engines[team].search(limits.depth, limits.time_limit, limits.node_limit)
+        nodes[team] += result.nodes
+        search_time[team] += result.time
+        if result.best_move not in legal_moves:
+            winner = 'b' if team == 'r' else 'r'
+            reason = 'illegal move'
+            break
+
+        for engine in engines.values():
+            engine.make_move(result.best_move)
+
+        key = bit_board.zobrist_key
+        repetitions[key] = repetitions.get(key, 0) + 1
+        if repetitions[key] >= 3:
+            reason = 'repetition'
+            break
+
+    return {
+        'game_id': game_id,
+        'red': red.name,
+        'black': black.name,
+        'fen': fen,
+        'moves': list(referee.move_stack),
+        'result': '1-0' if winner == 'r' else '0-1' if winner == 'b' else '1/2-1/2',
+        'reason': reason,
+        'plies': len(referee.move_stack),
+        'nodes': {'red': nodes['r'], 'black': nodes['b']},
+        'search_time': {'red': search_time['r'], 'black': search_time['b']},
+        'time': time.perf_counter() - start,
+    }
+
+
+def load_openings(path):
+    """
+    Read an opening suite: one FEN string per line. Blank lines and lines starting with '#' are skipped.
+    :param path: the file to read.
+    :return: a list of FEN strings.
+    """
+    with open(path) as file:
+        openings = [line.strip() for line in file]
+    return [line for line in openings if line and not line.startswith('#')]
+
+
+def expected_score(elo):
+    """
+    :param elo: an Elo difference.
+    :return: the expected score per game of the stronger side, between 0 and 1.
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_difference(wins, draws, losses):
+    """
+    Estimate the Elo difference from a match score.
+    :return: the Elo difference, or None without games or when one side scored every point.
+    """
+    games = wins + draws + losses
+    if games == 0 or wins + draws / 2 in (0, games):
+        return None
+    score = (wins + draws / 2) / games
+    return -400 * math.log10(1 / score - 1)
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """
+    The log-likelihood ratio of H1 (the Elo difference is elo1) against H0 (it is elo0), using the normal
+    approximation of the generalized SPRT over game scores.
+    :return: the log-likelihood ratio, 0.0 until the results have some variance.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0
+
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    if variance == 0:
+        return 0.0
+
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+    return (score1 - score0) * (2 * score - score0 - score1) * games / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    """
+    :param alpha: the probability of accepting H1 when H0 holds.
+    :param beta: the probability of accepting H0 when H1 holds.
+    :return: a 2-tuple (lower, upper) of log-likelihood ratio bounds. H0 is accepted below lower, H1 above upper.
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_decision(llr, sprt):
+    """
+    :param llr: the log-likelihood ratio (see sprt_llr).
+    :param sprt: SPRTParameters.
+    :return: 'H0' or 'H1' if the test has ended, and None otherwise.
+    """
+    lower, upper = sprt_bounds(sprt.alpha, sprt.beta)
+    if llr <= lower:
+        return 'H0'
+    if llr >= upper:
+        return 'H1'
+    return None
+
+
+def run_match(first, second, games, openings=(DEFAULT_FEN,), workers=None, output=None, sprt=None,
+              max_plies=DEFAULT_MAX_PLIES, max_quiet_plies=DEFAULT_MAX_QUIET_PLIES, executor=None,
+              progress_callback=None):
+    """
+    Play a match between two engines.
+
+    :param first: EngineSettings of the first engine. Wins, losses and Elo are from its point of view.
+    :param second: EngineSettings of the second engine.
+    :param games: the number of games to play. Game i is played from openings[i // 2 % len(openings)], with the
+    first engine playing red in even games and black in odd ones.
+    :param openings: a sequence of FEN strings (see load_openings).
+    :param workers: the number of worker processes, os.cpu_count() by default. Ignored if executor is given.
+    :param output: optional path of a JSON lines file to write the game records to as they finish (overwritten).
+    :param sprt: optional SPRTParameters, to stop as soon as the test accepts a hypothesis.
+    :param max_plies: games are drawn after this many plies.
+    :param max_quiet_plies: games are drawn after this many plies without a capture.
+    :param executor: an existing concurrent.futures executor to play the games on.
+    :param progress_callback: optional function called with each game record, in the order games finish.
+    :return: a MatchResult.
+    """
+    if not openings:
+        raise ValueError("the opening suite is empty")
+
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+
+    start = time.perf_counter()
+    wins = draws = losses = 0
+    nodes, search_time = 0, 0.0
+    llr, decision = 0.0, None
+    output_file = open(output, 'w') if output is not None else None
+
+    try:
+        futures = {}
+        for game_id in range(games):
+            red, black = (first, second) if game_id % 2 == 0 else (second, first)
+            task = (game_id, openings[game_id // 2 % len(openings)], red, black, max_plies, max_quiet_plies)
+            futures[executor.submit(play_game, task)] = game_id % 2 == 0
+
+        for future in as_completed(futures):
+            record = future.result()
+            first_is_red = futures[future]
+            if record['result'] == '1/2-1/2':
+                draws += 1
+                first_score = 0.5
+            elif (record['result'] == '1-0') == first_is_red:
+                wins += 1
+                first_score = 1.0
+            else:
+                losses += 1
+                first_score = 0.0
+
+            nodes += record['nodes']['red'] + record['nodes']['black']
+            search_time += record['search_time']['red'] + record['search_time']['black']
+            elapsed = time.perf_counter() - start
+
+            record['first_score'] = first_score
+            record['match'] = {'wins': wins, 'draws': draws, 'losses': losses, 'elapsed': elapsed,
+                               'games_per_second': (wins + draws + losses) / elapsed if elapsed > 0 else 0.0,
+                               'nps': nodes / search_time if search_time > 0 else 0.0}
+            if sprt is not None:
+                llr = sprt_llr(wins, draws, losses, sprt.elo0, sprt.elo1)
+                decision = sprt_decision(llr, sprt)
+                record['match']['llr'] = llr
+
+            if output_file is not None:
+                output_file.write(json.dumps(record) + '\n')
+                output_file.flush()
+            if progress_callback is not None:
+                progress_callback(record)
+
+            if decision is not None:
+                for pending in futures:
+                    pending.cancel()
+                break
+    finally:
+        if output_file is not None:
+            output_file.close()
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    played = wins + draws + losses
+    return MatchResult(wins, draws, losses, played, elo_difference(wins, draws, losses), llr, decision, elapsed,
+                       played / elapsed if elapsed > 0 else 0.0, nodes / search_time if search_time > 0 else 0.0)
+
+
+def parse_engine_settings(spec):
+    """
+    Parse engine settings from the command line, e.g. 'name=fast,depth=3,time=0.5,nodes=20000,hash=16,book=book.xqb,
+    tablebase=tablebases'.
+    :param spec: comma separated key=value pairs.
+    :return: EngineSettings.
+    """
+    fields = {'name': ('name', str), 'depth': ('depth', int), 'time': ('time_limit', float),
+              'nodes': ('node_limit', int), 'hash': ('transposition_table_mb', int), 'book': ('opening_book', str),
+              'tablebase': ('tablebase', str)}
+    values = {'name': spec}
+    for item in filter(None, spec.split(',')):
+        key, _, value = item.partition('=')
+        if key not in fields or not value:
+            raise ValueError(f"invalid engine setting {item!r}")
+        field, convert = fields[key]
+        values[field] = convert(value)
+    return EngineSettings(**values)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Play a match between two engine configurations.')
+    parser.add_argument('--engine', type=parse_engine_settings, action='append', required=True,
+                        help="engine settings, given twice, e.g. 'name=deep,depth=4' (keys: name, depth, time, "
+                             "nodes, hash, book, tablebase)")
+    parser.add_argument('--games', type=int, default=100, help='number of games (default: 100)')
+    parser.add_argument('--openings', help='file of opening FEN strings, one per line (default: the start position)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--output', help='JSON lines file to stream the game records to')
+    parser.add_argument('--sprt', type=float, nargs=2, metavar=('ELO0', 'ELO1'),
+                        help='stop early once an SPRT between these Elo differences is decided')
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES, help='plies after which a game is drawn')
+    args = parser.parse_args(arguments)
+
+    if len(args.engine) != 2:
+        parser.error('--engine must be given exactly twice')
+    first, second = args.engine
+    openings = load_openings(args.openings) if args.openings else [DEFAULT_FEN]
+    sprt = SPRTParameters(*args.sprt) if args.sprt else None
+
+    def report(record):
+        match = record['match']
+        print(f"game {record['game_id']:>5}  {record['red']} - {record['black']}  {record['result']:<7} "
+              f"{record['reason']:<22} +{match['wins']} ={match['draws']} -{match['losses']}  "
+              f"{match['games_per_second']:.2f} games/s" + (f"  llr {match['llr']:.2f}" if 'llr' in match else ''))
+
+    result = run_match(first, second, args.games, openings, args.workers, args.output, sprt, args.max_plies,
+                       progress_callback=report)
+
+    elo = f"{result.elo:+.1f}" if result.elo is not None else 'n/a'
+    print(f"{first.name} vs {second.name}: +{result.wins} ={result.draws} -{result.losses} ({result.games} games), "
+          f"Elo {elo}, {result.games_per_second:.2f} games/s, {result.nps:.0f} nodes/s")
+    if sprt is not None:
+        print(f"SPRT [{sprt.elo0}, {sprt.elo1}]: llr {result.llr:.2f}, "
+              f"{'accepted ' + result.decision if result.decision else 'undecided'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
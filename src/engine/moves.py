@@ -0,0 +1,71 @@
+"""
+This file contains the compact move encoding used by the move generator, make/unmake and search.
+
+A move is a single integer holding everything needed to both play and take back the move:
+    bits  0-6:  the square the piece moves from
+    bits  7-13: the square the piece moves to
+    bits 14-17: the code of the moving piece (see engine_constants.PIECE_CODES)
+    bits 18-21: the code of the captured piece, or NO_PIECE
+"""
+from .engine_constants import PIECE_CLASSES, NO_PIECE
+from .square import SQUARE_LOCATIONS
+
+NULL_MOVE = 0
+
+TO_SHIFT = 7
+PIECE_SHIFT = 14
+CAPTURED_SHIFT = 18
+
+SQUARE_BITS = 0x7F
+PIECE_BITS = 0xF
+
+
+def encode_move(from_square, to_square, moved_code, captured_code=NO_PIECE):
+    """
+    Packs a move into a single integer.
+    :param from_square: the square the piece moves from.
+    :param to_square: the square the piece moves to.
+    :param moved_code: the piece code of the moving piece.
+    :param captured_code: the piece code of the captured piece, or NO_PIECE.
+    :return: the encoded move.
+    """
+    return from_square | to_square << TO_SHIFT | moved_code << PIECE_SHIFT | captured_code << CAPTURED_SHIFT
+
+
+def move_from(move):
+    return move & SQUARE_BITS
+
+
+def move_to(move):
+    return move >> TO_SHIFT & SQUARE_BITS
+
+
+def move_piece(move):
+    return move >> PIECE_SHIFT & PIECE_BITS
+
+
+def move_captured(move):
+    return move >> CAPTURED_SHIFT & PIECE_BITS
+
+
+def decode_move(move):
+    """
+    Unpacks an encoded move.
+    :param move: the encoded move.
+    :return: a 4-tuple (from_square, to_square, moved piece class, captured piece class or None).
+    """
+    captured_code = move_captured(move)
+    return (move_from(move), move_to(move), PIECE_CLASSES[move_piece(move) - 1],
+            PIECE_CLASSES[captured_code - 1] if captured_code != NO_PIECE else None)
+
+
+def move_to_string(move):
+    """
+    A human readable description of a move, e.g. "C(1, 7)x(1, 0)h".
+    :param move: the encoded move.
+    :return: a string.
+    """
+    from_square, to_square, moved, captured = decode_move(move)
+    if captured is None:
+        return f"{moved}{SQUARE_LOCATIONS[from_square]}-{SQUARE_LOCATIONS[to_square]}"
+    return f"{moved}{SQUARE_LOCATIONS[from_square]}x{SQUARE_LOCATIONS[to_square]}{captured}"
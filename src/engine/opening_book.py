@@ -0,0 +1,189 @@
+"""
+This file contains the opening book: a file of (position key, move, weight) entries sorted by key, where the key is the
+position's Zobrist key (see engine.zobrist). Opening a book only reads its 16-byte header and memory-maps the entries,
+so it loads instantly whatever its size, and looking a position up is a binary search over the mapped keys.
+
+Books are built from game records with BookBuilder, which counts how often each move was played in each position and
+prunes the rare ones. The count becomes the move's weight, and OpeningBook.choose picks among a position's moves with
+probability proportional to it.
+
+Usage:
+    builder = BookBuilder(max_ply=20)
+    for moves in games:
+        builder.add_game(moves)
+    builder.write('book.xqb', min_count=3)
+
+    book = OpeningBook('book.xqb')
+    move = book.choose(bit_board)
+"""
+import os
+import random
+import struct
+import numpy as np
+from .bit_board import BitBoard
+from .fen import DEFAULT_FEN
+from .moves import NULL_MOVE
+
+ENTRY_DTYPE = np.dtype([
+    ('key', '<u8'),
+    ('move', '<u4'),
+    ('weight', '<u4'),
+])
+
+MAGIC = b'XQBOOK\x00\x00'
+VERSION = 1
+# magic, version, entry size, padding
+_HEADER = struct.Struct('<8sHH4x')
+HEADER_SIZE = _HEADER.size
+
+
+class OpeningBook:
+
+    def __init__(self, path, seed=None):
+        """
+        Open a book file.
+
+        :param path: the file written by BookBuilder.write.
+        :param seed: optional seed of the random choice between book moves.
+        """
+        self.path = path
+        self.random = random.Random(seed)
+
+        with open(path, 'rb') as file:
+            header = file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or _HEADER.unpack(header)[0] != MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+        _, version, entry_size = _HEADER.unpack(header)
+        if version != VERSION or entry_size != ENTRY_DTYPE.itemsize:
+            raise ValueError(f"{path} has an unsupported format (version {version}, {entry_size}-byte entries)")
+
+        size = os.path.getsize(path) - HEADER_SIZE
+        if size % ENTRY_DTYPE.itemsize:
+            raise ValueError(f"{path} ends with a partial entry")
+
+        if size:
+            self.entries = np.memmap(path, dtype=ENTRY_DTYPE, mode='r', offset=HEADER_SIZE,
+                                     shape=(size // ENTRY_DTYPE.itemsize,))
+        else:
+            self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        self.keys = self.entries['key']
+
+    def __len__(self):
+        return len(self.entries)
+
+    def moves(self, key):
+        """
+        Look up a position.
+
+        :param key: the position's Zobrist key, or a BitBoard object.
+        :return: a list of (encoded move, weight) pairs, heaviest first. Empty if the position is not in the book.
+        """
+        if isinstance(key, BitBoard):
+            key = key.zobrist_key
+
+        # The key must stay a uint64: a Python int this large would be compared as a float.
+        key = np.uint64(key)
+        start = int(np.searchsorted(self.keys, key, side='left'))
+        end = int(np.searchsorted(self.keys, key, side='right'))
+
+        entries = self.entries[start:end]
+        return sorted(zip(entries['move'].tolist(), entries['weight'].tolist()), key=lambda entry: -entry[1])
+
+    def choose(self, key, allowed_moves=None):
+        """
+        Pick a book move at random, weighted by how often it was played.
+
+        :param key: the position's Zobrist key, or a BitBoard object.
+        :param allowed_moves: optional collection of moves to choose from, e.g. the legal moves, which guards against
+        key collisions.
+        :return: an encoded move, or NULL_MOVE if the book has no (allowed) move for the position.
+        """
+        entries = self.moves(key)
+        if allowed_moves is not None:
+            entries = [(move, weight) for move, weight in entries if move in allowed_moves]
+        if not entries:
+            return NULL_MOVE
+
+        moves, weights = zip(*entries)
+        return self.random.choices(moves, weights)[0]
+
+
+class BookBuilder:
+
+    def __init__(self, max_ply=20):
+        """
+        Collect move counts from game records.
+
+        :param max_ply: only the first max_ply moves of every game are counted.
+        """
+        self.max_ply = max_ply
+        # (position key, move) -> number of times played
+        self.counts = {}
+
+    def add_position(self, key, move, count=1):
+        """
+        Count a move played in a position.
+
+        :param key: the position's Zobrist key.
+        :param move: the encoded move played.
+        :param count: how many times it was played.
+        :return: void
+        """
+        entry = (key, move)
+        self.counts[entry] = self.counts.get(entry, 0) + count
+
+    def add_game(self, moves, fen=DEFAULT_FEN):
+        """
+        Count the opening moves of a game.
+
+        :param moves: the game's encoded moves (see engine.moves), in order.
+        :param fen: the position the game started from.
+        :return: void
+        """
+        bit_board = BitBoard.from_fen(fen)
+        for move in moves[:self.max_ply]:
+            self.add_position(bit_board.zobrist_key, move)
+            bit_board.make_move(move)
+
+    def add_records(self, records):
+        """
+        Count the positions of stored games (see engine.position_store), taking each record's best_move as the move
+        played.
+
+        :param records: a position_store.RECORD_DTYPE array.
+        :return: void
+        """
+        records = records[(records['ply'] < self.max_ply) & (records['best_move'] != NULL_MOVE)]
+        pairs = np.empty(len(records), dtype=[('key', '<u8'), ('move', '<u4')])
+        pairs['key'] = records['key']
+        pairs['move'] = records['best_move']
+
+        unique, counts = np.unique(pairs, return_counts=True)
+        for (key, move), count in zip(unique.tolist(), counts.tolist()):
+            self.add_position(key, move, count)
+
+    def write(self, path, min_count=1, max_moves=None):
+        """
+        Write the book, sorted by key.
+
+        :param path: the file to write.
+        :param min_count: moves played fewer times than this in a position are left out.
+        :param max_moves: optionally keep only this many of the most played moves of each position.
+        :return: the number of entries written.
+        """
+        by_key = {}
+        for (key, move), count in self.counts.items():
+            if count >= min_count:
+                by_key.setdefault(key, []).append((count, move))
+
+        entries = []
+        for key in sorted(by_key):
+            # Most played first, ties by move so that the file does not depend on the order games were added in.
+            moves = sorted(by_key[key], key=lambda entry: (-entry[0], entry[1]))[:max_moves]
+            entries.extend((key, move, min(count, 0xFFFFFFFF)) for count, move in moves)
+
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(MAGIC, VERSION, ENTRY_DTYPE.itemsize))
+            file.write(np.array(entries, dtype=ENTRY_DTYPE).tobytes())
+
+        return len(entries)
@@ -0,0 +1,110 @@
+"""
+This file contains the multi-process search, which splits the root moves of a position across a pool of worker
+processes (root splitting). Each worker plays one root move and searches the reply to one ply less with its own
+Searcher and transposition table, so the result of every root move depends only on the position, the move and the
+depth, never on which worker searched it or what it searched before.
+
+The parent runs iterative deepening over these splits and combines each iteration deterministically: the highest score
+wins, and ties go to the move generated first. A depth-limited parallel search therefore returns the same move, score
+and principal variation for any number of workers.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .moves import NULL_MOVE
+from .piece_movement import generate_legal_moves
+from .search import Searcher, SearchResult, MATE_SCORE, MATE_BOUND, DEFAULT_DEPTH, MAX_DEPTH
+from .transposition_table import TranspositionTable
+
+# Memory budget of each root move's transposition table, in megabytes.
+DEFAULT_WORKER_TABLE_MB = 4
+
+
+def _search_root_move(task):
+    # Runs in a worker process: search the position after one root move. Returns (score, pv, nodes) from the root's
+    # point of view.
+    bit_board, move, depth, history_keys, table_mb = task
+
+    history_keys = list(history_keys) + [bit_board.zobrist_key]
+    bit_board.make_move(move)
+    searcher = Searcher(bit_board, TranspositionTable(table_mb), history_keys)
+
+    if depth == 1:
+        # Only the captures (or check evasions) that follow the move remain to be searched.
+        return -searcher.quiescence_score(1), [move], searcher.nodes + 1
+
+    result = searcher.search(depth - 1)
+
+    # The reply's mate scores count plies from the reply; one more ply has been played from the root.
+    score = -result.score
+    if score > MATE_BOUND:
+        score -= 1
+    elif score < -MATE_BOUND:
+        score += 1
+
+    return score, [move] + result.pv, result.nodes + 1
+
+
+def parallel_search(bit_board, depth=None, time_limit=None, workers=None, history_keys=(), info_callback=None,
+                    executor=None, table_mb=DEFAULT_WORKER_TABLE_MB):
+    """
+    Run an iterative deepening search with the root moves of every iteration split across worker processes.
+
+    :param bit_board: the BitBoard object to search. It is not modified.
+    :param depth: the maximum depth in plies. Defaults to DEFAULT_DEPTH without a time limit, and MAX_DEPTH with one.
+    :param time_limit: the time in seconds after which no further iteration is started. A running iteration is always
+    completed, so the search may take longer than this.
+    :param workers: the number of worker processes, os.cpu_count() by default. Ignored if executor is given.
+    :param history_keys: Zobrist keys of the positions earlier in the game, for repetition detection.
+    :param info_callback: optional function called with a SearchResult after every completed iteration.
+    :param executor: an existing concurrent.futures executor to run the root moves on, so that a pool can be reused
+    between searches.
+    :param table_mb: the transposition table budget of each root move's search, in megabytes.
+    :return: a SearchResult for the deepest completed iteration. nodes counts the nodes of every worker.
+    """
+    if depth is None:
+        depth = DEFAULT_DEPTH if time_limit is None else MAX_DEPTH
+    depth = max(1, min(depth, MAX_DEPTH))
+
+    start = time.perf_counter()
+    root_moves = generate_legal_moves(bit_board, bit_board.side_to_move)
+    if not root_moves:
+        return SearchResult(NULL_MOVE, -MATE_SCORE, [], 0, 0, 0.0, 0.0)
+
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+
+    result = None
+    nodes = 0
+    # Root move index -> score of the previous iteration, used to hand out the most promising moves first.
+    previous_scores = [0] * len(root_moves)
+
+    try:
+        for iteration_depth in range(1, depth + 1):
+            order = sorted(range(len(root_moves)), key=lambda index: -previous_scores[index])
+            tasks = [(bit_board, root_moves[index], iteration_depth, history_keys, table_mb) for index in order]
+
+            scores = [0] * len(root_moves)
+            pvs = [[] for _ in root_moves]
+            for index, (score, pv, move_nodes) in zip(order, executor.map(_search_root_move, tasks)):
+                scores[index], pvs[index] = score, pv
+                nodes += move_nodes
+
+            # max returns the first of equal scores, which is the first in generation order.
+            best = max(range(len(root_moves)), key=lambda index: scores[index])
+            elapsed = time.perf_counter() - start
+            result = SearchResult(root_moves[best], scores[best], pvs[best], iteration_depth, nodes, elapsed,
+                                  nodes / elapsed if elapsed > 0 else 0.0)
+            previous_scores = scores
+
+            if info_callback is not None:
+                info_callback(result)
+
+            if abs(scores[best]) > MATE_BOUND or (time_limit is not None and elapsed >= time_limit):
+                break
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+    return result
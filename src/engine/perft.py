@@ -0,0 +1,184 @@
+"""
+Perft: counts the leaf nodes of the legal move tree to a fixed depth. The counts verify the move generator against
+known values, and the time taken to produce them is the engine's move generation benchmark.
+
+Usage (from src): python -m engine.perft [--position NAME] [--depth N] [--divide]
+"""
+import argparse
+import sys
+import time
+from .bit_board import BitBoard
+from .moves import move_to_string
+from .piece_movement import generate_legal_moves
+
+# name -> (board rows, side to move, {depth: leaf nodes}). The opening counts are the published values for xiangqi; the
+# others were cross-checked against an independent mailbox move generator.
+REFERENCE_POSITIONS = {
+    'opening': ([
+        'rheagaehr',
+        '.........',
+        '.c.....c.',
+        'p.p.p.p.p',
+        '.........',
+        '.........',
+        'P.P.P.P.P',
+        '.C.....C.',
+        '.........',
+        'RHEAGAEHR',
+    ], 'r', {1: 44, 2: 1920, 3: 79666, 4: 3290240}),
+    'midgame': ([
+        'r.eagaehr',
+        '.........',
+        '.ch....c.',
+        'p.p.p.p.p',
+        '.........',
+        '..P......',
+        'P...P.P.P',
+        '.C..C..H.',
+        '.........',
+        'RHEAGAE.R',
+    ], 'b', {1: 39, 2: 1361, 3: 52851}),
+    'open_files': ([
+        '..eagae..',
+        '........r',
+        'rch...h..',
+        'p.p.p...p',
+        '......pc.',
+        '..P......',
+        'P...P.P.P',
+        '.CH.C.H..',
+        'R.......R',
+        '..EAGAE..',
+    ], 'r', {1: 45, 2: 1969, 3: 83005}),
+    'endgame': ([
+        '...g.a...',
+        '....a....',
+        '....c....',
+        '.........',
+        '..p...P..',
+        '.........',
+        '.........',
+        '....H....',
+        '....C....',
+        '....G....',
+    ], 'r', {1: 5, 2: 76, 3: 1092, 4: 18176}),
+    'check': ([
+        '...ag....',
+        '.........',
+        '......e..',
+        '....R....',
+        '.........',
+        '..c......',
+        '.........',
+        '....A....',
+        '.h.......',
+        '...G.A...',
+    ], 'b', {1: 2, 2: 4, 3: 105, 4: 1706}),
+}
+
+
+def reference_bit_board(name):
+    """
+    Build the BitBoard of a reference position.
+    :param name: a key of REFERENCE_POSITIONS.
+    :return: a BitBoard object.
+    """
+    rows, side_to_move, _ = REFERENCE_POSITIONS[name]
+    bit_board = BitBoard(rows, verbose=False)
+    bit_board.set_side_to_move(side_to_move)
+    return bit_board
+
+
+def perft(bit_board, depth):
+    """
+    Count the leaf nodes of the legal move tree. The board is restored afterwards.
+    :param bit_board: a BitBoard object.
+    :param depth: the depth in plies, at least 1.
+    :return: the number of leaf nodes.
+    """
+    moves = generate_legal_moves(bit_board, bit_board.side_to_move)
+    if depth <= 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        bit_board.make_move(move)
+        nodes += perft(bit_board, depth - 1)
+        bit_board.unmake_move(move)
+
+    return nodes
+
+
+def divide(bit_board, depth):
+    """
+    Perft split by root move, for finding which move's subtree disagrees with a reference.
+    :param bit_board: a BitBoard object.
+    :param depth: the depth in plies, at least 1.
+    :return: a dictionary of encoded move -> leaf nodes below it.
+    """
+    counts = {}
+    for move in generate_legal_moves(bit_board, bit_board.side_to_move):
+        bit_board.make_move(move)
+        counts[move] = perft(bit_board, depth - 1) if depth > 1 else 1
+        bit_board.unmake_move(move)
+
+    return counts
+
+
+def run_suite(names, max_depth, output=sys.stdout):
+    """
+    Run perft on reference positions, reporting the node count, time and nodes per second of each depth.
+    :param names: the reference positions to run.
+    :param max_depth: the deepest depth to run (positions without a reference count that deep stop earlier).
+    :param output: where to write the report.
+    :return: True if every count matched its reference.
+    """
+    all_passed = True
+    output.write(f"{'position':<12}{'depth':>6}{'nodes':>14}{'expected':>14}{'seconds':>10}{'nodes/s':>12}\n")
+
+    for name in names:
+        bit_board = reference_bit_board(name)
+        for depth, expected in sorted(REFERENCE_POSITIONS[name][2].items()):
+            if depth > max_depth:
+                break
+
+            start = time.perf_counter()
+            nodes = perft(bit_board, depth)
+            elapsed = time.perf_counter() - start
+
+            passed = nodes == expected
+            all_passed = all_passed and passed
+            output.write(f"{name:<12}{depth:>6}{nodes:>14}{expected:>14}{elapsed:>10.3f}"
+                         f"{nodes / elapsed if elapsed > 0 else 0.0:>12.0f}{'' if passed else '  MISMATCH'}\n")
+            output.flush()
+
+    return all_passed
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Perft node counts and move generation speed.')
+    parser.add_argument('--position', choices=sorted(REFERENCE_POSITIONS), action='append',
+                        help='reference position to run (may be repeated, defaults to all)')
+    parser.add_argument('--depth', type=int, default=3, help='maximum depth (default: 3)')
+    parser.add_argument('--divide', action='store_true', help='print the node count below each root move')
+    args = parser.parse_args(arguments)
+
+    names = args.position or list(REFERENCE_POSITIONS)
+
+    if args.divide:
+        for name in names:
+            start = time.perf_counter()
+            counts = divide(reference_bit_board(name), args.depth)
+            elapsed = time.perf_counter() - start
+            print(f"{name}, depth {args.depth}:")
+            for move, nodes in counts.items():
+                print(f"  {move_to_string(move):<24}{nodes:>12}")
+            total = sum(counts.values())
+            print(f"  {'total':<24}{total:>12}  ({elapsed:.3f}s, {total / elapsed if elapsed > 0 else 0.0:.0f} nodes/s)")
+        return 0
+
+    return 0 if run_suite(names, args.depth) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,41 +1,109 @@
-from typing import Union, Optional
-from .chess_engine import BitBoard
-from .engine_constants import N_FILES
+from typing import Optional
+from .bit_board import BitBoard
+from .attack_tables import GENERAL_MOVES, ADVISER_MOVES, ELEPHANT_MOVES, HORSE_MOVES, PAWN_MOVES, CHARIOT_LOOKUP, \
+    CANNON_LOOKUP, RANK_MASK, FILE_MASK, RAYS, HORSE_ATTACKERS, PAWN_ATTACKERS
+from .engine_constants import RED_PIECE_CLASSES, BLACK_PIECE_CLASSES, PIECE_CODES
+from .moves import TO_SHIFT, PIECE_SHIFT, CAPTURED_SHIFT
+from .square import LOCATION_MASKS, SQUARE_MASKS, iter_squares, mask_to_square
 """
 This file contains all the valid piece movement functions.
+
+Each piece type has a target function, which takes a square, the moving team and the board's occupancy, and returns
+the bitboard of squares the piece could reach or capture on (before removing squares held by its own team). The
+*_valid_movements functions build on these for whole bitboards of pieces, and generate_moves emits the moves of an
+entire side in one call.
+
+generate_moves is pseudo-legal. generate_legal_moves removes the moves that leave the team's own general attacked
+(including by the enemy general across an open file), using the checking pieces and the pins of pinned_pieces so that
+only the few moves those masks flag are tested against the position after the move.
 """
 
 
-def black_general_valid_movements(bit_boards: BitBoard, piece_location: Optional[int] = None):
+def general_targets(square, team, occupancy):
+    return GENERAL_MOVES[team][square]
+
+
+def adviser_targets(square, team, occupancy):
+    return ADVISER_MOVES[team][square]
+
+
+def elephant_targets(square, team, occupancy):
+    targets = 0
+    for eye, target in ELEPHANT_MOVES[team][square]:
+        if occupancy & eye == 0:
+            targets |= target
+    return targets
+
+
+def horse_targets(square, team, occupancy):
+    targets = 0
+    for leg, leg_targets in HORSE_MOVES[square]:
+        if occupancy & leg == 0:
+            targets |= leg_targets
+    return targets
+
+
+def chariot_targets(square, team, occupancy):
+    # Chariots slide along ranks and files until (and including) the first occupied point.
+    rank_shift, rank_attacks, file_shift, file_attacks = CHARIOT_LOOKUP[square]
+    return (rank_attacks[(occupancy >> rank_shift) & RANK_MASK] << rank_shift) | \
+           (file_attacks[(occupancy >> file_shift) & FILE_MASK] << file_shift)
+
+
+def cannon_targets(square, team, occupancy):
+    # Cannons slide like chariots without capturing, and capture by jumping over exactly one piece (the screen).
+    rank_shift, rank_attacks, file_shift, file_attacks = CANNON_LOOKUP[square]
+    return (rank_attacks[(occupancy >> rank_shift) & RANK_MASK] << rank_shift) | \
+           (file_attacks[(occupancy >> file_shift) & FILE_MASK] << file_shift)
+
+
+def pawn_targets(square, team, occupancy):
+    return PAWN_MOVES[team][square]
+
+
+# Piece type (lower case piece class) -> target function
+PIECE_TYPE_TO_TARGETS = {
+    'g': general_targets,
+    'a': adviser_targets,
+    'e': elephant_targets,
+    'h': horse_targets,
+    'r': chariot_targets,
+    'c': cannon_targets,
+    'p': pawn_targets,
+}
+
+
+def valid_movements(bit_boards: BitBoard, piece_class, piece_location: Optional[int] = None):
     """
-    Given a bit board representation of the game, determine all valid movement options for the black general.
+    Given a bit board representation of the game, determine all valid movement options for a piece class.
     :param bit_boards: BitBoard object
-    :param piece_location: an integer containing the bitboard of the black general. If not specified, then all viable
-    locations are returned.
+    :param piece_class: the internal representation of the piece, e.g. 'h' for black horses or 'H' for red horses.
+    :param piece_location: an integer containing the bitboard of the piece(s) to move. If not specified, then the
+    movement options of every piece of the class are returned.
     :return: a bit board containing all valid movement locations.
     """
-    from engine.engine_constants import RANK_9, BLACK_PALACE_BITBOARD
-    # The general may only move in an orthogonal manner in its palace. We therefore construct the grid of it moving in
-    # all orthogonal directions. 'g' is the inner representation of the black general.
-    general_bitboard = piece_location if piece_location is not None else bit_boards['g']
-    # Implement side-to-side movement by one place
-    potential_locations = (general_bitboard << 1) | (general_bitboard >> 1)
+    team = 'r' if str.isupper(piece_class) else 'b'
+    targets_function = PIECE_TYPE_TO_TARGETS[piece_class.lower()]
+    piece_bitboard = piece_location if piece_location is not None else bit_boards[piece_class]
+    occupancy = bit_boards.occupancy
 
-    # Implement up-down movement by one place (only need to change logic if the general is in the 9th rank)
-    if general_bitboard & RANK_9 > 0:
-        potential_locations |= general_bitboard >> N_FILES
-    else:
-        potential_locations |= (general_bitboard >> N_FILES) | \
-                               (general_bitboard << N_FILES)
+    potential_locations = 0
+    for square in iter_squares(piece_bitboard):
+        potential_locations |= targets_function(square, team, occupancy)
 
-    potential_locations = restrict_movement_by_team(potential_locations, bit_boards, 'b')
+    return restrict_movement_by_team(potential_locations, bit_boards, team)
 
-    # Restrict the movement to inside the palace
-    potential_locations &= BLACK_PALACE_BITBOARD
 
-    # TODO: implement the rule that generals may not look at each other
-
-    return potential_locations
+def black_general_valid_movements(bit_boards: BitBoard, piece_location: Optional[int] = None):
+    """
+    Given a bit board representation of the game, determine all valid movement options for the black general.
+    :param bit_boards: BitBoard object
+    :param piece_location: an integer containing the bitboard of the black general. If not specified, then all viable
+    locations are returned.
+    :return: a bit board containing all valid movement locations.
+    """
+    # Squares facing the red general on an open file, or otherwise attacked, are left out.
+    return legal_targets(bit_boards, 'g', piece_location)
 
 
 def black_adviser_valid_movements(bit_boards: BitBoard, piece_location: Optional[int] = None):
@@ -46,25 +114,7 @@ def black_adviser_valid_movements(bit_boards: BitBoard, piece_location: Optional
     locations are returned.
     :return: a bit board containing all valid movement locations.
     """
-    from engine.engine_constants import BLACK_PALACE_BITBOARD
-    # Advisers only move along the diagonal lines. This means we need to try movement along a right bitshift of
-    # N_FILES-1 AND N_FILES+1 (for going down), and a corresponding left bitshift for going up.
-    adviser_bitboard = piece_location if piece_location is not None else bit_boards['a']
-
-    potential_locations = (adviser_bitboard >> N_FILES - 1) | \
-                          (adviser_bitboard >> N_FILES + 1)
-
-    # FIXME: strictly enforce the bit limit being less than 90 bits long
-    potential_locations |= (adviser_bitboard << N_FILES + 1) | \
-                           (adviser_bitboard << N_FILES - 1)
-
-    # Ensure that the moves are valid by first checking that they are inside the palace
-    potential_locations &= BLACK_PALACE_BITBOARD
-
-    # Then ensure that they are not going on top of another black piece
-    potential_locations = restrict_movement_by_team(potential_locations, bit_boards, 'b')
-
-    return potential_locations
+    return valid_movements(bit_boards, 'a', piece_location)
 
 
 def black_pawn_valid_movements(bit_boards: BitBoard, piece_location: Optional[int] = None):
@@ -75,61 +125,290 @@ def black_pawn_valid_movements(bit_boards: BitBoard, piece_location: Optional[in
     locations are returned.
     :return: a bit board containing all valid movement locations.
     """
-    from .engine_constants import RANK_1, BOTTOM_HALF, FILE_1, FILE_8
-    import numpy as np
+    return valid_movements(bit_boards, 'p', piece_location)
 
-    pawn_bitboard = piece_location if piece_location is not None else bit_boards['p']
 
-    print(np.binary_repr(pawn_bitboard, width=90))
+def restrict_movement_by_team(piece_bitboard, bit_boards: BitBoard, team):
+    """ Ensure that the piece passed in will not be landing on top of a piece from the same team.
 
-    # With pawns, there are two types of movement. If the pawn is still on its side of the river, then
-    # it may only move forward. However, once it crosses the river, then the piece may move one step either forward,
-    # left, or right.
+    :param piece_bitboard: a integer containing the bitboard representation of some particular piece.
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :return: the updated piece bitboard, after removing all conflicting moves.
+    """
+    return piece_bitboard & ~bit_boards.team_occupancy(team)
 
-    potential_location = 0
 
-    # If the piece is not in the final rank, it may move forward.
-    if pawn_bitboard & RANK_1 == 0:
-        potential_location |= pawn_bitboard >> N_FILES
+def return_valid_moves_by_type_and_location(bit_boards: BitBoard, piece_class, piece_location: Optional[int] = None):
+    if isinstance(piece_location, tuple):
+        piece_location = LOCATION_MASKS[piece_location]
 
-    # If the pawn has crossed the river, allow for left and right movement.
-    if pawn_bitboard & BOTTOM_HALF != 0:
-        # If we can move to the left without going off the board
-        if pawn_bitboard & FILE_1 == 0:
-            potential_location |= (pawn_bitboard << 1)
-        # If we can move to the right without going off the board
-        if pawn_bitboard & FILE_8 == 0:
-            potential_location |= (pawn_bitboard >> 1)
+    if piece_class is None or piece_class.lower() not in PIECE_TYPE_TO_TARGETS:
+        return 0
 
-    potential_location = restrict_movement_by_team(potential_location, bit_boards, 'b')
+    return legal_targets(bit_boards, piece_class, piece_location)
 
-    return potential_location
 
+def generate_moves(bit_boards: BitBoard, team, captures_only=False):
+    """
+    Generate the moves of every piece of one team. Moves that leave the team's own general in danger are included.
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :param captures_only: whether to only generate captures (e.g. for quiescence search).
+    :return: a list of encoded moves (see engine.moves).
+    """
+    own_occupancy = bit_boards.team_occupancy(team)
+    enemy_occupancy = bit_boards.team_occupancy('b' if team == 'r' else 'r')
+    occupancy = bit_boards.occupancy
+    mailbox = bit_boards.mailbox
+    moves = []
 
-def restrict_movement_by_team(piece_bitboard, bit_boards: BitBoard, team):
-    """ Ensure that the piece passed in will not be landing on top of a piece from the same team.
+    for piece_class in (RED_PIECE_CLASSES if team == 'r' else BLACK_PIECE_CLASSES):
+        targets_function = PIECE_TYPE_TO_TARGETS[piece_class.lower()]
+        moved_code = PIECE_CODES[piece_class] << PIECE_SHIFT
 
-    :param piece_bitboard: a integer containing the bitboard representation of some particular piece.
+        for from_square in iter_squares(bit_boards[piece_class]):
+            targets = targets_function(from_square, team, occupancy) & ~own_occupancy
+
+            # Quiet moves
+            if not captures_only:
+                for to_square in iter_squares(targets & ~enemy_occupancy):
+                    moves.append(from_square | to_square << TO_SHIFT | moved_code)
+
+            # Captures, which also record the captured piece
+            for to_square in iter_squares(targets & enemy_occupancy):
+                moves.append(from_square | to_square << TO_SHIFT | moved_code | mailbox[to_square] << CAPTURED_SHIFT)
+
+    return moves
+
+
+def attackers_of_square(bit_boards: BitBoard, square, team, occupancy=None, removed=0):
+    """
+    Find the pieces of a team that attack a square. The enemy general counts as a chariot on its file, so that two
+    generals facing each other on an open file attack each other.
+    :param bit_boards: a BitBoard object
+    :param square: the square attacked.
+    :param team: the attacking team, either 'r' for the red team or 'b' for the black team.
+    :param occupancy: the occupancy to use instead of the board's, e.g. to test a move before making it.
+    :param removed: a bitboard of the team's pieces to leave out, e.g. one that a move captures.
+    :return: a bitboard of the attacking pieces.
+    """
+    if occupancy is None:
+        occupancy = bit_boards.occupancy
+    chariot, horse, _, _, general, cannon, pawn = RED_PIECE_CLASSES if team == 'r' else BLACK_PIECE_CLASSES
+    kept = ~removed
+
+    # Chariot, cannon and general attacks are symmetric, so they are found by looking outwards from the square. The
+    # generals never share a rank, so looking along the rank as well does no harm.
+    attackers = chariot_targets(square, team, occupancy) & (bit_boards[chariot] | bit_boards[general])
+    attackers |= cannon_targets(square, team, occupancy) & bit_boards[cannon]
+
+    horses = bit_boards[horse] & kept
+    if horses:
+        for leg, leg_horses in HORSE_ATTACKERS[square]:
+            if occupancy & leg == 0:
+                attackers |= leg_horses & horses
+
+    attackers |= PAWN_ATTACKERS[team][square] & bit_boards[pawn]
+    return attackers & kept
+
+
+def attack_map(bit_boards: BitBoard, team):
+    """
+    Find every square a team attacks, including squares held by its own pieces (which it defends).
     :param bit_boards: a BitBoard object
     :param team: either 'r' for the red team or 'b' for the black team.
-    :return: the updated piece bitboard, after removing all conflicting moves.
+    :return: a bitboard of the attacked squares.
     """
-    for key in bit_boards:
-        if (team == 'r' and str.isupper(key)) or (team == 'b' and str.islower(key)):
-            piece_bitboard &= ~bit_boards[key]
+    occupancy = bit_boards.occupancy
+    attacked = 0
+    for piece_class in (RED_PIECE_CLASSES if team == 'r' else BLACK_PIECE_CLASSES):
+        targets_function = PIECE_TYPE_TO_TARGETS[piece_class.lower()]
+        for square in iter_squares(bit_boards[piece_class]):
+            attacked |= targets_function(square, team, occupancy)
+    return attacked
 
-    return piece_bitboard
 
+def _general_square(bit_boards, team):
+    general = bit_boards['G' if team == 'r' else 'g']
+    return mask_to_square(general) if general else None
 
-def return_valid_moves_by_type_and_location(bit_boards: BitBoard, piece_class, piece_location: Optional[int] = None):
-    if isinstance(piece_location, tuple):
-        from engine.engine_util import location_to_bitboard
-        piece_location = location_to_bitboard(piece_location)
-
-    if piece_class == 'g':
-        return black_general_valid_movements(bit_boards, piece_location)
-    elif piece_class == 'a':
-        return black_adviser_valid_movements(bit_boards, piece_location)
-    elif piece_class == 'p':
-        return black_pawn_valid_movements(bit_boards, piece_location)
-    return 0
+
+def checkers(bit_boards: BitBoard, team):
+    """
+    Find the pieces giving check to a team's general.
+    :param bit_boards: a BitBoard object
+    :param team: the team in check, either 'r' for the red team or 'b' for the black team.
+    :return: a bitboard of the enemy pieces attacking the general (0 if the general is missing).
+    """
+    square = _general_square(bit_boards, team)
+    return 0 if square is None else attackers_of_square(bit_boards, square, 'b' if team == 'r' else 'r')
+
+
+def is_general_attacked(bit_boards: BitBoard, team):
+    """
+    Determine whether a team's general could be captured by the other team, including by the opposing general when
+    the two generals face each other on an open file.
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :return: True if the general is attacked (or missing), and False otherwise.
+    """
+    square = _general_square(bit_boards, team)
+    return square is None or attackers_of_square(bit_boards, square, 'b' if team == 'r' else 'r') != 0
+
+
+def pinned_pieces(bit_boards: BitBoard, team):
+    """
+    Find the pieces whose moves may expose their own general, and the empty squares no piece may move to.
+
+    A piece is pinned when moving it off its line would let an enemy piece reach the general: the only piece between
+    the general and an enemy chariot (or the enemy general, on the file), either of the two pieces between the general
+    and an enemy cannon, or a piece on the leg of an enemy horse aimed at the general. Moving a piece between the
+    general and an enemy cannon with nothing in between gives that cannon a screen, so those squares are forbidden.
+
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :return: a 2-tuple (pinned, forbidden) of bitboards. pinned may include enemy pieces, which never move for the team.
+    """
+    square = _general_square(bit_boards, team)
+    if square is None:
+        return 0, 0
+
+    occupancy = bit_boards.occupancy
+    chariot, horse, _, _, general, cannon, _ = BLACK_PIECE_CLASSES if team == 'r' else RED_PIECE_CLASSES
+    line_pieces = bit_boards[chariot] | bit_boards[general]
+    cannons = bit_boards[cannon]
+    pinned, forbidden = 0, 0
+
+    for ray in RAYS[square]:
+        # The first three pieces outwards from the general, and the empty squares before the first.
+        found = []
+        empty = 0
+        for mask in ray:
+            if occupancy & mask:
+                found.append(mask)
+                if len(found) == 3:
+                    break
+            elif not found:
+                empty |= mask
+
+        if not found:
+            continue
+        if found[0] & cannons:
+            forbidden |= empty
+        if len(found) > 1 and found[1] & line_pieces:
+            pinned |= found[0]
+        if len(found) > 2 and found[2] & cannons:
+            pinned |= found[0] | found[1]
+
+    horses = bit_boards[horse]
+    if horses:
+        for leg, leg_horses in HORSE_ATTACKERS[square]:
+            if occupancy & leg and leg_horses & horses:
+                pinned |= leg
+
+    return pinned, forbidden
+
+
+def _exposes_general(bit_boards, team, from_square, to_square, general_square):
+    # Whether a move leaves the team's general attacked, from the occupancy after the move alone.
+    to_mask = SQUARE_MASKS[to_square]
+    occupancy = bit_boards.occupancy
+    removed = occupancy & to_mask
+    occupancy = (occupancy & ~SQUARE_MASKS[from_square]) | to_mask
+
+    if from_square == general_square:
+        general_square = to_square
+
+    return attackers_of_square(bit_boards, general_square, 'b' if team == 'r' else 'r', occupancy, removed) != 0
+
+
+def legal_targets(bit_boards: BitBoard, piece_class, piece_location: Optional[int] = None):
+    """
+    Like valid_movements, but leaves out the squares that would leave the piece's own general attacked. Without a
+    general on the board (e.g. in a puzzle), no square is left out.
+    :param bit_boards: BitBoard object
+    :param piece_class: the internal representation of the piece, e.g. 'h' for black horses or 'H' for red horses.
+    :param piece_location: an integer containing the bitboard of the piece(s) to move. If not specified, then the
+    movement options of every piece of the class are returned.
+    :return: a bit board containing all legal movement locations.
+    """
+    team = 'r' if str.isupper(piece_class) else 'b'
+    general_square = _general_square(bit_boards, team)
+    if general_square is None:
+        return valid_movements(bit_boards, piece_class, piece_location)
+
+    targets = 0
+    piece_bitboard = piece_location if piece_location is not None else bit_boards[piece_class]
+    for from_square in iter_squares(piece_bitboard & bit_boards[piece_class]):
+        for to_square in iter_squares(valid_movements(bit_boards, piece_class, SQUARE_MASKS[from_square])):
+            if not _exposes_general(bit_boards, team, from_square, to_square, general_square):
+                targets |= SQUARE_MASKS[to_square]
+
+    return targets
+
+
+def generate_legal_moves(bit_boards: BitBoard, team, captures_only=False):
+    """
+    Generate the moves of one team that do not leave its own general attacked (see is_general_attacked).
+
+    Out of check, only moves of the general, of pinned pieces and onto forbidden squares (see pinned_pieces) can
+    expose the general, and only those are tested. In check, every move is tested.
+
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :param captures_only: whether to only generate captures.
+    :return: a list of encoded moves (see engine.moves).
+    """
+    general_square = _general_square(bit_boards, team)
+    if general_square is None:
+        return []
+
+    moves = generate_moves(bit_boards, team, captures_only)
+    if checkers(bit_boards, team):
+        return [move for move in moves
+                if not _exposes_general(bit_boards, team, move & 0x7F, move >> TO_SHIFT & 0x7F, general_square)]
+
+    pinned, forbidden = pinned_pieces(bit_boards, team)
+    # Squares whose moves must be tested: the general's own, and those of pinned pieces.
+    tested = SQUARE_MASKS[general_square] | pinned
+
+    legal_moves = []
+    for move in moves:
+        from_square = move & 0x7F
+        to_square = move >> TO_SHIFT & 0x7F
+        if SQUARE_MASKS[from_square] & tested or SQUARE_MASKS[to_square] & forbidden:
+            if _exposes_general(bit_boards, team, from_square, to_square, general_square):
+                continue
+        legal_moves.append(move)
+
+    return legal_moves
+
+
+def has_legal_move(bit_boards: BitBoard, team):
+    """
+    Determine whether a team has any legal move.
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :return: True if the team can move.
+    """
+    return len(generate_legal_moves(bit_boards, team)) > 0
+
+
+def is_checkmate(bit_boards: BitBoard, team):
+    """
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :return: True if the team is in check and has no legal move.
+    """
+    return checkers(bit_boards, team) != 0 and not has_legal_move(bit_boards, team)
+
+
+def is_stalemate(bit_boards: BitBoard, team):
+    """
+    A stalemated team loses in xiangqi, just like a checkmated one.
+    :param bit_boards: a BitBoard object
+    :param team: either 'r' for the red team or 'b' for the black team.
+    :return: True if the team is not in check but has no legal move.
+    """
+    return checkers(bit_boards, team) == 0 and not has_legal_move(bit_boards, team)
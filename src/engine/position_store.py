@@ -0,0 +1,202 @@
+"""
+This file contains the binary storage of positions, for datasets of millions of positions and games. A file is a
+16-byte header followed by fixed-width records, so record i starts at HEADER_SIZE + i * RECORD_DTYPE.itemsize and is
+read in O(1), and the whole file maps onto a numpy structured array without creating a Python object per record.
+
+Each record (RECORD_DTYPE, little-endian, unaligned) holds:
+    board:     45 bytes, the piece code (see engine_constants.PIECE_CODES) of each of the 90 squares as a nibble, the
+               even square in the high nibble
+    side:      0 if red is to move, 1 if black is
+    score:     the score in centipawns (e.g. from a search), int16
+    key:       the position's Zobrist key
+    best_move: an encoded move (see engine.moves), or NULL_MOVE
+    game_id:   the game the position comes from
+    ply:       the position's ply within that game
+
+Usage:
+    with PositionWriter('positions.xqp') as writer:
+        writer.append(bit_board, score=35, best_move=move, game_id=7, ply=12)
+    records = read_positions('positions.xqp')
+    bit_board = record_to_bit_board(records[12345])
+"""
+import os
+import struct
+import numpy as np
+from .bit_board import BitBoard
+from .engine_constants import BIT_BOARD_WIDTH, PIECE_CLASSES
+from .moves import NULL_MOVE
+from .square import SQUARE_MASKS, iter_squares
+
+BOARD_BYTES = BIT_BOARD_WIDTH // 2
+
+RECORD_DTYPE = np.dtype([
+    ('board', np.uint8, (BOARD_BYTES,)),
+    ('side', np.uint8),
+    ('score', '<i2'),
+    ('key', '<u8'),
+    ('best_move', '<u4'),
+    ('game_id', '<u4'),
+    ('ply', '<u2'),
+])
+
+MAGIC = b'XQPOS\x00\x00\x00'
+VERSION = 1
+# magic, version, record size, padding
+_HEADER = struct.Struct('<8sHH4x')
+HEADER_SIZE = _HEADER.size
+
+# Piece code -> its hex digit, so that bytes.fromhex packs a mailbox of codes into nibbles two squares at a time.
+_CODE_TO_HEX = bytes.maketrans(bytes(range(16)), b'0123456789abcdef')
+
+# Records buffered by a PositionWriter before they are written out.
+DEFAULT_BUFFER_SIZE = 65536
+
+
+def _check_header(header, path):
+    if len(header) != HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a position file")
+    magic, version, record_size = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a position file")
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has an unsupported format (version {version}, {record_size}-byte records)")
+
+
+def encode_board(bit_boards):
+    """
+    Pack the pieces of a position into nibbles.
+    :param bit_boards: a BitBoard object, or a mapping of piece class -> bitboard.
+    :return: a bytes object of BOARD_BYTES bytes.
+    """
+    if isinstance(bit_boards, BitBoard):
+        # The BitBoard keeps the piece code of every square up to date already.
+        mailbox = bit_boards.mailbox
+    else:
+        mailbox = bytearray(BIT_BOARD_WIDTH)
+        for code, piece_class in enumerate(PIECE_CLASSES, start=1):
+            for square in iter_squares(bit_boards[piece_class]):
+                mailbox[square] = code
+    return bytes.fromhex(mailbox.translate(_CODE_TO_HEX).decode())
+
+
+def decode_boards(boards):
+    """
+    Unpack nibble boards into one piece code per square, for a single board or a whole array of records' boards.
+    :param boards: a uint8 array whose last axis has BOARD_BYTES entries, e.g. records['board'].
+    :return: a uint8 array with BIT_BOARD_WIDTH entries on the last axis, indexed by square.
+    """
+    boards = np.asarray(boards, dtype=np.uint8)
+    codes = np.empty(boards.shape[:-1] + (BIT_BOARD_WIDTH,), dtype=np.uint8)
+    codes[..., 0::2] = boards >> 4
+    codes[..., 1::2] = boards & 0xF
+    return codes
+
+
+def record_to_bit_board(record):
+    """
+    Rebuild the BitBoard of a stored position.
+    :param record: a record of a RECORD_DTYPE array.
+    :return: a BitBoard object.
+    """
+    bit_boards = dict.fromkeys(PIECE_CLASSES, 0)
+    for square, code in enumerate(decode_boards(record['board']).tolist()):
+        if code:
+            bit_boards[PIECE_CLASSES[code - 1]] |= SQUARE_MASKS[square]
+    return BitBoard.from_bit_boards(bit_boards, 'b' if record['side'] else 'r')
+
+
+class PositionWriter:
+
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Open a position file for appending, creating it (with its header) if it does not exist.
+
+        :param path: the file to write.
+        :param buffer_size: the number of records to buffer before writing them out.
+        """
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize))
+        else:
+            try:
+                with open(path, 'rb') as file:
+                    _check_header(file.read(HEADER_SIZE), path)
+                if (self._file.tell() - HEADER_SIZE) % RECORD_DTYPE.itemsize:
+                    raise ValueError(f"{path} ends with a partial record")
+            except ValueError:
+                self._file.close()
+                raise
+
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, bit_board, score=0, best_move=NULL_MOVE, game_id=0, ply=0):
+        """
+        Add one position.
+
+        :param bit_board: a BitBoard object.
+        :param score: the position's score in centipawns.
+        :param best_move: the position's best encoded move, if known.
+        :param game_id: the game the position comes from.
+        :param ply: the position's ply within that game.
+        :return: void
+        """
+        self._buffer[self._buffered] = (np.frombuffer(encode_board(bit_board), dtype=np.uint8),
+                                        bit_board.side_to_move == 'b', score, bit_board.zobrist_key, best_move,
+                                        game_id, ply)
+
+        self._buffered += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def write_records(self, records):
+        """
+        Add an array of records in bulk.
+
+        :param records: a RECORD_DTYPE array.
+        :return: void
+        """
+        self.flush()
+        self._file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    def flush(self):
+        """
+        Write the buffered records out.
+
+        :return: void
+        """
+        if self._buffered:
+            self._file.write(self._buffer[:self._buffered].tobytes())
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def read_positions(path, mode='r'):
+    """
+    Memory-map a position file.
+    :param path: the file to read.
+    :param mode: the numpy.memmap mode, 'r' for read-only or 'r+' to update records in place.
+    :return: a RECORD_DTYPE array backed by the file.
+    """
+    with open(path, 'rb') as file:
+        _check_header(file.read(HEADER_SIZE), path)
+
+    size = os.path.getsize(path) - HEADER_SIZE
+    if size % RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} ends with a partial record")
+    if size == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+
+    return np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER_SIZE, shape=(size // RECORD_DTYPE.itemsize,))
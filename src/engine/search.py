@@ -0,0 +1,342 @@
+"""
+This file contains the engine's search: iterative deepening principal variation search (PVS) with aspiration windows,
+a transposition table, quiescence search over captures and killer/history move ordering. Leaves are scored with the
+incrementally updated evaluation of engine.evaluation.
+
+Only legal moves are searched (see piece_movement.generate_legal_moves). A side without a legal move has lost, whether
+it is in check or not (xiangqi has no stalemate draw), and quiescence search answers checks with every evasion.
+"""
+import time
+from collections import Counter, namedtuple
+from .engine_constants import PIECE_CLASSES
+from .evaluation import MATERIAL_VALUES
+from .moves import NULL_MOVE, CAPTURED_SHIFT, PIECE_SHIFT, PIECE_BITS
+from .piece_movement import generate_legal_moves, checkers
+from .tablebase import DRAW
+from .transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+MATE_SCORE = 30000
+# Scores beyond this are mate scores, which are stored in the transposition table relative to the current ply.
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+
+MAX_DEPTH = 64
+DEFAULT_DEPTH = 4
+ASPIRATION_WINDOW = 50
+
+# The limits are checked every this many nodes (must be a power of two), which keeps a stop request answered within a
+# few milliseconds.
+CHECK_INTERVAL = 128
+
+# Piece code -> value used to order captures. The general is never captured, and moves to capture last among attackers.
+ORDERING_VALUES = (0,) + tuple(10000 if piece_class in 'gG' else MATERIAL_VALUES[piece_class.lower()]
+                               for piece_class in PIECE_CLASSES)
+
+SearchResult = namedtuple('SearchResult', ['best_move', 'score', 'pv', 'depth', 'nodes', 'time', 'nps'])
+
+
+class SearchAborted(Exception):
+    """ Raised inside the search when a time or node limit has been reached, or a stop was requested. """
+
+
+class Searcher:
+
+    def __init__(self, bit_board, transposition_table=None, history_keys=(), tablebase=None):
+        """
+        Search positions reached from a BitBoard. The board is modified with make/unmake during the search and is
+        restored when it finishes.
+
+        :param bit_board: the BitBoard object to search.
+        :param transposition_table: a TranspositionTable to use, or None to allocate a small one.
+        :param history_keys: Zobrist keys of the positions earlier in the game, for repetition detection.
+        :param tablebase: an optional engine.tablebase.Tablebase, probed below the root once few enough pieces remain.
+        """
+        self.bit_board = bit_board
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable(4)
+        # How often each position occurs in the game and on the current search path, for O(1) repetition checks.
+        self.history_counts = Counter(history_keys)
+        self.tablebase = tablebase
+        self.tablebase_hits = 0
+
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.stop_event = None
+        self.killers = [[NULL_MOVE, NULL_MOVE] for _ in range(MAX_DEPTH + 1)]
+        self.history = {}
+        self.pv_table = [[] for _ in range(MAX_DEPTH + 2)]
+
+    def evaluate(self):
+        # The board keeps its material and piece-square score up to date (see engine.evaluation).
+        score = self.bit_board.score
+        return score if self.bit_board.side_to_move == 'r' else -score
+
+    def search(self, depth=None, time_limit=None, node_limit=None, info_callback=None, stop_event=None):
+        """
+        Run an iterative deepening search.
+
+        :param depth: the maximum depth in plies. Defaults to DEFAULT_DEPTH when no limit is given, and to MAX_DEPTH
+        otherwise.
+        :param time_limit: the maximum time to search, in seconds.
+        :param node_limit: the maximum number of nodes to search.
+        :param info_callback: optional function called with a SearchResult after every completed iteration.
+        :param stop_event: optional threading.Event which, once set (e.g. from another thread), stops the search as if
+        its time had run out.
+        :return: a SearchResult for the deepest completed iteration.
+        """
+        if depth is None:
+            depth = DEFAULT_DEPTH if time_limit is None and node_limit is None and stop_event is None else MAX_DEPTH
+        depth = max(1, min(depth, MAX_DEPTH))
+
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.stop_event = stop_event
+        self.nodes = 0
+        self.transposition_table.new_search()
+
+        result = SearchResult(NULL_MOVE, 0, [], 0, 0, 0.0, 0.0)
+        score = 0
+        for iteration_depth in range(1, depth + 1):
+            try:
+                score = self._aspiration_search(iteration_depth, score)
+            except SearchAborted:
+                break
+
+            elapsed = time.perf_counter() - start
+            pv = list(self.pv_table[0])
+            result = SearchResult(pv[0] if pv else NULL_MOVE, score, pv, iteration_depth, self.nodes, elapsed,
+                                  self.nodes / elapsed if elapsed > 0 else 0.0)
+
+            if info_callback is not None:
+                info_callback(result)
+
+            # No point searching deeper once a forced mate has been found.
+            if abs(score) > MATE_BOUND:
+                break
+
+        # If not even the first iteration finished, fall back to the best ordered move.
+        if result.best_move == NULL_MOVE:
+            moves = self._order_moves(generate_legal_moves(self.bit_board, self.bit_board.side_to_move), NULL_MOVE, 0)
+            if moves:
+                result = result._replace(best_move=moves[0], pv=[moves[0]])
+
+        elapsed = time.perf_counter() - start
+        return result._replace(nodes=self.nodes, time=elapsed, nps=self.nodes / elapsed if elapsed > 0 else 0.0)
+
+    def quiescence_score(self, ply=0):
+        """
+        Score the position with the quiescence search alone: captures until the position is quiet, or every evasion
+        while in check. The nodes searched are added to self.nodes.
+
+        :param ply: the plies already played from the root, from which mate scores are counted.
+        :return: the score in centipawns from the side to move's point of view.
+        """
+        return self._quiescence(-INFINITY, INFINITY, ply)
+
+    def _aspiration_search(self, depth, previous_score):
+        # Search a narrow window around the previous iteration's score, widening it on failure.
+        if depth < 3 or abs(previous_score) > MATE_BOUND:
+            return self._pvs(depth, -INFINITY, INFINITY, 0, True)
+
+        delta = ASPIRATION_WINDOW
+        alpha, beta = previous_score - delta, previous_score + delta
+        while True:
+            score = self._pvs(depth, alpha, beta, 0, True)
+            if score <= alpha:
+                alpha = max(-INFINITY, alpha - delta)
+            elif score >= beta:
+                beta = min(INFINITY, beta + delta)
+            else:
+                return score
+            delta *= 2
+
+    def _check_limits(self):
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted()
+
+    def _order_moves(self, moves, tt_move, ply):
+        # TT move first, then captures by most valuable victim / least valuable attacker, then killers and history.
+        killers = self.killers[ply]
+        history = self.history
+
+        def priority(move):
+            if move == tt_move:
+                return 1 << 30
+            captured_code = move >> CAPTURED_SHIFT & PIECE_BITS
+            if captured_code:
+                return (1 << 24) + _capture_priority(move)
+            if move == killers[0]:
+                return 1 << 23
+            if move == killers[1]:
+                return (1 << 23) - 1
+            return history.get(move & 0x3FFFFF, 0)
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _pvs(self, depth, alpha, beta, ply, pv_node):
+        self.pv_table[ply] = []
+        self.nodes += 1
+        if self.nodes & (CHECK_INTERVAL - 1) == 0:
+            self._check_limits()
+
+        bit_board = self.bit_board
+        key = bit_board.zobrist_key
+
+        if ply > 0 and self.history_counts[key]:
+            return 0
+
+        tablebase = self.tablebase
+        if tablebase is not None and ply > 0 and bin(bit_board.occupancy).count('1') <= tablebase.max_pieces:
+            entry = tablebase.probe(bit_board)
+            if entry is not None:
+                self.tablebase_hits += 1
+                return _tablebase_score(entry, ply)
+
+        if depth <= 0:
+            return self._quiescence(alpha, beta, ply)
+
+        if ply >= MAX_DEPTH:
+            return self.evaluate()
+
+        # Transposition table lookup
+        tt_move = NULL_MOVE
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, tt_flag = entry
+            if not pv_node and tt_depth >= depth:
+                tt_score = _score_from_table(tt_score, ply)
+                if tt_flag == EXACT or (tt_flag == LOWER_BOUND and tt_score >= beta) or \
+                        (tt_flag == UPPER_BOUND and tt_score <= alpha):
+                    return tt_score
+
+        moves = generate_legal_moves(bit_board, bit_board.side_to_move)
+        if not moves:
+            # Checkmated or stalemated: either way the side to move has lost.
+            return -(MATE_SCORE - ply)
+        moves = self._order_moves(moves, tt_move, ply)
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = NULL_MOVE
+        self.history_counts[key] += 1
+
+        try:
+            for index, move in enumerate(moves):
+                bit_board.make_move(move)
+                try:
+                    if index == 0:
+                        score = -self._pvs(depth - 1, -beta, -alpha, ply + 1, pv_node)
+                    else:
+                        score = -self._pvs(depth - 1, -alpha - 1, -alpha, ply + 1, False)
+                        if alpha < score < beta:
+                            score = -self._pvs(depth - 1, -beta, -alpha, ply + 1, pv_node)
+                finally:
+                    bit_board.unmake_move(move)
+
+                if score > best_score:
+                    best_score, best_move = score, move
+
+                    if score > alpha:
+                        alpha = score
+                        self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+
+                        if alpha >= beta:
+                            if not move >> CAPTURED_SHIFT & PIECE_BITS:
+                                self._update_quiet_move_statistics(move, depth, ply)
+                            break
+        finally:
+            self.history_counts[key] -= 1
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, best_move, _score_to_table(best_score, ply), depth, flag)
+
+        return best_score
+
+    def _update_quiet_move_statistics(self, move, depth, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history_key = move & 0x3FFFFF
+        self.history[history_key] = self.history.get(history_key, 0) + depth * depth
+
+    def _quiescence(self, alpha, beta, ply):
+        # Only captures are searched, so that the static evaluation is never taken in the middle of an exchange. A side
+        # in check cannot stand pat, so it searches every evasion instead, and is mated without one.
+        bit_board = self.bit_board
+        if ply >= MAX_DEPTH:
+            return self.evaluate()
+
+        side = bit_board.side_to_move
+        if checkers(bit_board, side):
+            moves = generate_legal_moves(bit_board, side)
+            if not moves:
+                return -(MATE_SCORE - ply)
+        else:
+            stand_pat = self.evaluate()
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = generate_legal_moves(bit_board, side, captures_only=True)
+        moves.sort(key=_capture_priority, reverse=True)
+
+        for move in moves:
+            self.nodes += 1
+            if self.nodes & (CHECK_INTERVAL - 1) == 0:
+                self._check_limits()
+
+            bit_board.make_move(move)
+            try:
+                score = -self._quiescence(-beta, -alpha, ply + 1)
+            finally:
+                bit_board.unmake_move(move)
+
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        return alpha
+
+
+def _capture_priority(move):
+    # Most valuable victim first, and the least valuable attacker among equal victims.
+    return ORDERING_VALUES[move >> CAPTURED_SHIFT & PIECE_BITS] * 16 - \
+        ORDERING_VALUES[move >> PIECE_SHIFT & PIECE_BITS] // 16
+
+
+def _tablebase_score(entry, ply):
+    # The tablebase counts plies to the position without a legal move, which search scores as MATE_SCORE - its ply.
+    result, plies = entry
+    if result == DRAW:
+        return 0
+    return result * (MATE_SCORE - (ply + plies))
+
+
+def _score_to_table(score, ply):
+    # Mate scores are stored as distance from the stored position rather than from the root.
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
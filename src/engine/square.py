@@ -0,0 +1,114 @@
+"""
+This file contains the square indexing used by the engine, along with precomputed lookup tables.
+
+Squares are numbered 0 to 89 in reading order, starting at the top left of the board: square = y * N_FILES + x.
+This matches the bitboard layout, where square 0 is stored in the most significant of the 90 bits, and square 89 in
+the least significant bit.
+"""
+from .engine_constants import N_FILES, N_RANKS, BIT_BOARD_WIDTH
+
+SQUARES = range(BIT_BOARD_WIDTH)
+
+# Square -> single bit bitboard
+SQUARE_MASKS = tuple(1 << (BIT_BOARD_WIDTH - 1 - square) for square in SQUARES)
+
+# Square -> 2-tuple (x,y) of grid coordinates
+SQUARE_LOCATIONS = tuple((square % N_FILES, square // N_FILES) for square in SQUARES)
+
+# 2-tuple (x,y) of grid coordinates -> single bit bitboard
+LOCATION_MASKS = {SQUARE_LOCATIONS[square]: SQUARE_MASKS[square] for square in SQUARES}
+
+
+def location_to_square(location):
+    """
+    Converts a location into its square index.
+    :param location: a 2-Tuple (x,y) of grid coordinates.
+    :return: an integer in [0, BIT_BOARD_WIDTH).
+    """
+    return location[1] * N_FILES + location[0]
+
+
+def square_to_location(square):
+    """
+    Converts a square index into its location.
+    :param square: an integer in [0, BIT_BOARD_WIDTH).
+    :return: a 2-Tuple (x,y) of grid coordinates.
+    """
+    return SQUARE_LOCATIONS[square]
+
+
+def square_to_mask(square):
+    """
+    Converts a square index into its bitboard representation.
+    :param square: an integer in [0, BIT_BOARD_WIDTH).
+    :return: an integer with only the square's bit set.
+    """
+    return SQUARE_MASKS[square]
+
+
+def mask_to_square(mask):
+    """
+    Converts a bitboard with a single bit set into its square index. If more than one bit is set, the square with the
+    lowest index is returned.
+    :param mask: a non-zero bitboard.
+    :return: an integer in [0, BIT_BOARD_WIDTH).
+    """
+    return BIT_BOARD_WIDTH - mask.bit_length()
+
+
+def is_on_board(location):
+    """
+    Checks whether a location lies on the board.
+    :param location: a 2-Tuple (x,y) of grid coordinates.
+    :return: True if the location is on the board, and False otherwise.
+    """
+    return 0 <= location[0] < N_FILES and 0 <= location[1] < N_RANKS
+
+
+def iter_squares(bitboard):
+    """
+    Iterates over the set bits of a bitboard, without converting it to a string. Squares are produced in reading
+    order (ascending square index) by repeatedly scanning off the most significant set bit.
+    :param bitboard: an integer containing a bitboard.
+    :return: a generator of square indices.
+    """
+    while bitboard:
+        width = bitboard.bit_length()
+        yield BIT_BOARD_WIDTH - width
+        bitboard ^= 1 << (width - 1)
+
+
+def iter_locations(bitboard):
+    """
+    Iterates over the set bits of a bitboard as grid coordinates, in reading order.
+    :param bitboard: an integer containing a bitboard.
+    :return: a generator of 2-tuples (x,y).
+    """
+    while bitboard:
+        width = bitboard.bit_length()
+        yield SQUARE_LOCATIONS[BIT_BOARD_WIDTH - width]
+        bitboard ^= 1 << (width - 1)
+
+
+def bitboard_to_squares(bitboard):
+    """
+    Converts a bitboard into a list of square indices, in reading order.
+    :param bitboard: an integer containing a bitboard.
+    :return: a list of square indices.
+    """
+    squares = []
+    while bitboard:
+        width = bitboard.bit_length()
+        squares.append(BIT_BOARD_WIDTH - width)
+        bitboard ^= 1 << (width - 1)
+
+    return squares
+
+
+def squares_by_piece_class(bit_boards):
+    """
+    Converts every piece class's bitboard into its list of square indices at once.
+    :param bit_boards: a BitBoard object, or any mapping of piece class -> bitboard.
+    :return: a dictionary of piece class -> list of square indices, in reading order.
+    """
+    return {piece_class: bitboard_to_squares(bit_boards[piece_class]) for piece_class in bit_boards}
@@ -0,0 +1,460 @@
+"""
+This file contains the endgame tablebases: the exact distance to mate of every position of a small material
+signature, generated by retrograde analysis and probed by search.
+
+A signature names the pieces besides the two generals, red in upper case and black in lower case, e.g. 'Ra' (red
+chariot against a black adviser) or 'HPaa'. Positions are indexed by placing each piece on the squares it can reach
+(generals in their palace, advisers and elephants on their few points, pawns on their own side's files and beyond the
+river) plus the side to move. Mirroring the board across the central file does not change a position's value, so
+only positions with the red general on file 3 or 4 are stored.
+
+Each signature is one file of int16 values, one per position index after a 16-byte header, read through mmap:
+    0                  a draw (neither side can force mate)
+    n + 1              the side to move mates in n plies
+    -(n + 1)           the side to move is mated in n plies (-1: it has no legal move, which loses in xiangqi)
+    ILLEGAL            the side not to move is in check, or two pieces share a square
+
+Generation finds every position's legal moves (a capture leads into the smaller signature's table, which is generated
+first) and then resolves positions level by level, walking from each resolved position to its predecessors. Finding
+the moves is the expensive part and is split across worker processes. Repetition rules are not modelled.
+
+Usage (from src): python -m engine.tablebase SIGNATURE [SIGNATURE ...] [--directory DIR] [--workers N]
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from .attack_tables import GENERAL_MOVES, ADVISER_MOVES, ELEPHANT_MOVES, PAWN_MOVES, HORSE_MOVES
+from .bit_board import BitBoard
+from .engine_constants import N_FILES, PIECE_CODES
+from .fen import DEFAULT_FEN
+from .piece_movement import generate_legal_moves, is_general_attacked
+from .square import SQUARES, SQUARE_LOCATIONS, SQUARE_MASKS, iter_squares
+
+# The pieces a signature may hold, in their canonical order.
+SIGNATURE_PIECES = 'RHEACPrheacp'
+MAX_PIECE_COUNTS = {piece_class: 5 if piece_class in 'Pp' else 2 for piece_class in SIGNATURE_PIECES}
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+ILLEGAL = -32768
+
+TABLE_EXTENSION = '.xqtb'
+MAGIC = b'XQTB\x00\x00\x00\x00'
+VERSION = 1
+# magic, version, padding, number of positions
+_HEADER = struct.Struct('<8sH2xI')
+HEADER_SIZE = _HEADER.size
+
+# Positions handed to a worker at a time.
+CHUNK_SIZE = 2048
+
+# Square -> the square mirrored across the central file.
+MIRROR_SQUARES = tuple(y * N_FILES + (N_FILES - 1 - x) for x, y in SQUARE_LOCATIONS)
+
+
+def _reachable_squares(piece_class):
+    # Every square a piece can reach from its starting squares on an empty board.
+    team = 'r' if piece_class.isupper() else 'b'
+    piece_type = piece_class.lower()
+    frontier = list(iter_squares(BitBoard.from_fen(DEFAULT_FEN)[piece_class]))
+    reached = set(frontier)
+
+    while frontier:
+        square = frontier.pop()
+        if piece_type == 'g':
+            targets = GENERAL_MOVES[team][square]
+        elif piece_type == 'a':
+            targets = ADVISER_MOVES[team][square]
+        elif piece_type == 'e':
+            targets = sum(target for _, target in ELEPHANT_MOVES[team][square])
+        elif piece_type == 'p':
+            targets = PAWN_MOVES[team][square]
+        else:
+            # Horses reach every point; chariots and cannons too.
+            targets = sum(target for _, target in HORSE_MOVES[square])
+
+        for target in iter_squares(targets):
+            if target not in reached:
+                reached.add(target)
+                frontier.append(target)
+
+    return tuple(sorted(reached))
+
+
+# Piece class -> the squares it may stand on in a table. The red general is kept on files 3 and 4 (see MIRROR_SQUARES).
+PIECE_SQUARES = {piece_class: _reachable_squares(piece_class) for piece_class in 'Gg' + SIGNATURE_PIECES}
+PIECE_SQUARES['G'] = tuple(square for square in PIECE_SQUARES['G'] if SQUARE_LOCATIONS[square][0] <= N_FILES // 2)
+
+
+def canonical_signature(signature):
+    """
+    Validate a material signature and put its pieces in canonical order.
+    :param signature: the pieces besides the generals, e.g. 'aR' or 'Ra'.
+    :return: the canonical signature, e.g. 'Ra'.
+    """
+    for piece_class in set(signature):
+        if piece_class not in SIGNATURE_PIECES:
+            raise ValueError(f"invalid piece {piece_class!r} in signature {signature!r}")
+        if signature.count(piece_class) > MAX_PIECE_COUNTS[piece_class]:
+            raise ValueError(f"too many {piece_class!r} in signature {signature!r}")
+    return ''.join(sorted(signature, key=SIGNATURE_PIECES.index))
+
+
+def signature_of(bit_boards):
+    """
+    The material signature of a position.
+    :param bit_boards: a BitBoard object
+    :return: the canonical signature.
+    """
+    return ''.join(piece_class * bin(bit_boards[piece_class]).count('1') for piece_class in SIGNATURE_PIECES)
+
+
+def sub_signatures(signature):
+    """
+    The signatures reached by capturing one piece.
+    :param signature: a canonical signature.
+    :return: a list of canonical signatures.
+    """
+    return [signature.replace(piece_class, '', 1) for piece_class in dict.fromkeys(signature)]
+
+
+def table_path(directory, signature):
+    """
+    The file of a signature's table. Red and black pieces are separated by '_', so that names are distinct on
+    case-insensitive file systems.
+    :param directory: the tablebase directory.
+    :param signature: a canonical signature.
+    :return: a path.
+    """
+    red = ''.join(piece_class for piece_class in signature if piece_class.isupper())
+    black = ''.join(piece_class for piece_class in signature if piece_class.islower())
+    return os.path.join(directory, f"{red}_{black}{TABLE_EXTENSION}")
+
+
+def encode_value(result, plies):
+    """
+    :param result: WIN, DRAW or LOSS for the side to move.
+    :param plies: the distance to mate in plies (ignored for a draw).
+    :return: the stored int16 value.
+    """
+    return 0 if result == DRAW else result * (plies + 1)
+
+
+def decode_value(value):
+    """
+    :param value: a stored int16 value other than ILLEGAL.
+    :return: a 2-tuple (result, plies), where result is WIN, DRAW or LOSS for the side to move.
+    """
+    if value > 0:
+        return WIN, value - 1
+    if value < 0:
+        return LOSS, -value - 1
+    return DRAW, 0
+
+
+class TableLayout:
+
+    def __init__(self, signature):
+        """
+        The position indexing of a signature: a mixed-radix number with one digit per piece (its index among the
+        squares it may stand on), times two for the side to move.
+
+        :param signature: a canonical signature.
+        """
+        self.signature = signature
+        self.pieces = ('G', 'g') + tuple(signature)
+        self.radices = tuple(len(PIECE_SQUARES[piece_class]) for piece_class in self.pieces)
+        # Piece class -> square -> digit, or -1 where the piece may not stand.
+        self.digits = {piece_class: tuple(PIECE_SQUARES[piece_class].index(square)
+                                          if square in PIECE_SQUARES[piece_class] else -1 for square in SQUARES)
+                       for piece_class in set(self.pieces)}
+
+        self.size = 2
+        for radix in self.radices:
+            self.size *= radix
+
+    def index(self, bit_boards):
+        """
+        :param bit_boards: a BitBoard object of this layout's signature.
+        :return: the position's index, or None if a piece stands where the table does not allow it.
+        """
+        mirror = SQUARE_LOCATIONS[next(iter_squares(bit_boards['G']))][0] > N_FILES // 2
+
+        index = 0
+        for piece_class in dict.fromkeys(self.pieces):
+            digits = self.digits[piece_class]
+            squares = iter_squares(bit_boards[piece_class])
+            # Identical pieces take the digits in square order, so each arrangement has one index.
+            if mirror:
+                squares = sorted(MIRROR_SQUARES[square] for square in squares)
+            for square in squares:
+                digit = digits[square]
+                if digit < 0:
+                    return None
+                index = index * len(PIECE_SQUARES[piece_class]) + digit
+
+        return index * 2 + (bit_boards.side_to_move == 'b')
+
+    def position(self, index):
+        """
+        :param index: a position index.
+        :return: a BitBoard object, or None if two pieces share a square.
+        """
+        side_to_move = 'b' if index & 1 else 'r'
+        index >>= 1
+
+        bit_boards = dict.fromkeys(self.pieces, 0)
+        occupancy = 0
+        for piece_class, radix in zip(reversed(self.pieces), reversed(self.radices)):
+            index, digit = divmod(index, radix)
+            mask = SQUARE_MASKS[PIECE_SQUARES[piece_class][digit]]
+            if occupancy & mask:
+                return None
+            occupancy |= mask
+            bit_boards[piece_class] |= mask
+
+        return BitBoard.from_bit_boards(bit_boards, side_to_move)
+
+
+class Tablebase:
+
+    def __init__(self, directory):
+        """
+        Probe the tables of a directory. Tables are opened (memory-mapped) on their first probe.
+
+        :param directory: the directory the tables were generated in.
+        """
+        self.directory = directory
+        # Signature -> (layout, values), or None if there is no table.
+        self.tables = {}
+        self._files = []
+
+        # The most pieces (generals included) of any table, so that search can skip probing larger positions.
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(TABLE_EXTENSION):
+                    self.max_pieces = max(self.max_pieces, len(name) - len(TABLE_EXTENSION) - 1 + 2)
+
+    def close(self):
+        for views, mapped in self._files:
+            for view in views:
+                view.release()
+            mapped.close()
+        self._files = []
+        self.tables = {}
+
+    def _table(self, signature):
+        if signature not in self.tables:
+            path = table_path(self.directory, signature)
+            table = None
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, size = _HEADER.unpack_from(mapped)
+                if magic != MAGIC or version != VERSION:
+                    mapped.close()
+                    raise ValueError(f"{path} is not a tablebase")
+                layout = TableLayout(signature)
+                if size != layout.size:
+                    mapped.close()
+                    raise ValueError(f"{path} has {size} positions, expected {layout.size}")
+
+                view = memoryview(mapped)
+                values = view[HEADER_SIZE:].cast('h')
+                self._files.append(((values, view), mapped))
+                table = (layout, values)
+            self.tables[signature] = table
+
+        return self.tables[signature]
+
+    def probe_value(self, bit_boards):
+        """
+        Look up the stored value of a position.
+
+        :param bit_boards: a BitBoard object
+        :return: the int16 value (see the module docstring), or None if there is no table for the position.
+        """
+        table = self._table(signature_of(bit_boards))
+        if table is None or not bit_boards['G'] or not bit_boards['g']:
+            return None
+
+        layout, values = table
+        index = layout.index(bit_boards)
+        return None if index is None else _from_little_endian(values[index])
+
+    def probe(self, bit_boards):
+        """
+        Look up a position.
+
+        :param bit_boards: a BitBoard object
+        :return: a 2-tuple (result, plies), where result is WIN, DRAW or LOSS for the side to move and plies is the
+        distance to mate, or None if the position is not covered (no table, or an illegal position).
+        """
+        value = self.probe_value(bit_boards)
+        if value is None or value == ILLEGAL:
+            return None
+        return decode_value(value)
+
+
+def _from_little_endian(value):
+    if sys.byteorder == 'big':
+        value = int.from_bytes(value.to_bytes(2, 'big', signed=True), 'little', signed=True)
+    return value
+
+
+def _find_successors(task):
+    # Runs in a worker process: the legal moves of a range of positions. Returns, for every legal position, the tuple
+    # (index, internal successor indices, values of the positions captures lead to). Illegal positions are left out.
+    signature, directory, start, end = task
+    layout = TableLayout(signature)
+    tablebase = Tablebase(directory)
+    general_codes = (PIECE_CODES['g'], PIECE_CODES['G'])
+
+    positions = []
+    for index in range(start, end):
+        bit_board = layout.position(index)
+        if bit_board is None:
+            continue
+        team = bit_board.side_to_move
+        if is_general_attacked(bit_board, 'b' if team == 'r' else 'r'):
+            continue
+
+        internal, external = [], []
+        for move in generate_legal_moves(bit_board, team):
+            bit_board.make_move(move)
+            captured_code = move >> 18 & 0xF
+            if captured_code in general_codes:
+                raise AssertionError("a legal move captured a general")
+            if captured_code:
+                value = tablebase.probe_value(bit_board)
+                if value is None:
+                    raise RuntimeError(f"missing table {signature_of(bit_board)!r} in {directory}")
+                external.append(value)
+            else:
+                internal.append(layout.index(bit_board))
+            bit_board.unmake_move(move)
+
+        positions.append((index, internal, external))
+
+    tablebase.close()
+    return positions
+
+
+def _retrograde(size, positions):
+    # Resolve positions in increasing distance to mate. A position is won one ply after any successor that is lost for
+    # the opponent, and lost one ply after the last of its successors is found to be won for the opponent.
+    values = array('h', [ILLEGAL]) * size
+    remaining = array('H', [0]) * size
+    predecessors = {}
+    # Distance -> positions resolved at that distance, and (position, opponent loses) events from captures.
+    resolved = {}
+    captures = {}
+
+    for index, internal, external in positions:
+        values[index] = 0
+        remaining[index] = len(internal) + len(external)
+        if not internal and not external:
+            values[index] = encode_value(LOSS, 0)
+            resolved.setdefault(0, []).append(index)
+
+        for successor in internal:
+            predecessors.setdefault(successor, []).append(index)
+        for value in external:
+            if value != 0:
+                result, plies = decode_value(value)
+                captures.setdefault(plies, []).append((index, result == LOSS))
+
+    def resolve(index, opponent_loses, plies):
+        if values[index] != 0:
+            return
+        if opponent_loses:
+            values[index] = encode_value(WIN, plies + 1)
+            resolved.setdefault(plies + 1, []).append(index)
+        else:
+            remaining[index] -= 1
+            if remaining[index] == 0:
+                values[index] = encode_value(LOSS, plies + 1)
+                resolved.setdefault(plies + 1, []).append(index)
+
+    plies = 0
+    while plies <= max(list(resolved) + list(captures) + [0]):
+        for index, opponent_loses in captures.pop(plies, ()):
+            resolve(index, opponent_loses, plies)
+        for successor in resolved.pop(plies, ()):
+            opponent_loses = values[successor] < 0
+            for index in predecessors.get(successor, ()):
+                resolve(index, opponent_loses, plies)
+        plies += 1
+
+    return values
+
+
+def generate_tablebase(signature, directory, workers=1, executor=None):
+    """
+    Generate the table of a signature, and first those of every signature captures lead to that are missing from the
+    directory.
+
+    :param signature: a material signature, e.g. 'Ra'.
+    :param directory: the directory to write tables to.
+    :param workers: the number of processes to find legal moves with.
+    :param executor: an existing concurrent.futures executor to use instead of starting one.
+    :return: the path of the table.
+    """
+    signature = canonical_signature(signature)
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(directory, signature)
+
+    owns_executor = executor is None and workers > 1
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        for sub_signature in sub_signatures(signature):
+            if not os.path.exists(table_path(directory, sub_signature)):
+                generate_tablebase(sub_signature, directory, executor=executor)
+
+        layout = TableLayout(signature)
+        tasks = [(signature, directory, start, min(start + CHUNK_SIZE, layout.size))
+                 for start in range(0, layout.size, CHUNK_SIZE)]
+        chunks = executor.map(_find_successors, tasks) if executor is not None else map(_find_successors, tasks)
+        values = _retrograde(layout.size, [position for chunk in chunks for position in chunk])
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    # Write to a temporary file first, so that an interrupted run never leaves a truncated table behind.
+    with open(path + '.tmp', 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, layout.size))
+        values.tofile(file)
+    os.replace(path + '.tmp', path)
+
+    return path
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Generate endgame tablebases.')
+    parser.add_argument('signatures', nargs='+', help="material signatures, e.g. 'Ra' for a red chariot against a "
+                                                      "black adviser")
+    parser.add_argument('--directory', default='tablebases', help='directory to write tables to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    args = parser.parse_args(arguments)
+
+    for signature in args.signatures:
+        start = time.perf_counter()
+        path = generate_tablebase(signature, args.directory, args.workers)
+        print(f"{canonical_signature(signature)}: {path} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+This file contains the transposition table used by search. The table is a fixed number of buckets, preallocated from
+a memory budget and stored as flat typed buffers (one per field) over a single block of memory, so it never grows and
+can be placed in shared memory.
+
+Each bucket holds two entries. The first is depth-preferred: it is only replaced by a deeper search of any position,
+or by any search once its entry is from an older search. The second is always replaced. Probes check both.
+"""
+from .moves import NULL_MOVE
+
+# Bound types of a stored score. An empty entry has the flag EMPTY.
+EMPTY = 0
+EXACT = 1
+LOWER_BOUND = 2
+UPPER_BOUND = 3
+
+ENTRIES_PER_BUCKET = 2
+
+# (field, memoryview format, bytes), stored in this order so every buffer is aligned to its item size.
+_FIELDS = (
+    ('keys', 'Q', 8),
+    ('moves', 'I', 4),
+    ('scores', 'i', 4),
+    ('depths', 'b', 1),
+    ('flags', 'B', 1),
+    ('ages', 'B', 1),
+)
+ENTRY_SIZE = sum(size for _, _, size in _FIELDS)
+
+_KEY_MASK = (1 << 64) - 1
+
+
+def table_size_in_bytes(n_buckets):
+    """
+    The number of bytes the buffers of a table with n_buckets buckets occupy.
+    :param n_buckets: number of buckets.
+    :return: an integer.
+    """
+    n_entries = n_buckets * ENTRIES_PER_BUCKET
+    size = 0
+    for _, _, item_size in _FIELDS:
+        size += -size % item_size + n_entries * item_size
+    return size
+
+
+class TranspositionTable:
+
+    def __init__(self, size_mb=16, buffer=None):
+        """
+        Allocate a transposition table that fits in a memory budget.
+
+        :param size_mb: the memory budget in megabytes. The table takes as many buckets as fit within it.
+        :param buffer: optional writable buffer (e.g. multiprocessing.shared_memory.SharedMemory.buf) to store the table
+        in. It must be at least table_size_in_bytes(n_buckets) long, and its contents are used as they are.
+        """
+        budget = int(size_mb * 1024 * 1024) if buffer is None else len(buffer)
+        self.n_buckets = max(1, budget // (ENTRY_SIZE * ENTRIES_PER_BUCKET))
+        while table_size_in_bytes(self.n_buckets) > budget and self.n_buckets > 1:
+            self.n_buckets -= 1
+        self.n_entries = self.n_buckets * ENTRIES_PER_BUCKET
+
+        self._memory = memoryview(bytearray(table_size_in_bytes(self.n_buckets)) if buffer is None else buffer)
+
+        # Carve a typed view for each field out of the block.
+        offset = 0
+        for field, item_format, item_size in _FIELDS:
+            offset += -offset % item_size
+            end = offset + self.n_entries * item_size
+            setattr(self, field, self._memory[offset:end].cast(item_format))
+            offset = end
+
+        self.age = 0
+        self.reset_statistics()
+
+    @property
+    def size_in_bytes(self):
+        return table_size_in_bytes(self.n_buckets)
+
+    def reset_statistics(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        # Stores that evicted a different position.
+        self.collisions = 0
+
+    def clear(self):
+        """
+        Empty every entry and reset the statistics and age.
+
+        :return: void
+        """
+        # Zero the block a chunk at a time, so clearing does not need a second table's worth of memory.
+        chunk = bytes(min(len(self._memory), 1 << 20))
+        for offset in range(0, len(self._memory), len(chunk)):
+            end = min(offset + len(chunk), len(self._memory))
+            self._memory[offset:end] = chunk[:end - offset]
+        self.age = 0
+        self.reset_statistics()
+
+    def new_search(self):
+        """
+        Mark the start of a new search. Entries from earlier searches become preferred for replacement.
+
+        :return: void
+        """
+        self.age = (self.age + 1) & 0xFF
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        :param key: the position's 64-bit Zobrist key.
+        :return: a 4-tuple (move, score, depth, flag) if the position is stored, or None.
+        """
+        self.probes += 1
+        key &= _KEY_MASK
+        index = (key % self.n_buckets) * ENTRIES_PER_BUCKET
+        keys = self.keys
+
+        for entry in (index, index + 1):
+            if keys[entry] == key and self.flags[entry] != EMPTY:
+                self.hits += 1
+                return self.moves[entry], self.scores[entry], self.depths[entry], self.flags[entry]
+
+        return None
+
+    def store(self, key, move, score, depth, flag):
+        """
+        Store the result of searching a position.
+
+        :param key: the position's 64-bit Zobrist key.
+        :param move: the best encoded move found, or NULL_MOVE.
+        :param score: the score of the position.
+        :param depth: the depth the position was searched to.
+        :param flag: EXACT, LOWER_BOUND or UPPER_BOUND.
+        :return: void
+        """
+        self.stores += 1
+        key &= _KEY_MASK
+        index = (key % self.n_buckets) * ENTRIES_PER_BUCKET
+        keys, depths, flags, ages = self.keys, self.depths, self.flags, self.ages
+
+        if keys[index] == key and flags[index] != EMPTY:
+            # Same position in the depth-preferred slot: refresh it, unless that would lose a deeper result.
+            if depth < depths[index] and ages[index] == self.age:
+                entry = index + 1
+            else:
+                entry = index
+        elif flags[index] == EMPTY or depth >= depths[index] or ages[index] != self.age:
+            entry = index
+            # Demote the previous depth-preferred entry rather than discarding it.
+            if flags[index] != EMPTY:
+                self._copy_entry(index, index + 1)
+        else:
+            entry = index + 1
+
+        if flags[entry] != EMPTY and keys[entry] != key:
+            self.collisions += 1
+
+        # Keep the known best move when a shallower search of the same position did not find one.
+        if move == NULL_MOVE and keys[entry] == key:
+            move = self.moves[entry]
+
+        keys[entry] = key
+        self.moves[entry] = move
+        self.scores[entry] = score
+        depths[entry] = max(-128, min(127, depth))
+        flags[entry] = flag
+        ages[entry] = self.age
+
+    def _copy_entry(self, source, destination):
+        if self.flags[destination] != EMPTY and self.keys[destination] != self.keys[source]:
+            self.collisions += 1
+        for field, _, _ in _FIELDS:
+            view = getattr(self, field)
+            view[destination] = view[source]
+
+    def fill(self, sample_size=1000):
+        """
+        Estimate the fraction of entries in use by sampling the start of the table.
+
+        :param sample_size: the number of entries to sample.
+        :return: a float in [0, 1].
+        """
+        sample_size = min(sample_size, self.n_entries)
+        flags = self.flags
+        return sum(1 for entry in range(sample_size) if flags[entry] != EMPTY) / sample_size
+
+    def statistics(self):
+        """
+        :return: a dictionary of the table's size and usage statistics.
+        """
+        return {
+            'buckets': self.n_buckets,
+            'entries': self.n_entries,
+            'bytes': self.size_in_bytes,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+            'collisions': self.collisions,
+            'fill': self.fill(),
+        }
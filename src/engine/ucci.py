@@ -0,0 +1,325 @@
+"""
+This file contains the UCCI protocol front-end, which lets GUIs and tournament managers run the engine headless over
+stdin/stdout. UCCI is the xiangqi counterpart of UCI; the common UCI spellings of the same commands are accepted too.
+
+Commands:
+    ucci | uci                           identify the engine, answered with ucciok (uciok), and choose the protocol
+    isready                              answered with readyok
+    setoption hashsize <MB>              (or: setoption name Hash value <MB>) the transposition table size
+    position {startpos | fen <FEN>} [moves <m1> <m2> ...]
+    go [ponder | infinite] [depth <d>] [nodes <n>] [movetime <ms>]
+       [time <ms> [increment <ms>] [movestogo <n>]]              the side to move's clock (UCCI)
+       [wtime <ms>] [btime <ms>] [winc <ms>] [binc <ms>]          both clocks (UCI)
+    ponderhit                            the pondered move was played: keep searching, now on the clock
+    stop                                 stop searching and answer with the best move so far
+    quit
+
+Moves use ICCS coordinates, e.g. h2e2: files a-i from red's left, ranks 0-9 from red's side of the board. While
+searching, the engine writes an info line after every iteration (depth, score, time, nodes, nps, pv) and finally
+"bestmove <move> [ponder <move>]", or "nobestmove" without a legal move. After uci, the output follows UCI instead:
+scores read "score cp <centipawns>" or "score mate <moves>", and a position without a legal move gets "bestmove 0000".
+
+The search runs in a background thread and polls a stop event every few hundred nodes, so stop is answered within
+milliseconds. Time management is done by a timer that sets the same event once the move's time budget is spent.
+
+Usage (from src): python -m engine.ucci
+"""
+import sys
+import threading
+from .chess_engine import ChessEngine
+from .engine_constants import N_FILES, N_RANKS
+from .fen import DEFAULT_FEN
+from .moves import NULL_MOVE, move_from, move_to
+from .search import DEFAULT_DEPTH, MATE_SCORE, MATE_BOUND
+
+ENGINE_NAME = 'XiangQi'
+ENGINE_AUTHOR = 'Peyton Gozon'
+
+DEFAULT_HASH_MB = 16
+# Moves assumed to remain when the clock gives no movestogo.
+DEFAULT_MOVES_TO_GO = 30
+# Time kept back on every move for communication delays, in seconds.
+MOVE_OVERHEAD = 0.05
+MINIMUM_MOVE_TIME = 0.01
+
+ICCS_FILES = 'abcdefghi'
+
+
+def square_to_iccs(square):
+    x, y = square % N_FILES, square // N_FILES
+    return f"{ICCS_FILES[x]}{N_RANKS - 1 - y}"
+
+
+def iccs_to_square(text):
+    if len(text) != 2 or text[0] not in ICCS_FILES or not text[1].isdigit():
+        raise ValueError(f"invalid ICCS square {text!r}")
+    return (N_RANKS - 1 - int(text[1])) * N_FILES + ICCS_FILES.index(text[0])
+
+
+def move_to_iccs(move):
+    """
+    :param move: an encoded move (see engine.moves).
+    :return: the move in ICCS coordinates, e.g. 'h2e2'.
+    """
+    return square_to_iccs(move_from(move)) + square_to_iccs(move_to(move))
+
+
+def iccs_to_move(engine, text):
+    """
+    Find the legal move of the side to move given in ICCS coordinates.
+    :param engine: a ChessEngine object.
+    :param text: the move, e.g. 'h2e2' (case is ignored).
+    :return: the encoded move.
+    """
+    text = text.lower()
+    from_square, to_square = iccs_to_square(text[:2]), iccs_to_square(text[2:])
+    for move in engine.generate_moves():
+        if move_from(move) == from_square and move_to(move) == to_square:
+            return move
+    raise ValueError(f"illegal move {text!r}")
+
+
+def uci_score(score):
+    """
+    :param score: a search score, in centipawns from the side to move's point of view.
+    :return: the score as UCI writes it, 'cp <centipawns>', or 'mate <moves>' for a forced mate, negative when the side
+    to move is mated.
+    """
+    if abs(score) <= MATE_BOUND:
+        return f"cp {score}"
+    # MATE_SCORE - |score| is the number of plies to the mate, the last of which is the mating move.
+    if score > 0:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    return f"mate {-((MATE_SCORE + score) // 2)}"
+
+
+def allocate_time(time_left, increment=0.0, moves_to_go=None):
+    """
+    Decide how long to think about one move.
+    :param time_left: the time left on the side to move's clock, in seconds.
+    :param increment: the time added to the clock after every move, in seconds.
+    :param moves_to_go: the number of moves until the next time control, if the clock has one.
+    :return: the time budget, in seconds.
+    """
+    usable = max(time_left - MOVE_OVERHEAD, 0.0)
+    budget = usable / (moves_to_go or DEFAULT_MOVES_TO_GO) + increment * 0.8
+    # Never plan to use more than half of what is left, however large the increment.
+    return max(min(budget, usable / 2), MINIMUM_MOVE_TIME)
+
+
+def parse_go(tokens):
+    """
+    Read the arguments of a go command.
+    :param tokens: the words after 'go'.
+    :return: a dictionary of the given limits: depth and nodes as ints, ponder and infinite as True, and the times
+    (movetime, time, increment, wtime, btime, winc, binc) in seconds.
+    """
+    limits = {}
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token in ('ponder', 'infinite'):
+            limits[token] = True
+        elif token in ('depth', 'nodes', 'movestogo') and index + 1 < len(tokens):
+            limits[token] = int(tokens[index + 1])
+            index += 1
+        elif token in ('movetime', 'time', 'increment', 'opptime', 'oppincrement', 'wtime', 'btime', 'winc', 'binc') \
+                and index + 1 < len(tokens):
+            limits[token] = int(tokens[index + 1]) / 1000
+            index += 1
+        index += 1
+    return limits
+
+
+class UcciServer:
+
+    def __init__(self, output=sys.stdout):
+        """
+        :param output: the stream to write responses to.
+        """
+        self.output = output
+        self._output_lock = threading.Lock()
+        self.engine = ChessEngine(fen=DEFAULT_FEN, transposition_table_mb=DEFAULT_HASH_MB)
+        # 'ucci' or 'uci', chosen by the handshake, which decides how scores and missing moves are written.
+        self.protocol = 'ucci'
+
+        self._thread = None
+        # Set to stop the running search.
+        self._stop_event = threading.Event()
+        # Cleared while the result of an infinite or pondering search must be held back until stop or ponderhit.
+        self._release_event = threading.Event()
+        self._timer = None
+        # The move budget of the running search, in seconds, or None if it is not on the clock.
+        self._move_time = None
+
+    def send(self, line):
+        with self._output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def run(self, input_stream=sys.stdin):
+        """
+        Answer commands until quit or the end of the input.
+
+        :param input_stream: the stream to read commands from.
+        :return: void
+        """
+        for line in input_stream:
+            if not self.handle(line):
+                break
+        self.stop()
+
+    def handle(self, line):
+        """
+        Execute one command.
+
+        :param line: the command line.
+        :return: False after quit, True otherwise.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command in ('ucci', 'uci'):
+            self.protocol = command
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            if command == 'ucci':
+                self.send(f"option hashsize type spin min 1 max 1024 default {DEFAULT_HASH_MB}")
+                self.send('ucciok')
+            else:
+                self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max 1024")
+                self.send('uciok')
+        elif command == 'isready':
+            self.send('readyok')
+        elif command == 'setoption':
+            self._set_option(arguments)
+        elif command == 'position':
+            self.stop()
+            self._set_position(arguments)
+        elif command == 'go':
+            self.stop()
+            try:
+                limits = parse_go(arguments)
+            except ValueError:
+                self.send(f"info string invalid go command: {' '.join(arguments)}")
+            else:
+                self._go(limits)
+        elif command == 'ponderhit':
+            self._ponderhit()
+        elif command == 'stop':
+            self.stop()
+        elif command == 'quit':
+            return False
+        return True
+
+    def _set_option(self, arguments):
+        # UCCI: setoption hashsize 16. UCI: setoption name Hash value 16.
+        if len(arguments) == 4 and arguments[0] == 'name' and arguments[2] == 'value':
+            arguments = [arguments[1], arguments[3]]
+        if len(arguments) == 2 and arguments[0].lower() in ('hashsize', 'hash') and arguments[1].isdigit():
+            self.stop()
+            self.engine.transposition_table_mb = max(1, int(arguments[1]))
+            self.engine.transposition_table = None
+
+    def _set_position(self, arguments):
+        if arguments[:1] == ['startpos']:
+            fen, rest = DEFAULT_FEN, arguments[1:]
+        elif arguments[:1] == ['fen']:
+            end = arguments.index('moves') if 'moves' in arguments else len(arguments)
+            fen, rest = ' '.join(arguments[1:end]), arguments[end:]
+        else:
+            return
+
+        try:
+            self.engine.load_fen(fen)
+            for text in rest[1:] if rest[:1] == ['moves'] else ():
+                self.engine.make_move(iccs_to_move(self.engine, text))
+        except ValueError as error:
+            self.send(f"info string {error}")
+
+    def _go(self, limits):
+        depth = limits.get('depth')
+        node_limit = limits.get('nodes')
+        self._move_time = self._budget(limits)
+        holding = limits.get('ponder', False) or limits.get('infinite', False)
+        if depth is None and node_limit is None and self._move_time is None and not holding:
+            depth = DEFAULT_DEPTH
+
+        self._stop_event.clear()
+        if holding:
+            self._release_event.clear()
+        else:
+            self._release_event.set()
+            self._start_timer()
+
+        self._thread = threading.Thread(target=self._search, args=(depth, node_limit), daemon=True)
+        self._thread.start()
+
+    def _budget(self, limits):
+        if 'movetime' in limits:
+            return limits['movetime']
+        red = self.engine.bit_board.side_to_move == 'r'
+        time_left = limits.get('time', limits.get('wtime' if red else 'btime'))
+        if time_left is None:
+            return None
+        increment = limits.get('increment', limits.get('winc' if red else 'binc', 0.0))
+        return allocate_time(time_left, increment, limits.get('movestogo'))
+
+    def _start_timer(self):
+        if self._move_time is not None:
+            self._timer = threading.Timer(self._move_time, self._stop_event.set)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _search(self, depth, node_limit):
+        result = self.engine.search(depth, None, node_limit, self._send_info, stop_event=self._stop_event)
+
+        # An infinite or pondering search may not answer before it is told to.
+        self._release_event.wait()
+        if self._timer is not None:
+            self._timer.cancel()
+
+        if result.best_move == NULL_MOVE:
+            self.send('nobestmove' if self.protocol == 'ucci' else 'bestmove 0000')
+        elif len(result.pv) > 1:
+            self.send(f"bestmove {move_to_iccs(result.best_move)} ponder {move_to_iccs(result.pv[1])}")
+        else:
+            self.send(f"bestmove {move_to_iccs(result.best_move)}")
+
+    def _send_info(self, result):
+        score = result.score if self.protocol == 'ucci' else uci_score(result.score)
+        self.send(f"info depth {result.depth} score {score} time {int(result.time * 1000)} "
+                  f"nodes {result.nodes} nps {int(result.nps)} pv {' '.join(map(move_to_iccs, result.pv))}")
+
+    def _ponderhit(self):
+        # The search goes on, now against the clock it was given.
+        if self._thread is not None and not self._release_event.is_set():
+            self._start_timer()
+            self._release_event.set()
+
+    def stop(self):
+        """
+        Stop the running search, if any, and wait for it to write its best move.
+
+        :return: void
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._release_event.set()
+        self._thread.join()
+        self._thread = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+def main():
+    UcciServer().run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
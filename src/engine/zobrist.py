@@ -0,0 +1,41 @@
+"""
+This file contains the Zobrist hashing of positions. A position's key is the XOR of one random 64-bit number per
+(piece, square) pair on the board, plus one more when black is to move. The numbers are generated from a fixed seed,
+so keys are stable between runs and processes and can be stored on disk.
+
+BitBoard keeps its key up to date incrementally; compute_zobrist_key recomputes it from scratch for verification.
+"""
+import random
+from .engine_constants import PIECE_CLASSES
+from .square import SQUARES, iter_squares
+
+_ZOBRIST_SEED = 0x58694E6751
+_random = random.Random(_ZOBRIST_SEED)
+
+# Piece code -> square -> random number. Code 0 (no piece) hashes to 0 on every square, so captures of "no piece" can be
+# XORed in unconditionally.
+ZOBRIST_PIECE_SQUARE = (tuple(0 for _ in SQUARES),) + tuple(
+    tuple(_random.getrandbits(64) for _ in SQUARES) for _ in PIECE_CLASSES
+)
+
+# XORed into the key when black is to move.
+ZOBRIST_BLACK_TO_MOVE = _random.getrandbits(64)
+
+del _random
+
+
+def compute_zobrist_key(bit_boards):
+    """
+    Computes the Zobrist key of a position from scratch.
+    :param bit_boards: a BitBoard object
+    :return: a 64-bit integer.
+    """
+    key = 0
+    for code, piece_class in enumerate(PIECE_CLASSES, start=1):
+        for square in iter_squares(bit_boards[piece_class]):
+            key ^= ZOBRIST_PIECE_SQUARE[code][square]
+
+    if bit_boards.side_to_move == 'b':
+        key ^= ZOBRIST_BLACK_TO_MOVE
+
+    return key
@@ -0,0 +1,115 @@
+"""
+This file contains the pre-rendered surfaces of the board: the background (border, ranks, files and palace diagonals)
+and one glyph per piece class (the disc with its character). They are drawn once and then only blitted, so redrawing a
+square costs two blits however much of the board is drawn with lines.
+"""
+import pygame
+from engine.engine_constants import N_FILES
+from visuals.visual_constants import *
+
+
+def square_center(square):
+    """
+    :param square: an integer in [0, 90), see engine.square.
+    :return: the 2-Tuple (x,y) of window pixel coordinates of the square's point.
+    """
+    return (int((square % N_FILES) * HORIZONTAL_TILE_SIZE + HORIZONTAL_PADDING),
+            int((square // N_FILES) * VERTICAL_TILE_SIZE + VERTICAL_PADDING))
+
+
+def square_rect(square):
+    """
+    :param square: an integer in [0, 90).
+    :return: the pygame.Rect a piece on the square covers. The rects of different squares never overlap.
+    """
+    x, y = square_center(square)
+    return pygame.Rect(x - PIECE_RADIUS, y - PIECE_RADIUS, 2 * PIECE_RADIUS, 2 * PIECE_RADIUS)
+
+
+def draw_board_background(surface):
+    """
+    Draw the empty board.
+    :param surface: a surface of at least WINDOW_WIDTH x WINDOW_HEIGHT.
+    :return: void
+    """
+    # begin by cleaning the board
+    surface.fill(BACKGROUND_COLOR)
+
+    # Draw the game's boarder (with rounded corners)
+    pygame.draw.rect(surface, LINE_COLOR, GAME_BOARD_RECTANGLE, OUTER_LINE_THICKNESS,
+                     border_radius=OUTER_LINE_THICKNESS)
+
+    # Draw the ranks (left-right lines)
+    for i in range(1, (N_RANKS - 1)):
+        pygame.draw.line(surface, LINE_COLOR,
+                         (HORIZONTAL_PADDING, VERTICAL_PADDING + i * VERTICAL_TILE_SIZE),
+                         (WINDOW_WIDTH - HORIZONTAL_PADDING - 10, VERTICAL_PADDING + i * VERTICAL_TILE_SIZE),
+                         INNER_LINE_THICKNESS)
+
+    # Draw the files (top-down lines, with a river in rank 5).
+    for i in range(1, (N_FILES - 1)):
+        # portion of line above the river
+        pygame.draw.line(surface, LINE_COLOR,
+                         (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, VERTICAL_PADDING),
+                         (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, VERTICAL_PADDING + 4 * VERTICAL_TILE_SIZE),
+                         INNER_LINE_THICKNESS)
+        # portion of line below the river
+        pygame.draw.line(surface, LINE_COLOR,
+                         (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, VERTICAL_PADDING + 5 * VERTICAL_TILE_SIZE),
+                         (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, WINDOW_HEIGHT - VERTICAL_PADDING - 10),
+                         INNER_LINE_THICKNESS)
+
+    # Draw in the diagonal lines for advisers
+    # Top
+    pygame.draw.line(surface, LINE_COLOR, (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE, BOARD_TOP),
+                     (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP + 2 * VERTICAL_TILE_SIZE),
+                     INNER_LINE_THICKNESS)
+    pygame.draw.line(surface, LINE_COLOR,
+                     (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE, BOARD_TOP + 2 * VERTICAL_TILE_SIZE),
+                     (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP),
+                     INNER_LINE_THICKNESS)
+
+    # Bottom
+    pygame.draw.line(surface, LINE_COLOR,
+                     (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE - 4, BOARD_TOP + BOARD_HEIGHT),
+                     (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP + BOARD_HEIGHT - 2 * VERTICAL_TILE_SIZE),
+                     INNER_LINE_THICKNESS)
+    pygame.draw.line(surface, LINE_COLOR,
+                     (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE, BOARD_TOP + BOARD_HEIGHT - 2 * VERTICAL_TILE_SIZE),
+                     (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP + BOARD_HEIGHT - 4),
+                     INNER_LINE_THICKNESS)
+
+
+def render_background():
+    """
+    :return: a new WINDOW_WIDTH x WINDOW_HEIGHT surface holding the empty board.
+    """
+    surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    draw_board_background(surface)
+    return surface
+
+
+def render_piece_glyphs(font):
+    """
+    Draw every piece class once.
+    :param font: the pygame.font.Font to write the pieces' characters with.
+    :return: a dictionary of piece class -> transparent surface of 2 * PIECE_RADIUS pixels square, holding the disc and
+    the character centred on it.
+    """
+    glyphs = {}
+    for piece_class, (text, team) in PIECE_CLASS_TO_TEXT.items():
+        glyph = pygame.Surface((2 * PIECE_RADIUS, 2 * PIECE_RADIUS), pygame.SRCALPHA)
+        pygame.draw.circle(glyph, PIECE_COLOR, (PIECE_RADIUS, PIECE_RADIUS), PIECE_RADIUS)
+        text_image = font.render(text, True, RED_TEXT if team == 'r' else BLACK_TEXT)
+        glyph.blit(text_image, text_image.get_rect(center=(PIECE_RADIUS, PIECE_RADIUS)))
+        glyphs[piece_class] = glyph
+    return glyphs
+
+
+def render_potential_marker():
+    """
+    :return: the transparent green disc that marks a square a selected piece can move to.
+    """
+    marker = pygame.Surface((2 * PIECE_RADIUS, 2 * PIECE_RADIUS), pygame.SRCALPHA)
+    pygame.draw.circle(marker, POTENTIAL_COLOR, (PIECE_RADIUS, PIECE_RADIUS), PIECE_RADIUS)
+    return marker
@@ -0,0 +1,190 @@
+"""
+This file contains the headless renderer, which draws positions onto offscreen surfaces and writes them as PNG
+diagrams, without a window. It draws with the same geometry (visual_constants) and cached surfaces (board_surfaces)
+as the interactive Board, optionally with arrows for moves and markers on the squares a piece can legally move to.
+
+Rendering runs under SDL's dummy video driver unless another driver was chosen, so it works on machines without a
+display. Batches are split across a process pool in which every worker builds its cached surfaces once.
+
+Usage (from src): python -m visuals.diagram_renderer INPUT --output-dir DIR [--workers N]
+    INPUT is a file of FEN strings, one per line, or a position file (see engine.position_store), whose best moves are
+    drawn as arrows.
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+from engine.chess_engine import BitBoard
+from engine.moves import NULL_MOVE, move_from, move_to
+from engine.piece_movement import generate_legal_moves
+from engine.square import iter_squares
+from visuals.board_surfaces import square_center, square_rect, render_background, render_piece_glyphs, \
+    render_potential_marker
+from visuals.visual_constants import *
+
+# Diagrams are handed to each worker process this many at a time.
+CHUNK_SIZE = 64
+
+
+class DiagramRenderer:
+
+    def __init__(self):
+        """
+        Initialize pygame without a window and pre-render the board and the pieces.
+        """
+        pygame.display.init()
+        pygame.font.init()
+        self.background = render_background()
+        self.glyphs = render_piece_glyphs(pygame.font.Font(FONT_PATH, FONT_SIZE))
+        self.potential_marker = render_potential_marker()
+        self.surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    def render(self, position, arrows=(), legal_moves_from=None):
+        """
+        Draw a position.
+
+        :param position: a BitBoard object, or a FEN string (see engine.fen).
+        :param arrows: encoded moves (see engine.moves) to draw as arrows, e.g. the best move or the last move played.
+        :param legal_moves_from: optional square whose piece's legal moves are marked.
+        :return: the surface drawn on. It is reused by the next call, so copy it to keep it.
+        """
+        bit_board = BitBoard.from_fen(position) if isinstance(position, str) else position
+        surface = self.surface
+        surface.blit(self.background, (0, 0))
+
+        for piece_class, board in bit_board.items():
+            glyph = self.glyphs[piece_class]
+            for square in iter_squares(board):
+                surface.blit(glyph, square_rect(square))
+
+        if legal_moves_from is not None:
+            for move in generate_legal_moves(bit_board, bit_board.side_to_move):
+                if move_from(move) == legal_moves_from:
+                    surface.blit(self.potential_marker, square_rect(move_to(move)))
+
+        if arrows:
+            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+            for move in arrows:
+                if move != NULL_MOVE:
+                    draw_arrow(overlay, square_center(move_from(move)), square_center(move_to(move)))
+            surface.blit(overlay, (0, 0))
+
+        return surface
+
+    def save(self, position, path, arrows=(), legal_moves_from=None):
+        """
+        Draw a position and write it to an image file.
+
+        :param path: the file to write. The format follows the extension, e.g. '.png'.
+        :return: the path written.
+        """
+        pygame.image.save(self.render(position, arrows, legal_moves_from), path)
+        return path
+
+
+def draw_arrow(surface, start, end, color=ARROW_COLOR):
+    """
+    Draw an arrow from one point to another, its head ending at the end point.
+    :param surface: the surface to draw on.
+    :param start: a 2-Tuple (x,y) of pixel coordinates.
+    :param end: a 2-Tuple (x,y) of pixel coordinates.
+    :param color: an RGB or RGBA color.
+    :return: void
+    """
+    direction = pygame.math.Vector2(end) - pygame.math.Vector2(start)
+    if direction.length() == 0:
+        return
+    direction.scale_to_length(ARROW_HEAD_SIZE)
+    normal = pygame.math.Vector2(-direction.y, direction.x) / 2
+
+    head_base = pygame.math.Vector2(end) - direction
+    pygame.draw.line(surface, color, start, head_base, ARROW_WIDTH)
+    pygame.draw.polygon(surface, color, [end, head_base + normal, head_base - normal])
+
+
+_renderer = None
+
+
+def _render_job(job):
+    # Runs in a worker process, which keeps one renderer (and its cached surfaces) for all of its jobs.
+    global _renderer
+    if _renderer is None:
+        _renderer = DiagramRenderer()
+    position, path, arrows, legal_moves_from = job
+    return _renderer.save(position, path, arrows, legal_moves_from)
+
+
+def render_diagrams(jobs, workers=None, executor=None):
+    """
+    Write many diagrams in parallel.
+
+    :param jobs: an iterable of (position, path, arrows, legal_moves_from) tuples, as taken by DiagramRenderer.save.
+    Positions given as FEN strings are cheaper to send to the workers than BitBoard objects.
+    :param workers: the number of worker processes, os.cpu_count() by default. Ignored if executor is given.
+    :param executor: an existing concurrent.futures executor to render on.
+    :return: the list of paths written, in the order of jobs.
+    """
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    try:
+        return list(executor.map(_render_job, jobs, chunksize=CHUNK_SIZE))
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+
+def render_game(fen, moves, directory, workers=None, executor=None):
+    """
+    Write a diagram of every position of a game, each with an arrow for the move that led to it.
+
+    :param fen: the FEN string of the starting position.
+    :param moves: the game's encoded moves, in order.
+    :param directory: the directory to write 'ply_000.png', 'ply_001.png', ... to.
+    :return: the list of paths written, the starting position first.
+    """
+    os.makedirs(directory, exist_ok=True)
+    bit_board = BitBoard.from_fen(fen)
+    jobs = [(bit_board.to_fen(), os.path.join(directory, 'ply_000.png'), (), None)]
+    for ply, move in enumerate(moves, start=1):
+        bit_board.make_move(move)
+        jobs.append((bit_board.to_fen(), os.path.join(directory, f'ply_{ply:03d}.png'), (move,), None))
+    return render_diagrams(jobs, workers, executor)
+
+
+def _input_jobs(path, directory):
+    # A position file (by its header) gives positions with their best moves, anything else is read as FEN lines.
+    from engine.position_store import MAGIC
+    with open(path, 'rb') as file:
+        is_position_file = file.read(len(MAGIC)) == MAGIC
+
+    if is_position_file:
+        from engine.position_store import read_positions, record_to_bit_board
+        for index, record in enumerate(read_positions(path)):
+            yield (record_to_bit_board(record).to_fen(), os.path.join(directory, f'{index:06d}.png'),
+                   (int(record['best_move']),), None)
+    else:
+        with open(path) as file:
+            fens = [line.strip() for line in file]
+        for index, fen in enumerate(fen for fen in fens if fen and not fen.startswith('#')):
+            yield fen, os.path.join(directory, f'{index:06d}.png'), (), None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Render positions to PNG diagrams without a display.')
+    parser.add_argument('input', help='a file of FEN strings (one per line) or a position file')
+    parser.add_argument('--output-dir', default='diagrams', help='directory to write the diagrams to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    args = parser.parse_args(arguments)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    paths = render_diagrams(_input_jobs(args.input, args.output_dir), args.workers)
+    print(f"wrote {len(paths)} diagrams to {args.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+This file contains the engine opponent of the GUI. Searches run in a worker thread on the player's own ChessEngine,
+never on the game's board, so the window keeps rendering the real position at full FPS while the engine thinks. The
+thread reports back through custom pygame events, which are safe to post from any thread:
+
+    ENGINE_INFO_EVENT   after every completed iteration, with the SearchResult so far (event.result)
+    ENGINE_MOVE_EVENT   when the search ends, with the final SearchResult (event.result)
+
+Both carry the search_id of the search they belong to, so that events of a cancelled search can be ignored. A search
+counts as running (awaiting_move) until its ENGINE_MOVE_EVENT is handed to accept_move, not until its thread ends, so
+a search whose thread has finished but whose move is still queued is never started again.
+"""
+import threading
+import pygame
+from engine.chess_engine import ChessEngine
+from engine.fen import DEFAULT_FEN
+
+ENGINE_INFO_EVENT = pygame.event.custom_type()
+ENGINE_MOVE_EVENT = pygame.event.custom_type()
+
+# Seconds the engine thinks about each move by default.
+DEFAULT_THINKING_TIME = 5.0
+
+
+class EnginePlayer:
+
+    def __init__(self, time_limit=DEFAULT_THINKING_TIME, transposition_table_mb=16):
+        """
+        :param time_limit: the time the engine may think about each move, in seconds.
+        :param transposition_table_mb: memory budget of the engine's transposition table, kept between moves.
+        """
+        self.time_limit = time_limit
+        self._engine = ChessEngine(fen=DEFAULT_FEN, transposition_table_mb=transposition_table_mb)
+        self._thread = None
+        self._stop_event = threading.Event()
+        # Identifies the running search. Events whose search_id differs come from a cancelled search.
+        self.search_id = 0
+        # Whether the running search's ENGINE_MOVE_EVENT has yet to be accepted.
+        self.awaiting_move = False
+
+    @property
+    def thinking(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def accept_move(self, event):
+        """
+        Take the result of the running search from its ENGINE_MOVE_EVENT.
+
+        :param event: an ENGINE_MOVE_EVENT.
+        :return: the SearchResult, or None if the event belongs to a cancelled search.
+        """
+        if not self.awaiting_move or event.search_id != self.search_id:
+            return None
+        self.awaiting_move = False
+        return event.result
+
+    def start(self, game: ChessEngine):
+        """
+        Start thinking about the game's current position in the background. A running search is cancelled first.
+
+        :param game: the ChessEngine holding the game. It is only read here, and not used by the search thread.
+        :return: the search_id of the new search.
+        """
+        self.cancel()
+        self._engine.load_fen(game.bit_board.to_fen())
+        self._engine.key_history.extend(game.key_history)
+
+        self.search_id += 1
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._search, args=(self.search_id, self._stop_event), daemon=True)
+        self.awaiting_move = True
+        self._thread.start()
+        return self.search_id
+
+    def _search(self, search_id, stop_event):
+        def report(result):
+            pygame.event.post(pygame.event.Event(ENGINE_INFO_EVENT, search_id=search_id, result=result))
+
+        result = self._engine.search(time_limit=self.time_limit, info_callback=report, stop_event=stop_event)
+        pygame.event.post(pygame.event.Event(ENGINE_MOVE_EVENT, search_id=search_id, result=result))
+
+    def move_now(self):
+        """
+        Stop thinking and play the best move found so far, which arrives as an ENGINE_MOVE_EVENT.
+
+        :return: void
+        """
+        self._stop_event.set()
+
+    def cancel(self):
+        """
+        Stop thinking without playing. Waits for the search thread to finish, which takes a few milliseconds.
+
+        :return: void
+        """
+        self.awaiting_move = False
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        # Any event the cancelled search already posted is now stale.
+        self.search_id += 1
@@ -1,4 +1,5 @@
-from pygame import Rect, Surface, SRCALPHA
+import os
+from pygame import Rect
 from engine.engine_constants import N_RANKS, N_FILES
 
 # Scale of all UI components, Refresh Rate (30 Hz)
@@ -36,10 +37,22 @@ PIECE_COLOR = (128, 128, 128)
 RED_TEXT = (255, 0, 0)
 BLACK_TEXT = (0, 0, 0)
 POTENTIAL_COLOR = (0, 255, 0, 128)
+ARROW_COLOR = (0, 0, 255, 160)
+
+# Move arrows drawn over diagrams
+ARROW_WIDTH = 8*SCALE
+ARROW_HEAD_SIZE = 20*SCALE
+
+# The font the pieces' characters are written with, found relative to this file so that it loads from any directory
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'res', 'font.ttf')
+FONT_SIZE = 24*SCALE
+
+# The status line below the board, which shows the engine's search
+STATUS_FONT_SIZE = 14*SCALE
+STATUS_RECTANGLE = Rect(0, WINDOW_HEIGHT - 22*SCALE, WINDOW_WIDTH, 22*SCALE)
 
 # Piece properties
 PIECE_RADIUS = SCALE*25
-POTENTIAL_LOCATION_SURF = Surface((2*PIECE_RADIUS, 2*PIECE_RADIUS), SRCALPHA)
 
 # Convert a piece class into its correct text
 PIECE_CLASS_TO_TEXT = {
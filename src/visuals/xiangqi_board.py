@@ -1,24 +1,55 @@
 import pygame
 from engine import piece_movement, engine_util
 from engine.chess_engine import ChessEngine
+from engine.moves import move_from, move_to
+from engine.square import iter_squares, location_to_square
+from engine.ucci import move_to_iccs
 from visuals import visual_utils
+from visuals.board_surfaces import square_rect, render_background, render_piece_glyphs, render_potential_marker
+from visuals.engine_player import EnginePlayer, ENGINE_INFO_EVENT, ENGINE_MOVE_EVENT, DEFAULT_THINKING_TIME
 from visuals.visual_constants import *
 
+CAPTION = "象棋 - XiangQi"
+
 
 class Board(object):
-    def __init__(self, chess_engine: ChessEngine):
+    def __init__(self, chess_engine: ChessEngine, engine_team=None, engine_time_limit=DEFAULT_THINKING_TIME):
+        """
+        :param chess_engine: the ChessEngine holding the game.
+        :param engine_team: the team the engine plays, 'r' or 'b', or None for two human players. While the engine
+        thinks, Space makes it move now, Escape cancels its search (Space starts it again) and Backspace takes back
+        the last human move.
+        :param engine_time_limit: the time the engine thinks about each move, in seconds.
+        """
         self._running = True
         self._display_surf = None
         self._size = WINDOW_WIDTH, WINDOW_HEIGHT
         self._chess_engine = chess_engine
         self._font = None
         self._clock = None
-        self._text_displacement = None
         # whether we are currently moving a piece or not.
         self._piece_selected = False
         self._piece_movement_locations = []
         self._needs_rendering_update = True
 
+        # Surfaces drawn once in on_init: the empty board, one glyph per piece class and the valid move marker.
+        self._background = None
+        self._glyphs = None
+        self._potential_marker = None
+        # What the window currently shows: the piece class on each square (or None) and the marked squares, so that
+        # only the squares that change are redrawn.
+        self._shown_pieces = [None] * (N_RANKS * N_FILES)
+        self._shown_markers = set()
+        self._full_redraw = True
+
+        # The engine opponent, which searches in a worker thread and reports back through pygame events.
+        self._engine_team = engine_team
+        self._engine_player = EnginePlayer(engine_time_limit) if engine_team is not None else None
+        self._engine_paused = False
+        self._status_font = None
+        self._status = ''
+        self._shown_status = None
+
     def on_init(self):
         # Initialize pygame, the visual backend
         pygame.init()
@@ -26,19 +57,21 @@ class Board(object):
 
         # Create the window
         self._display_surf = pygame.display.set_mode(self._size, pygame.HWACCEL | pygame.DOUBLEBUF)
-        pygame.display.set_caption("象棋 - XiangQi")
+        pygame.display.set_caption(CAPTION)
 
         # Initialize a timer to maintain consistent FPS (and to limit CPU usage)
         self._clock = pygame.time.Clock()
 
-        # Load the font for drawing text to the pieces, and determine the optimal text displacement
-        self._font = pygame.font.Font('res/font.ttf', 24*SCALE)
-        temp = self._font.render('车', True, BLACK_TEXT)
-        text_size = temp.get_size()
-        self._text_displacement = (0.5 * text_size[0], 0.5 * text_size[1])
+        # Load the font for drawing text to the pieces
+        self._font = pygame.font.Font(FONT_PATH, FONT_SIZE)
+        self._status_font = pygame.font.Font(FONT_PATH, STATUS_FONT_SIZE)
 
-        # Initialize the green circle that show legal moves
-        pygame.draw.circle(POTENTIAL_LOCATION_SURF, POTENTIAL_COLOR, (PIECE_RADIUS, PIECE_RADIUS), PIECE_RADIUS)
+        # Pre-render the static layers in the display's pixel format, so that blitting them needs no conversion.
+        self._background = render_background().convert()
+        self._glyphs = {piece_class: glyph.convert_alpha() for piece_class, glyph in
+                        render_piece_glyphs(self._font).items()}
+        self._potential_marker = render_potential_marker().convert_alpha()
+        self._full_redraw = True
 
         # Start the game
         self._running = True
@@ -47,25 +80,87 @@ class Board(object):
         if event.type == pygame.QUIT:
             self._running = False
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            self.handle_move_piece(pygame.mouse.get_pos())
+            if not self.engine_to_move():
+                self.handle_move_piece(pygame.mouse.get_pos())
+                self._needs_rendering_update = True
+        elif event.type == pygame.KEYDOWN:
+            self.handle_key(event.key)
+        elif event.type == ENGINE_INFO_EVENT:
+            if event.search_id == self._engine_player.search_id:
+                self.set_search_status(event.result)
+        elif event.type == ENGINE_MOVE_EVENT:
+            result = self._engine_player.accept_move(event)
+            if result is not None and result.best_move:
+                self._chess_engine.make_move(result.best_move)
+                self.set_search_status(result)
+                if not self._chess_engine.generate_moves():
+                    self.set_status('you have no legal move: the engine wins')
+                self._needs_rendering_update = True
+        elif event.type == pygame.VIDEOEXPOSE:
+            self._full_redraw = True
             self._needs_rendering_update = True
 
     def on_loop(self):
-        pass
+        # Start the engine's search when it is its turn. The search runs in the background, so this returns at once. A
+        # search whose move has not been played yet still counts, even if its thread has already ended.
+        if self.engine_to_move() and not self._engine_paused and not self._engine_player.awaiting_move:
+            if self._chess_engine.generate_moves():
+                self._engine_player.start(self._chess_engine)
+                self.set_status('thinking...')
+            else:
+                self.set_status('the engine has no legal move: you win')
+                self._engine_paused = True
 
-    def on_render(self):
-        # render the board and the pieces
-        self.render_board_background()
-        self.render_pieces()
+    def engine_to_move(self):
+        return self._engine_team is not None and self._chess_engine.bit_board.side_to_move == self._engine_team
+
+    def handle_key(self, key):
+        """
+        Control the engine: Space makes it move now (or resumes it), Escape cancels its search and Backspace takes
+        back the last human move, along with the engine's reply.
 
-        if self._piece_selected:
-            self.render_valid_moves()
+        :param key: the pygame key code pressed.
+        :return: void
+        """
+        if self._engine_player is None:
+            return
+
+        if key == pygame.K_SPACE:
+            if self._engine_player.awaiting_move:
+                self._engine_player.move_now()
+            self._engine_paused = False
+        elif key == pygame.K_ESCAPE:
+            self._engine_player.cancel()
+            self._engine_paused = True
+            self.set_status('search cancelled, press space to resume')
+        elif key == pygame.K_BACKSPACE:
+            self._engine_player.cancel()
+            self._chess_engine.unmake_move()
+            if self.engine_to_move():
+                self._chess_engine.unmake_move()
+            # If the engine was to move first, it now waits for Space.
+            self._engine_paused = self.engine_to_move()
+            self._piece_movement_locations = []
+            self._piece_selected = False
+            self.set_status('move taken back')
+            self._needs_rendering_update = True
 
-        # Update the screen and the clock
-        pygame.display.update()
+    def set_status(self, text):
+        self._status = text
+        self._needs_rendering_update = True
+
+    def set_search_status(self, result):
+        pv = ' '.join(move_to_iccs(move) for move in result.pv[:6])
+        self.set_status(f"depth {result.depth}  score {result.score}  {result.nps:.0f} nodes/s  {pv}")
+
+    def on_render(self):
+        # Redraw what changed, and only send those parts of the window to the screen.
+        pygame.display.update(self.render_changes())
         self._needs_rendering_update = False
 
     def on_cleanup(self):
+        if self._engine_player is not None:
+            self._engine_player.cancel()
         pygame.font.quit()
         pygame.quit()
 
@@ -103,7 +198,7 @@ class Board(object):
         def reset():
             self._piece_movement_locations = []
             self._piece_selected = False
-            pygame.display.set_caption("象棋 - XiangQi")
+            pygame.display.set_caption(CAPTION)
 
         # Ensure that the location selected is valid:
         if grid_location != BAD_LOCATION:
@@ -137,106 +232,77 @@ class Board(object):
 
     def move_piece(self, verbose=False):
         # Need an even number of locations to know where we're moving from to where we're moving to.
-        print(self._piece_movement_locations)
         assert (len(self._piece_movement_locations) % 2 == 0)
 
-        success = engine_util.move_piece_by_location(self._chess_engine.bit_board, self._piece_movement_locations[0],
-                                                     self._piece_movement_locations[1])
-
-        if success:
-            if verbose:
-                print("Moved piece: ", self._piece_movement_locations)
-            # Clean the piece locations to maintain memory
-            return True
+        # Play the move through the ChessEngine, so that it can be taken back, if it is legal for the side to move.
+        from_square = location_to_square(self._piece_movement_locations[0])
+        to_square = location_to_square(self._piece_movement_locations[1])
+        for move in self._chess_engine.generate_moves():
+            if move_from(move) == from_square and move_to(move) == to_square:
+                self._chess_engine.make_move(move)
+                if verbose:
+                    print("Moved piece: ", self._piece_movement_locations)
+                return True
 
         return False
 
-    def render_valid_moves(self):
-        # Obtain the location of the piece we're moving
-        location = self._piece_movement_locations[0]
+    def valid_move_squares(self):
+        """
+        :return: the set of squares the selected piece can move to (empty if no piece is selected).
+        """
+        if not self._piece_selected:
+            return set()
 
-        # obtain the piece class:
+        # Obtain the location and the class of the piece we're moving
+        location = self._piece_movement_locations[0]
         piece_class = engine_util.piece_class_by_location(self._chess_engine.bit_board, location)
 
-        # Find the correct set of valid moves
-        valid_moves = engine_util.bitboard_to_locations(
+        return set(iter_squares(
             piece_movement.return_valid_moves_by_type_and_location(self._chess_engine.bit_board, piece_class, location)
-        )
-
-        # Render green circles at all valid locations
-        self.render_piece_class('potential', valid_moves)
-
-    def render_piece_class(self, piece_class, locations):
-        if piece_class != 'potential':
-            text, team = PIECE_CLASS_TO_TEXT[piece_class]
-            text_image = self._font.render(text, True, RED_TEXT if team is 'r' else BLACK_TEXT)
+        ))
 
-        # print("Piece type:", piece_class, "has moves: ")
+    def render_changes(self):
+        """
+        Bring the window up to date with the board: each square whose piece or valid move marker changed is restored
+        from the cached background and its glyphs are blitted again.
 
-        for location in locations:
-            # print(location)
-            if piece_class != 'potential':
-                x = (location % N_FILES) * HORIZONTAL_TILE_SIZE + HORIZONTAL_PADDING
-                y = int(location / N_FILES) * VERTICAL_TILE_SIZE + VERTICAL_PADDING
-                pygame.draw.circle(self._display_surf, center=(x, y), color=PIECE_COLOR, radius=PIECE_RADIUS)
-                self._display_surf.blit(text_image, (x - self._text_displacement[0], y - self._text_displacement[1]))
-            else:
-                # If we're not rendering a piece, we're rendering potential locations for a piece.
-                x = location[0] * HORIZONTAL_TILE_SIZE + HORIZONTAL_PADDING - PIECE_RADIUS
-                y = location[1] * VERTICAL_TILE_SIZE + VERTICAL_PADDING - PIECE_RADIUS
-                self._display_surf.blit(POTENTIAL_LOCATION_SURF, (x, y))
-
-    def render_pieces(self):
-        # Obtain the location of every piece from its bit board and render it.
-        locations = self._chess_engine.bit_board.get_locations_by_piece_class()
-        for k, v in locations.items():
-            # v is a tuple in the form (important,), so v[0] obtains the important information.
-            self.render_piece_class(k, v[0])
-
-    def render_board_background(self):
-        # begin by cleaning the board
-        self._display_surf.fill(BACKGROUND_COLOR)
-
-        # Draw the game's boarder (with rounded corners)
-        pygame.draw.rect(self._display_surf, LINE_COLOR, GAME_BOARD_RECTANGLE, OUTER_LINE_THICKNESS,
-                         border_radius=OUTER_LINE_THICKNESS)
-
-        # Draw the ranks (left-right lines)
-        for i in range(1, (N_RANKS - 1)):
-            pygame.draw.line(self._display_surf, LINE_COLOR,
-                             (HORIZONTAL_PADDING, VERTICAL_PADDING + i * VERTICAL_TILE_SIZE),
-                             (WINDOW_WIDTH - HORIZONTAL_PADDING - 10, VERTICAL_PADDING + i * VERTICAL_TILE_SIZE),
-                             INNER_LINE_THICKNESS)
-
-        # Draw the files (top-down lines, with a river in rank 5).
-        for i in range(1, (N_FILES - 1)):
-            # portion of line above the river
-            pygame.draw.line(self._display_surf, LINE_COLOR,
-                             (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, VERTICAL_PADDING),
-                             (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, VERTICAL_PADDING + 4 * VERTICAL_TILE_SIZE),
-                             INNER_LINE_THICKNESS)
-            # portion of line below the river
-            pygame.draw.line(self._display_surf, LINE_COLOR,
-                             (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, VERTICAL_PADDING + 5 * VERTICAL_TILE_SIZE),
-                             (HORIZONTAL_PADDING + i * HORIZONTAL_TILE_SIZE, WINDOW_HEIGHT - VERTICAL_PADDING - 10),
-                             INNER_LINE_THICKNESS)
-
-        # Draw in the diagonal lines for advisers
-        # Top
-        pygame.draw.line(self._display_surf, LINE_COLOR, (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE, BOARD_TOP),
-                         (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP + 2 * VERTICAL_TILE_SIZE),
-                         INNER_LINE_THICKNESS)
-        pygame.draw.line(self._display_surf, LINE_COLOR,
-                         (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE, BOARD_TOP + 2 * VERTICAL_TILE_SIZE),
-                         (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP),
-                         INNER_LINE_THICKNESS)
-
-        # Bottom
-        pygame.draw.line(self._display_surf, LINE_COLOR,
-                         (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE - 4, BOARD_TOP + BOARD_HEIGHT),
-                         (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP + BOARD_HEIGHT - 2 * VERTICAL_TILE_SIZE),
-                         INNER_LINE_THICKNESS)
-        pygame.draw.line(self._display_surf, LINE_COLOR,
-                         (BOARD_LEFT + 3 * HORIZONTAL_TILE_SIZE, BOARD_TOP + BOARD_HEIGHT - 2 * VERTICAL_TILE_SIZE),
-                         (BOARD_LEFT + 5 * HORIZONTAL_TILE_SIZE, BOARD_TOP + BOARD_HEIGHT - 4),
-                         INNER_LINE_THICKNESS)
+        :return: the list of pygame.Rect areas of the window that changed.
+        """
+        pieces = [None] * (N_RANKS * N_FILES)
+        for piece_class, bit_board in self._chess_engine.bit_board.items():
+            for square in iter_squares(bit_board):
+                pieces[square] = piece_class
+        markers = self.valid_move_squares()
+
+        if self._full_redraw:
+            self._display_surf.blit(self._background, (0, 0))
+            changed = [square for square in range(len(pieces)) if pieces[square] or square in markers]
+        else:
+            changed = [square for square in range(len(pieces))
+                       if pieces[square] != self._shown_pieces[square] or
+                       (square in markers) != (square in self._shown_markers)]
+
+        dirty_rects = []
+        for square in changed:
+            rect = square_rect(square)
+            if not self._full_redraw:
+                self._display_surf.blit(self._background, rect, rect)
+            if pieces[square] is not None:
+                self._display_surf.blit(self._glyphs[pieces[square]], rect)
+            if square in markers:
+                self._display_surf.blit(self._potential_marker, rect)
+            dirty_rects.append(rect)
+
+        if self._status != self._shown_status or self._full_redraw:
+            self._display_surf.blit(self._background, STATUS_RECTANGLE, STATUS_RECTANGLE)
+            text_image = self._status_font.render(self._status, True, LINE_COLOR)
+            self._display_surf.blit(text_image, text_image.get_rect(midleft=STATUS_RECTANGLE.midleft).move(10, 0))
+            self._shown_status = self._status
+            dirty_rects.append(STATUS_RECTANGLE)
+
+        if self._full_redraw:
+            dirty_rects = [self._display_surf.get_rect()]
+            self._full_redraw = False
+        self._shown_pieces = pieces
+        self._shown_markers = markers
+        return dirty_rects
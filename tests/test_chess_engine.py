@@ -0,0 +1,181 @@
+import random
+import unittest
+from engine import engine_util
+from engine.chess_engine import BitBoard, ChessEngine
+from engine.engine_constants import RED_PIECE_CLASSES, BLACK_PIECE_CLASSES, PIECE_CODES, NO_PIECE
+from engine.moves import encode_move
+from engine.zobrist import compute_zobrist_key
+from engine.square import SQUARE_MASKS, location_to_square
+
+
+class TestBitBoardOccupancy(unittest.TestCase):
+
+    def setUp(self):
+        BitBoard.CHECK_CONSISTENCY = True
+        self.bit_boards = BitBoard()
+
+    def tearDown(self):
+        BitBoard.CHECK_CONSISTENCY = False
+
+    def test_initial_occupancy(self):
+        self.bit_boards.check_consistency()
+        self.assertEqual(16, bin(self.bit_boards.red_occupancy).count('1'))
+        self.assertEqual(16, bin(self.bit_boards.black_occupancy).count('1'))
+        self.assertEqual(0, self.bit_boards.red_occupancy & self.bit_boards.black_occupancy)
+
+    def test_setitem_updates_occupancy(self):
+        pawn_square = location_to_square((0, 3))
+        self.bit_boards['p'] = (self.bit_boards['p'] & ~SQUARE_MASKS[pawn_square]) | SQUARE_MASKS[pawn_square + 9]
+        self.assertEqual(0, self.bit_boards.black_occupancy & SQUARE_MASKS[pawn_square])
+        self.assertNotEqual(0, self.bit_boards.occupancy & SQUARE_MASKS[pawn_square + 9])
+
+    def test_capture_updates_both_teams(self):
+        # Walk a black pawn forward until it captures the red pawn at (0, 6).
+        self.assertTrue(engine_util.move_piece_by_location(self.bit_boards, (0, 3), (0, 4)))
+        self.assertTrue(engine_util.move_piece_by_location(self.bit_boards, (0, 4), (0, 5)))
+        self.assertTrue(engine_util.move_piece_by_location(self.bit_boards, (0, 5), (0, 6)))
+
+        captured = SQUARE_MASKS[location_to_square((0, 6))]
+        self.assertEqual(0, self.bit_boards['P'] & captured)
+        self.assertEqual(0, self.bit_boards.red_occupancy & captured)
+        self.assertNotEqual(0, self.bit_boards.black_occupancy & captured)
+        self.assertEqual(15, bin(self.bit_boards.red_occupancy).count('1'))
+
+    def test_inconsistency_is_detected(self):
+        self.bit_boards.boards[PIECE_CODES['r']] |= self.bit_boards['R']
+        with self.assertRaises(AssertionError):
+            self.bit_boards.check_consistency()
+
+    def test_mailbox(self):
+        self.assertEqual(PIECE_CODES['R'], self.bit_boards.piece_at(location_to_square((0, 9))))
+        self.assertEqual(NO_PIECE, self.bit_boards.piece_at(location_to_square((0, 4))))
+        self.assertEqual('c', self.bit_boards.get_class_by_location((1, 2)))
+
+        # Setting a board moves the piece in the mailbox, and a copy keeps its own mailbox.
+        copy = self.bit_boards.copy()
+        self.bit_boards['p'] ^= SQUARE_MASKS[location_to_square((0, 3))] | SQUARE_MASKS[location_to_square((0, 4))]
+        self.assertEqual(PIECE_CODES['p'], self.bit_boards.piece_at(location_to_square((0, 4))))
+        self.assertEqual(NO_PIECE, copy.piece_at(location_to_square((0, 4))))
+        copy.check_consistency()
+
+        self.bit_boards.mailbox[location_to_square((4, 4))] = PIECE_CODES['P']
+        with self.assertRaises(AssertionError):
+            self.bit_boards.check_consistency()
+
+    def test_team_occupancy(self):
+        red = 0
+        for key in RED_PIECE_CLASSES:
+            red |= self.bit_boards[key]
+        black = 0
+        for key in BLACK_PIECE_CLASSES:
+            black |= self.bit_boards[key]
+        self.assertEqual(red, self.bit_boards.team_occupancy('r'))
+        self.assertEqual(black, self.bit_boards.team_occupancy('b'))
+
+
+def snapshot(bit_boards):
+    return (dict(bit_boards.bit_boards), bit_boards.red_occupancy, bit_boards.black_occupancy, bit_boards.occupancy,
+            bit_boards.side_to_move, list(bit_boards.mailbox))
+
+
+class TestMakeUnmake(unittest.TestCase):
+
+    def setUp(self):
+        BitBoard.CHECK_CONSISTENCY = True
+        self.engine = ChessEngine()
+
+    def tearDown(self):
+        BitBoard.CHECK_CONSISTENCY = False
+
+    def test_make_unmake_restores_position(self):
+        initial = snapshot(self.engine.bit_board)
+
+        for move in self.engine.generate_moves():
+            self.engine.make_move(move)
+            self.assertEqual('b', self.engine.bit_board.side_to_move)
+            after_first = snapshot(self.engine.bit_board)
+
+            for reply in self.engine.generate_moves():
+                self.engine.make_move(reply)
+                self.engine.unmake_move()
+                self.assertEqual(after_first, snapshot(self.engine.bit_board))
+
+            self.assertEqual(move, self.engine.unmake_move())
+            self.assertEqual(initial, snapshot(self.engine.bit_board))
+
+    def test_capture_is_recorded_and_restored(self):
+        # The red cannon at (1, 7) can capture the black horse at (1, 0) by jumping the black cannon.
+        capture = encode_move(location_to_square((1, 7)), location_to_square((1, 0)), PIECE_CODES['C'], PIECE_CODES['h'])
+        self.assertIn(capture, self.engine.generate_moves())
+
+        initial = snapshot(self.engine.bit_board)
+        self.engine.make_move(capture)
+        self.assertEqual(0, self.engine.bit_board['h'] & SQUARE_MASKS[location_to_square((1, 0))])
+        self.assertEqual(15, bin(self.engine.bit_board.black_occupancy).count('1'))
+
+        self.engine.unmake_move()
+        self.assertEqual(initial, snapshot(self.engine.bit_board))
+
+    def test_unmake_without_moves(self):
+        self.assertIsNone(self.engine.unmake_move())
+
+
+class TestZobrist(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ChessEngine()
+
+    def test_initial_key_matches_recompute(self):
+        self.assertEqual(compute_zobrist_key(self.engine.bit_board), self.engine.bit_board.zobrist_key)
+        self.assertNotEqual(0, self.engine.bit_board.zobrist_key)
+
+    def test_incremental_key_matches_recompute(self):
+        rng = random.Random(7)
+        keys = [self.engine.bit_board.zobrist_key]
+
+        for _ in range(40):
+            moves = self.engine.generate_moves()
+            self.engine.make_move(rng.choice(moves))
+            self.assertEqual(compute_zobrist_key(self.engine.bit_board), self.engine.bit_board.zobrist_key)
+            keys.append(self.engine.bit_board.zobrist_key)
+
+        # Taking the moves back retraces the same keys.
+        while self.engine.move_stack:
+            keys.pop()
+            self.engine.unmake_move()
+            self.assertEqual(keys[-1], self.engine.bit_board.zobrist_key)
+
+    def test_transpositions_share_a_key(self):
+        bit_boards = self.engine.bit_board
+        left_horse = encode_move(location_to_square((1, 9)), location_to_square((2, 7)), PIECE_CODES['H'])
+        right_horse = encode_move(location_to_square((7, 9)), location_to_square((6, 7)), PIECE_CODES['H'])
+        black_pawn = encode_move(location_to_square((0, 3)), location_to_square((0, 4)), PIECE_CODES['p'])
+        black_pawn_2 = encode_move(location_to_square((8, 3)), location_to_square((8, 4)), PIECE_CODES['p'])
+
+        for move in (left_horse, black_pawn, right_horse, black_pawn_2):
+            self.engine.make_move(move)
+        first_key = bit_boards.zobrist_key
+
+        for _ in range(4):
+            self.engine.unmake_move()
+        for move in (right_horse, black_pawn_2, left_horse, black_pawn):
+            self.engine.make_move(move)
+
+        self.assertEqual(first_key, bit_boards.zobrist_key)
+
+    def test_side_to_move_changes_key(self):
+        bit_boards = self.engine.bit_board
+        pawn_squares = SQUARE_MASKS[location_to_square((0, 3))] | SQUARE_MASKS[location_to_square((0, 4))]
+
+        # Red horse out, black pawn forward, red horse back: black is to move.
+        self.engine.make_move(encode_move(location_to_square((1, 9)), location_to_square((2, 7)), PIECE_CODES['H']))
+        self.engine.make_move(encode_move(location_to_square((0, 3)), location_to_square((0, 4)), PIECE_CODES['p']))
+        self.engine.make_move(encode_move(location_to_square((2, 7)), location_to_square((1, 9)), PIECE_CODES['H']))
+        black_to_move_key = bit_boards.zobrist_key
+
+        # The same pieces with red to move.
+        red_to_move = BitBoard()
+        red_to_move['p'] ^= pawn_squares
+        self.assertEqual(bit_boards.bit_boards, red_to_move.bit_boards)
+        self.assertNotEqual(black_to_move_key, red_to_move.zobrist_key)
+        self.assertEqual(compute_zobrist_key(bit_boards), black_to_move_key)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+from engine.chess_engine import ChessEngine
+from engine.fen import DEFAULT_FEN
+from visuals.diagram_renderer import DiagramRenderer, render_game
+from visuals.board_surfaces import square_center
+from visuals.visual_constants import BACKGROUND_COLOR, PIECE_COLOR
+
+
+class TestDiagramRenderer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.renderer = DiagramRenderer()
+
+    def pixel(self, surface, point):
+        return tuple(surface.get_at(point))[:3]
+
+    def test_pieces_and_legal_moves(self):
+        surface = self.renderer.render(DEFAULT_FEN, legal_moves_from=7 * 9 + 7)
+        # The edge of the red chariot's disc, and an empty point off the lines.
+        x, y = square_center(9 * 9)
+        self.assertEqual(PIECE_COLOR, self.pixel(surface, (x - 20, y)))
+        x, y = square_center(4 * 9 + 1)
+        self.assertEqual(BACKGROUND_COLOR, self.pixel(surface, (x + 20, y + 20)))
+
+        # The red cannon can move to (7, 4), which is marked, but not to (6, 4).
+        x, y = square_center(4 * 9 + 7)
+        self.assertNotEqual(BACKGROUND_COLOR, self.pixel(surface, (x + 20, y + 10)))
+        x, y = square_center(4 * 9 + 6)
+        self.assertEqual(BACKGROUND_COLOR, self.pixel(surface, (x + 20, y + 10)))
+
+    def test_save_and_render_game(self):
+        engine = ChessEngine(fen=DEFAULT_FEN)
+        moves = []
+        for _ in range(3):
+            moves.append(engine.generate_moves()[0])
+            engine.make_move(moves[-1])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.renderer.save(DEFAULT_FEN, os.path.join(directory, 'start.png'), arrows=moves[:1])
+            self.assertEqual((800, 800), pygame.image.load(path).get_size())
+
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                paths = render_game(DEFAULT_FEN, moves, os.path.join(directory, 'game'), executor=executor)
+            self.assertEqual(['ply_000.png', 'ply_001.png', 'ply_002.png', 'ply_003.png'],
+                             [os.path.basename(path) for path in paths])
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import time
+import unittest
+import pygame
+from engine.chess_engine import ChessEngine
+from engine.ucci import move_to_iccs
+from visuals.engine_player import EnginePlayer, ENGINE_INFO_EVENT, ENGINE_MOVE_EVENT
+
+
+class TestEnginePlayer(unittest.TestCase):
+
+    def setUp(self):
+        pygame.display.init()
+        pygame.event.clear()
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def wait_for_event(self, event_type, timeout=10):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for event in pygame.event.get(event_type):
+                return event
+            time.sleep(0.01)
+        raise AssertionError(f"no event of type {event_type}")
+
+    def test_posts_search_info_and_move(self):
+        game = ChessEngine(fen='3k5/R8/8R/9/9/9/9/9/9/4K4 w')
+        player = EnginePlayer(time_limit=0.5)
+        search_id = player.start(game)
+
+        info = self.wait_for_event(ENGINE_INFO_EVENT)
+        self.assertEqual(search_id, info.search_id)
+        # The thread ends as soon as it has posted its move, but the search is running until the move is accepted.
+        player._thread.join()
+        self.assertFalse(player.thinking)
+        self.assertTrue(player.awaiting_move)
+        move = self.wait_for_event(ENGINE_MOVE_EVENT)
+        self.assertEqual(search_id, move.search_id)
+        self.assertEqual('i7i9', move_to_iccs(player.accept_move(move).best_move))
+        self.assertFalse(player.awaiting_move)
+        self.assertIsNone(player.accept_move(move))
+        # The search ran on the player's own engine: the game is untouched.
+        self.assertEqual(0, len(game.move_stack))
+
+    def test_move_now_and_cancel(self):
+        game = ChessEngine(fen='rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w')
+        player = EnginePlayer(time_limit=60)
+        search_id = player.start(game)
+        time.sleep(0.2)
+        self.assertTrue(player.thinking)
+        player.move_now()
+        move = self.wait_for_event(ENGINE_MOVE_EVENT, timeout=2)
+        self.assertEqual(search_id, move.search_id)
+        self.assertIn(move.result.best_move, game.generate_moves())
+
+        player.start(game)
+        time.sleep(0.1)
+        player.cancel()
+        self.assertFalse(player.thinking)
+        self.assertFalse(player.awaiting_move)
+        # Whatever the cancelled search posted is recognisably stale.
+        for event in pygame.event.get(ENGINE_MOVE_EVENT):
+            self.assertNotEqual(player.search_id, event.search_id)
+            self.assertIsNone(player.accept_move(event))
+
+
+if __name__ == '__main__':
+    unittest.main()
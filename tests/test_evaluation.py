@@ -0,0 +1,67 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from engine.chess_engine import BitBoard
+from engine.engine_constants import N_FILES, N_RANKS, PIECE_CODES
+from engine.evaluation import PIECE_SQUARE_VALUES, MATERIAL_VALUES, compute_score, load_evaluation
+from engine.piece_movement import generate_moves
+from engine.square import SQUARE_MASKS, location_to_square
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_initial_position_is_balanced(self):
+        self.assertEqual(0, BitBoard(verbose=False).score)
+
+    def test_black_tables_mirror_red(self):
+        for piece_type in MATERIAL_VALUES:
+            red_values = PIECE_SQUARE_VALUES[PIECE_CODES[piece_type.upper()]]
+            black_values = PIECE_SQUARE_VALUES[PIECE_CODES[piece_type]]
+            for y in range(N_RANKS):
+                for x in range(N_FILES):
+                    self.assertEqual(red_values[location_to_square((x, y))],
+                                     -black_values[location_to_square((x, N_RANKS - 1 - y))])
+
+    def test_setitem_updates_score(self):
+        bit_boards = BitBoard(verbose=False)
+        bit_boards['P'] |= SQUARE_MASKS[location_to_square((1, 4))]
+        self.assertEqual(PIECE_SQUARE_VALUES[PIECE_CODES['P']][location_to_square((1, 4))], bit_boards.score)
+        self.assertEqual(compute_score(bit_boards), bit_boards.score)
+
+    def test_no_drift_over_random_games(self):
+        rng = random.Random(11)
+        for _ in range(5):
+            bit_boards = BitBoard(verbose=False)
+            played = []
+            for _ in range(80):
+                moves = generate_moves(bit_boards, bit_boards.side_to_move)
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                bit_boards.make_move(move)
+                played.append(move)
+                self.assertEqual(compute_score(bit_boards), bit_boards.score)
+                if not bit_boards['g'] or not bit_boards['G']:
+                    break
+
+            for move in reversed(played):
+                bit_boards.unmake_move(move)
+            self.assertEqual(0, bit_boards.score)
+
+    def test_load_rejects_malformed_tables(self):
+        material, _ = load_evaluation()
+        tables = {piece_type: [[0] * N_FILES for _ in range(N_RANKS)] for piece_type in material}
+        tables['p'] = tables['p'][:-1]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tables.json')
+            with open(path, 'w') as file:
+                json.dump({'material': material, 'piece_square_tables': tables}, file)
+            with self.assertRaises(ValueError):
+                load_evaluation(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
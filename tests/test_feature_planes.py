@@ -0,0 +1,68 @@
+import random
+import unittest
+import numpy as np
+from engine.chess_engine import BitBoard
+from engine.engine_constants import PIECE_CLASSES
+from engine.feature_planes import encode_planes, decode_planes, pack_bit_boards, unpack_bit_boards, \
+    planes_to_bit_boards
+from engine.piece_movement import generate_moves
+from engine.square import iter_locations
+
+
+def random_positions(n_positions, seed=13):
+    rng = random.Random(seed)
+    positions = []
+    bit_board = BitBoard(verbose=False)
+    for _ in range(n_positions):
+        moves = generate_moves(bit_board, bit_board.side_to_move)
+        if not moves or not bit_board['g'] or not bit_board['G']:
+            bit_board = BitBoard(verbose=False)
+            continue
+        bit_board.make_move(rng.choice(moves))
+        positions.append([bit_board[piece_class] for piece_class in PIECE_CLASSES])
+    return positions
+
+
+class TestFeaturePlanes(unittest.TestCase):
+
+    def test_planes_match_piece_locations(self):
+        bit_board = BitBoard(verbose=False)
+        planes = encode_planes([bit_board])
+
+        self.assertEqual((1, 14, 10, 9), planes.shape)
+        self.assertEqual(np.uint8, planes.dtype)
+        for index, piece_class in enumerate(PIECE_CLASSES):
+            expected = np.zeros((10, 9), dtype=np.uint8)
+            for x, y in iter_locations(bit_board[piece_class]):
+                expected[y][x] = 1
+            np.testing.assert_array_equal(expected, planes[0][index])
+
+    def test_round_trip(self):
+        positions = random_positions(300)
+        packed = pack_bit_boards(positions)
+
+        self.assertEqual(positions, unpack_bit_boards(decode_planes(encode_planes(packed))))
+
+    def test_fills_preallocated_float_array(self):
+        positions = random_positions(50)
+        out = np.full((50, 14, 10, 9), -1.0, dtype=np.float32)
+
+        self.assertIs(out, encode_planes(positions, out=out))
+        np.testing.assert_array_equal(encode_planes(positions).astype(np.float32), out)
+
+    def test_planes_to_bit_boards(self):
+        bit_board = BitBoard(verbose=False)
+        decoded = planes_to_bit_boards(encode_planes([bit_board]), sides_to_move=['b'])[0]
+        bit_board.set_side_to_move('b')
+
+        self.assertEqual(bit_board.bit_boards, decoded.bit_boards)
+        self.assertEqual(bit_board.zobrist_key, decoded.zobrist_key)
+        self.assertEqual(bit_board.score, decoded.score)
+
+    def test_rejects_wrong_board_count(self):
+        with self.assertRaises(ValueError):
+            pack_bit_boards([[0] * 13])
+
+
+if __name__ == '__main__':
+    unittest.main()
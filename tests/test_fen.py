@@ -0,0 +1,55 @@
+import unittest
+from engine.chess_engine import BitBoard, ChessEngine
+from engine.fen import DEFAULT_FEN, parse_fen
+from engine.perft import REFERENCE_POSITIONS, reference_bit_board
+
+
+class TestFen(unittest.TestCase):
+
+    def test_default_position(self):
+        from_fen = BitBoard.from_fen(DEFAULT_FEN)
+        default = BitBoard(verbose=False)
+
+        self.assertEqual(default.bit_boards, from_fen.bit_boards)
+        self.assertEqual(default.zobrist_key, from_fen.zobrist_key)
+        self.assertEqual(default.score, from_fen.score)
+        self.assertEqual(DEFAULT_FEN, default.to_fen())
+
+    def test_round_trip_reference_positions(self):
+        for name in REFERENCE_POSITIONS:
+            bit_board = reference_bit_board(name)
+            from_fen = BitBoard.from_fen(bit_board.to_fen())
+
+            self.assertEqual(bit_board.bit_boards, from_fen.bit_boards)
+            self.assertEqual(bit_board.side_to_move, from_fen.side_to_move)
+            self.assertEqual(bit_board.zobrist_key, from_fen.zobrist_key)
+            from_fen.check_consistency()
+
+    def test_engine_letters_and_optional_fields(self):
+        bit_boards, side_to_move, halfmove_clock, fullmove_number = parse_fen('3g5/9/9/9/9/9/9/4E4/9/4G4 b')
+
+        self.assertEqual('b', side_to_move)
+        self.assertEqual((0, 1), (halfmove_clock, fullmove_number))
+        self.assertEqual('3k5/9/9/9/9/9/9/4B4/9/4K4 b - - 0 1',
+                         BitBoard.from_fen('3g5/9/9/9/9/9/9/4E4/9/4G4 b').to_fen())
+
+    def test_invalid_fen(self):
+        for fen in ('', 'rnbakabnr/9 w', 'rnbakabnrr/9/9/9/9/9/9/9/9/9 w', '9/9/9/9/9/9/9/9/9/8x w',
+                    DEFAULT_FEN.replace(' w ', ' x '), DEFAULT_FEN.replace(' 0 1', ' a b')):
+            with self.assertRaises(ValueError, msg=fen):
+                parse_fen(fen)
+
+    def test_engine_move_counters(self):
+        engine = ChessEngine(fen=DEFAULT_FEN)
+        for _ in range(2):
+            engine.make_move(engine.generate_moves()[0])
+        self.assertTrue(engine.bit_board.to_fen().endswith(' w - - 2 2'))
+
+        engine.unmake_move()
+        self.assertTrue(engine.bit_board.to_fen().endswith(' b - - 1 1'))
+        engine.unmake_move()
+        self.assertEqual(DEFAULT_FEN, engine.bit_board.to_fen())
+
+
+if __name__ == '__main__':
+    unittest.main()
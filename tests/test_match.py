@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from engine.fen import DEFAULT_FEN
+from engine.match import EngineSettings, SPRTParameters, play_game, run_match, load_openings, elo_difference, \
+    sprt_llr, sprt_bounds, sprt_decision, parse_engine_settings
+
+MATE_IN_ONE_FEN = '3k5/R8/8R/9/9/9/9/9/9/4K4 w'
+
+
+class TestMatch(unittest.TestCase):
+
+    def test_play_game_to_checkmate(self):
+        settings = EngineSettings('one', depth=1, transposition_table_mb=1)
+        record = play_game((7, MATE_IN_ONE_FEN, settings, settings, 10, 10))
+
+        self.assertEqual((7, '1-0', 'checkmate', 1), (record['game_id'], record['result'], record['reason'],
+                                                       record['plies']))
+        self.assertEqual(1, len(record['moves']))
+        self.assertEqual(0, record['nodes']['black'])
+
+    def test_play_game_move_limit(self):
+        settings = EngineSettings('one', depth=1, transposition_table_mb=1)
+        record = play_game((0, DEFAULT_FEN, settings, settings, 4, 120))
+        self.assertEqual(('1/2-1/2', 'move limit', 4), (record['result'], record['reason'], record['plies']))
+
+    def test_run_match_streams_records(self):
+        first = EngineSettings('first', depth=1, transposition_table_mb=1)
+        second = EngineSettings('second', node_limit=50, transposition_table_mb=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'match.jsonl')
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                result = run_match(first, second, 4, [DEFAULT_FEN, MATE_IN_ONE_FEN], output=path, max_plies=6,
+                                   executor=executor)
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+
+        self.assertEqual(4, result.games)
+        self.assertEqual(4, result.wins + result.draws + result.losses)
+        self.assertEqual([0, 1, 2, 3], sorted(record['game_id'] for record in records))
+        for record in records:
+            self.assertEqual(('first', 'second') if record['game_id'] % 2 == 0 else ('second', 'first'),
+                             (record['red'], record['black']))
+        # Both games from the mate in one position are won by whoever plays red.
+        mates = [record for record in records if record['fen'] == MATE_IN_ONE_FEN]
+        self.assertEqual(['1-0', '1-0'], [record['result'] for record in mates])
+        self.assertEqual(4, records[-1]['match']['wins'] + records[-1]['match']['draws'] +
+                         records[-1]['match']['losses'])
+
+    def test_sprt(self):
+        lower, upper = sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(-upper, lower)
+        self.assertAlmostEqual(2.944, upper, places=3)
+
+        self.assertEqual(0.0, sprt_llr(0, 10, 0, 0, 10))
+        self.assertGreater(sprt_llr(60, 20, 20, 0, 10), 0)
+        self.assertLess(sprt_llr(20, 20, 60, 0, 10), 0)
+
+        sprt = SPRTParameters(0, 10)
+        self.assertEqual('H1', sprt_decision(sprt_llr(600, 200, 200, 0, 10), sprt))
+        self.assertEqual('H0', sprt_decision(sprt_llr(200, 200, 600, 0, 10), sprt))
+        self.assertIsNone(sprt_decision(sprt_llr(11, 10, 9, 0, 10), sprt))
+
+    def test_elo_difference(self):
+        self.assertAlmostEqual(0.0, elo_difference(10, 5, 10))
+        self.assertAlmostEqual(190.85, elo_difference(75, 0, 25), places=2)
+        self.assertIsNone(elo_difference(3, 0, 0))
+        self.assertIsNone(elo_difference(0, 0, 0))
+
+    def test_load_openings_and_settings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openings.txt')
+            with open(path, 'w') as file:
+                file.write(f"# suite\n{DEFAULT_FEN}\n\n{MATE_IN_ONE_FEN}\n")
+            self.assertEqual([DEFAULT_FEN, MATE_IN_ONE_FEN], load_openings(path))
+
+        self.assertEqual(EngineSettings('fast', depth=3, time_limit=0.5),
+                         parse_engine_settings('name=fast,depth=3,time=0.5'))
+        with self.assertRaises(ValueError):
+            parse_engine_settings('depth=3,speed=9')
+
+
+if __name__ == '__main__':
+    unittest.main()
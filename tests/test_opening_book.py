@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from engine.chess_engine import BitBoard, ChessEngine
+from engine.opening_book import OpeningBook, BookBuilder
+from engine.piece_movement import generate_legal_moves
+from engine.position_store import PositionWriter, read_positions
+
+
+def first_moves(n_plies, choice=0):
+    # A game that always plays the choice-th legal move.
+    bit_board = BitBoard(verbose=False)
+    moves = []
+    for _ in range(n_plies):
+        move = generate_legal_moves(bit_board, bit_board.side_to_move)[choice]
+        bit_board.make_move(move)
+        moves.append(move)
+    return moves
+
+
+class TestOpeningBook(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'book.xqb')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_build_and_probe(self):
+        builder = BookBuilder(max_ply=4)
+        for _ in range(3):
+            builder.add_game(first_moves(6, 0))
+        builder.add_game(first_moves(6, 1))
+        self.assertEqual(8, builder.write(self.path))
+
+        book = OpeningBook(self.path, seed=1)
+        start = BitBoard(verbose=False)
+        self.assertEqual([(first_moves(1, 0)[0], 3), (first_moves(1, 1)[0], 1)], book.moves(start))
+        self.assertEqual(list(book.keys), sorted(book.keys))
+        self.assertEqual([], book.moves(start.zobrist_key ^ 1))
+
+    def test_pruning(self):
+        builder = BookBuilder(max_ply=2)
+        for _ in range(2):
+            builder.add_game(first_moves(2, 0))
+        builder.add_game(first_moves(2, 1))
+        builder.add_game(first_moves(2, 2))
+        self.assertEqual(2, builder.write(self.path, min_count=2))
+
+        builder.write(self.path, max_moves=1)
+        self.assertEqual(1, len(OpeningBook(self.path).moves(BitBoard(verbose=False))))
+
+    def test_build_from_position_records(self):
+        records_path = os.path.join(self.directory.name, 'games.xqp')
+        with PositionWriter(records_path) as writer:
+            bit_board = BitBoard(verbose=False)
+            for ply, move in enumerate(first_moves(4, 2)):
+                writer.append(bit_board, best_move=move, ply=ply)
+                bit_board.make_move(move)
+
+        builder = BookBuilder(max_ply=3)
+        builder.add_records(read_positions(records_path))
+        self.assertEqual(3, builder.write(self.path))
+
+    def test_engine_plays_book_move(self):
+        builder = BookBuilder()
+        builder.add_game(first_moves(2, 5))
+        builder.write(self.path)
+
+        engine = ChessEngine(transposition_table_mb=1, opening_book=self.path)
+        result = engine.search(depth=3)
+        self.assertEqual((first_moves(1, 5)[0], 0, 0), (result.best_move, result.depth, result.nodes))
+
+        engine.make_move(result.best_move)
+        engine.make_move(engine.search(depth=3).best_move)
+        self.assertGreater(engine.search(depth=2).nodes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from engine.chess_engine import ChessEngine
+from engine.parallel_search import parallel_search
+from engine.perft import reference_bit_board
+from engine.search import MATE_BOUND
+from test_search import engine_from_pieces
+
+
+class TestParallelSearch(unittest.TestCase):
+
+    def test_result_does_not_depend_on_worker_count(self):
+        bit_board = reference_bit_board('endgame')
+        results = []
+        for workers in (1, 3):
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results.append(parallel_search(bit_board, depth=3, executor=executor, table_mb=1))
+
+        self.assertEqual(results[0][:4], results[1][:4])
+        self.assertEqual(reference_bit_board('endgame').bit_boards, bit_board.bit_boards)
+
+    def test_finds_mate_in_one(self):
+        engine = engine_from_pieces({(3, 0): 'g', (0, 1): 'R', (8, 2): 'R', (4, 9): 'G'})
+        result = engine.search(depth=3, workers=2)
+
+        self.assertGreater(result.score, MATE_BOUND)
+        self.assertEqual(engine.search(depth=3).score, result.score)
+
+    def test_rejects_node_limit(self):
+        with self.assertRaises(ValueError):
+            ChessEngine().search(depth=2, node_limit=100, workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
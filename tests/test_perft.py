@@ -0,0 +1,27 @@
+import unittest
+from engine import perft
+
+
+class TestPerft(unittest.TestCase):
+
+    def test_reference_positions(self):
+        for name, (_, _, counts) in perft.REFERENCE_POSITIONS.items():
+            bit_board = perft.reference_bit_board(name)
+            for depth in (1, 2):
+                self.assertEqual(counts[depth], perft.perft(bit_board, depth), f"{name} at depth {depth}")
+
+    def test_opening_depth_3(self):
+        self.assertEqual(79666, perft.perft(perft.reference_bit_board('opening'), 3))
+
+    def test_divide_sums_to_perft(self):
+        bit_board = perft.reference_bit_board('endgame')
+        counts = perft.divide(bit_board, 3)
+        self.assertEqual(5, len(counts))
+        self.assertEqual(1092, sum(counts.values()))
+
+    def test_perft_restores_position(self):
+        bit_board = perft.reference_bit_board('midgame')
+        key = bit_board.zobrist_key
+        perft.perft(bit_board, 2)
+        self.assertEqual(key, bit_board.zobrist_key)
+        self.assertEqual('b', bit_board.side_to_move)
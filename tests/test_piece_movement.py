@@ -0,0 +1,167 @@
+import random
+import unittest
+import numpy as np
+from engine import piece_movement
+from engine.attack_tables import RAYS
+from engine.chess_engine import BitBoard
+from engine.engine_util import bitboard_to_locations, location_to_bitboard
+from engine.fen import DEFAULT_FEN
+
+
+def empty_board_state():
+    return np.full((10, 9), '.')
+
+
+def ray_walk_targets(square, occupancy, cannon):
+    targets = 0
+    for ray in RAYS[square]:
+        screened = False
+        for point in ray:
+            if not screened:
+                if occupancy & point:
+                    if not cannon:
+                        targets |= point
+                        break
+                    screened = True
+                else:
+                    targets |= point
+            elif occupancy & point:
+                targets |= point
+                break
+    return targets
+
+
+class TestPieceMovement(unittest.TestCase):
+
+    def test_opening_move_counts(self):
+        bit_boards = BitBoard()
+        self.assertEqual(44, len(piece_movement.generate_moves(bit_boards, 'r')))
+        self.assertEqual(44, len(piece_movement.generate_moves(bit_boards, 'b')))
+
+    def test_horse_leg_is_blocked(self):
+        bit_boards = BitBoard()
+        # The red horse at (1, 9) has its leg at (1, 8) free but (2, 9) is blocked by the elephant.
+        self.assertEqual([(0, 7), (2, 7)],
+                         bitboard_to_locations(piece_movement.valid_movements(bit_boards, 'H', location_to_bitboard((1, 9)))))
+
+    def test_elephant_eye_and_river(self):
+        board_state = empty_board_state()
+        board_state[4][2] = 'e'
+        board_state[3][1] = 'p'
+        bit_boards = BitBoard(board_state)
+        # The eye at (1, 3) is blocked, and the elephant may not cross the river to ranks 5 and below.
+        self.assertEqual([(4, 2)], bitboard_to_locations(piece_movement.valid_movements(bit_boards, 'e')))
+
+    def test_cannon_needs_a_screen_to_capture(self):
+        board_state = empty_board_state()
+        board_state[7][1] = 'C'
+        board_state[4][1] = 'p'
+        board_state[0][1] = 'h'
+        board_state[7][4] = 'r'
+        bit_boards = BitBoard(board_state)
+        moves = bitboard_to_locations(piece_movement.valid_movements(bit_boards, 'C'))
+
+        self.assertIn((1, 0), moves)
+        self.assertNotIn((1, 4), moves)
+        self.assertNotIn((4, 7), moves)
+        self.assertIn((3, 7), moves)
+
+    def test_pawn_moves_sideways_after_river(self):
+        board_state = empty_board_state()
+        board_state[6][4] = 'P'
+        board_state[4][0] = 'P'
+        bit_boards = BitBoard(board_state)
+
+        self.assertEqual([(4, 5)], bitboard_to_locations(piece_movement.valid_movements(bit_boards, 'P',
+                                                                                        location_to_bitboard((4, 6)))))
+        self.assertEqual([(0, 3), (1, 4)], bitboard_to_locations(piece_movement.valid_movements(
+            bit_boards, 'P', location_to_bitboard((0, 4)))))
+
+    def test_general_and_adviser_stay_in_palace(self):
+        board_state = empty_board_state()
+        board_state[7][3] = 'G'
+        board_state[9][5] = 'A'
+        bit_boards = BitBoard(board_state)
+
+        self.assertEqual([(4, 7), (3, 8)], bitboard_to_locations(piece_movement.valid_movements(bit_boards, 'G')))
+        self.assertEqual([(4, 8)], bitboard_to_locations(piece_movement.valid_movements(bit_boards, 'A')))
+
+    def test_sliding_lookup_matches_ray_walk(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            occupancy = rng.getrandbits(90) & rng.getrandbits(90)
+            for square in range(90):
+                self.assertEqual(ray_walk_targets(square, occupancy, False),
+                                 piece_movement.chariot_targets(square, 'r', occupancy))
+                self.assertEqual(ray_walk_targets(square, occupancy, True),
+                                 piece_movement.cannon_targets(square, 'r', occupancy))
+
+    def test_generals_may_not_face_each_other(self):
+        bit_boards = BitBoard.from_fen('4k4/9/9/9/9/9/9/9/9/4K4 b')
+        self.assertEqual(location_to_bitboard((4, 9)), piece_movement.checkers(bit_boards, 'b'))
+        self.assertTrue(piece_movement.is_general_attacked(bit_boards, 'r'))
+        self.assertEqual([(3, 0), (5, 0)],
+                         bitboard_to_locations(piece_movement.black_general_valid_movements(bit_boards)))
+
+    def test_pinned_chariot_stays_on_its_file(self):
+        bit_boards = BitBoard.from_fen('3k5/9/9/9/4r4/9/9/9/4R4/4K4 w')
+        self.assertEqual((location_to_bitboard((4, 8)), 0), piece_movement.pinned_pieces(bit_boards, 'r'))
+        self.assertEqual([(4, 4), (4, 5), (4, 6), (4, 7)],
+                         bitboard_to_locations(piece_movement.legal_targets(bit_boards, 'R')))
+
+    def test_cannon_screens_and_pins(self):
+        # Nothing may move between the general and the cannon, since it would become the cannon's screen.
+        bit_boards = BitBoard.from_fen('3k5/9/9/9/4c4/9/R8/9/9/4K4 w')
+        pinned, forbidden = piece_movement.pinned_pieces(bit_boards, 'r')
+        self.assertEqual([(4, 5), (4, 6), (4, 7), (4, 8)], bitboard_to_locations(forbidden))
+        self.assertNotIn((4, 6), bitboard_to_locations(piece_movement.legal_targets(bit_boards, 'R')))
+
+        # With two screens, neither may leave the file.
+        bit_boards = BitBoard.from_fen('3k5/9/9/9/4c4/9/4P4/9/4R4/4K4 w')
+        pinned, forbidden = piece_movement.pinned_pieces(bit_boards, 'r')
+        self.assertEqual([(4, 6), (4, 8)], bitboard_to_locations(pinned))
+        self.assertEqual([(4, 7)], bitboard_to_locations(piece_movement.legal_targets(bit_boards, 'R')))
+
+    def test_piece_on_horse_leg_is_pinned(self):
+        bit_boards = BitBoard.from_fen('5k3/9/9/9/9/9/9/3n5/3R5/4K4 w')
+        self.assertEqual(location_to_bitboard((3, 8)), piece_movement.pinned_pieces(bit_boards, 'r')[0])
+        self.assertEqual([(3, 7)], bitboard_to_locations(piece_movement.legal_targets(bit_boards, 'R')))
+
+    def test_attack_map(self):
+        attacked = piece_movement.attack_map(BitBoard(), 'r')
+        # The red cannon captures the black horse over the black cannon's file.
+        self.assertTrue(attacked & location_to_bitboard((1, 0)))
+        self.assertFalse(attacked & location_to_bitboard((0, 3)))
+
+    def test_checkmate_and_stalemate(self):
+        bit_boards = BitBoard.from_fen('R2k5/R8/9/9/9/9/9/9/9/4K4 b')
+        self.assertTrue(piece_movement.is_checkmate(bit_boards, 'b'))
+        self.assertFalse(piece_movement.is_stalemate(bit_boards, 'b'))
+
+        bit_boards = BitBoard.from_fen('3k5/R8/9/9/9/9/9/9/9/4K4 b')
+        self.assertTrue(piece_movement.is_stalemate(bit_boards, 'b'))
+        self.assertFalse(piece_movement.is_checkmate(bit_boards, 'b'))
+        self.assertFalse(piece_movement.has_legal_move(bit_boards, 'b'))
+        self.assertTrue(piece_movement.has_legal_move(bit_boards, 'r'))
+
+    def test_legal_moves_match_make_unmake(self):
+        rng = random.Random(2)
+        for _ in range(10):
+            bit_boards = BitBoard.from_fen(DEFAULT_FEN)
+            for _ in range(80):
+                team = bit_boards.side_to_move
+                expected = []
+                for move in piece_movement.generate_moves(bit_boards, team):
+                    bit_boards.make_move(move)
+                    if not piece_movement.is_general_attacked(bit_boards, team):
+                        expected.append(move)
+                    bit_boards.unmake_move(move)
+
+                self.assertEqual(expected, piece_movement.generate_legal_moves(bit_boards, team))
+                if not expected:
+                    break
+                bit_boards.make_move(rng.choice(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from engine.chess_engine import BitBoard
+from engine.piece_movement import generate_moves
+from engine.position_store import PositionWriter, read_positions, record_to_bit_board, decode_boards, \
+    RECORD_DTYPE, HEADER_SIZE
+
+
+class TestPositionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'positions.xqp')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_random_game(self, writer, game_id, n_plies=60):
+        rng = random.Random(game_id)
+        bit_board = BitBoard(verbose=False)
+        written = []
+        for ply in range(n_plies):
+            moves = generate_moves(bit_board, bit_board.side_to_move)
+            if not moves or not bit_board['g'] or not bit_board['G']:
+                break
+            move = rng.choice(moves)
+            writer.append(bit_board, score=bit_board.score, best_move=move, game_id=game_id, ply=ply)
+            written.append((dict(bit_board.bit_boards), bit_board.side_to_move, bit_board.zobrist_key, move))
+            bit_board.make_move(move)
+        return written
+
+    def test_round_trip(self):
+        with PositionWriter(self.path, buffer_size=16) as writer:
+            written = self.write_random_game(writer, 1) + self.write_random_game(writer, 2)
+
+        records = read_positions(self.path)
+        self.assertEqual(len(written), len(records))
+        self.assertEqual(HEADER_SIZE + len(written) * RECORD_DTYPE.itemsize, os.path.getsize(self.path))
+
+        for record, (bit_boards, side_to_move, key, move) in zip(records, written):
+            bit_board = record_to_bit_board(record)
+            self.assertEqual(bit_boards, bit_board.bit_boards)
+            self.assertEqual(side_to_move, bit_board.side_to_move)
+            self.assertEqual(key, bit_board.zobrist_key)
+            self.assertEqual(key, int(record['key']))
+            self.assertEqual(move, int(record['best_move']))
+            self.assertEqual(bit_board.score, int(record['score']))
+
+    def test_append_and_bulk_write(self):
+        with PositionWriter(self.path) as writer:
+            writer.append(BitBoard(verbose=False), game_id=5)
+        with PositionWriter(self.path) as writer:
+            writer.write_records(np.repeat(read_positions(self.path), 3))
+
+        records = read_positions(self.path)
+        self.assertEqual([5, 5, 5, 5], records['game_id'].tolist())
+        codes = decode_boards(records['board'])
+        self.assertEqual((4, 90), codes.shape)
+        self.assertEqual(32, int(np.count_nonzero(codes[0])))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a position file')
+        with self.assertRaises(ValueError):
+            read_positions(self.path)
+        with self.assertRaises(ValueError):
+            PositionWriter(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from collections import Counter
+import numpy as np
+from engine.chess_engine import ChessEngine
+from engine.engine_constants import PIECE_CODES
+from engine.piece_movement import is_checkmate
+from engine.search import MATE_SCORE, Searcher
+
+
+def engine_from_pieces(pieces, side_to_move='r'):
+    board_state = np.full((10, 9), '.')
+    for (x, y), piece_class in pieces.items():
+        board_state[y][x] = piece_class
+    engine = ChessEngine(board_state, transposition_table_mb=1)
+    engine.bit_board.set_side_to_move(side_to_move)
+    return engine
+
+
+class TestSearch(unittest.TestCase):
+
+    def test_finds_mate_in_one(self):
+        engine = engine_from_pieces({(3, 0): 'g', (0, 1): 'R', (8, 2): 'R', (4, 9): 'G'})
+        result = engine.search(depth=3)
+
+        self.assertEqual(MATE_SCORE - 1, result.score)
+        engine.make_move(result.best_move)
+        self.assertTrue(is_checkmate(engine.bit_board, 'b'))
+
+    def test_wins_hanging_chariot(self):
+        engine = engine_from_pieces({(4, 0): 'g', (0, 4): 'r', (0, 9): 'R', (3, 9): 'G'})
+        result = engine.search(depth=2)
+
+        self.assertEqual(PIECE_CODES['r'], result.best_move >> 18 & 0xF)
+        self.assertEqual(result.best_move, result.pv[0])
+
+    def test_search_restores_position(self):
+        engine = ChessEngine(transposition_table_mb=1)
+        before = (dict(engine.bit_board.bit_boards), engine.bit_board.zobrist_key, engine.bit_board.side_to_move)
+        result = engine.search(depth=3)
+
+        self.assertIn(result.best_move, engine.generate_moves())
+        self.assertEqual(3, result.depth)
+        self.assertGreater(result.nodes, 0)
+        self.assertEqual(before, (dict(engine.bit_board.bit_boards), engine.bit_board.zobrist_key,
+                                  engine.bit_board.side_to_move))
+
+    def test_repetition_is_a_draw(self):
+        # Red is a chariot up, but every position its moves lead to has been seen before in the game.
+        engine = engine_from_pieces({(4, 0): 'g', (0, 9): 'R', (3, 9): 'G'})
+        bit_board = engine.bit_board
+        history_keys = []
+        for move in engine.generate_moves():
+            bit_board.make_move(move)
+            history_keys.append(bit_board.zobrist_key)
+            bit_board.unmake_move(move)
+
+        searcher = Searcher(bit_board, history_keys=history_keys)
+        self.assertEqual(0, searcher.search(depth=3).score)
+        self.assertGreater(Searcher(bit_board).search(depth=3).score, 0)
+        # The search path was pushed and popped again.
+        self.assertEqual(+Counter(history_keys), +searcher.history_counts)
+
+    def test_node_limit(self):
+        engine = ChessEngine(transposition_table_mb=1)
+        result = engine.search(depth=20, node_limit=3000)
+
+        self.assertLess(result.nodes, 3000 + 1024)
+        self.assertIn(result.best_move, engine.generate_moves())
+
+    def test_reports_iterations(self):
+        engine = ChessEngine(transposition_table_mb=1)
+        depths = []
+        engine.search(depth=3, info_callback=lambda info: depths.append(info.depth))
+        self.assertEqual([1, 2, 3], depths)
@@ -0,0 +1,41 @@
+import unittest
+from engine import square, engine_util
+from engine.engine_constants import N_RANKS, N_FILES, BIT_BOARD_WIDTH, BLACK_PALACE_LOCATIONS, BLACK_PALACE_BITBOARD
+
+
+class TestSquare(unittest.TestCase):
+
+    def test_square_masks_match_string_layout(self):
+        for sq in square.SQUARES:
+            binary = '0' * sq + '1' + '0' * (BIT_BOARD_WIDTH - sq - 1)
+            self.assertEqual(int(binary, 2), square.square_to_mask(sq))
+
+    def test_location_square_round_trip(self):
+        for y in range(N_RANKS):
+            for x in range(N_FILES):
+                sq = square.location_to_square((x, y))
+                self.assertEqual((x, y), square.square_to_location(sq))
+                self.assertEqual(sq, square.mask_to_square(square.square_to_mask(sq)))
+
+    def test_location_to_bitboard(self):
+        self.assertEqual(int('1' + '0' * (BIT_BOARD_WIDTH - 1), 2), engine_util.location_to_bitboard((0, 0)))
+        self.assertEqual(1, engine_util.location_to_bitboard((8, 9)))
+
+    def test_locations_to_bitboard(self):
+        self.assertEqual(BLACK_PALACE_BITBOARD, engine_util.locations_to_bitboard(BLACK_PALACE_LOCATIONS))
+
+    def test_is_on_board(self):
+        self.assertTrue(square.is_on_board((8, 9)))
+        self.assertFalse(square.is_on_board((9, 0)))
+        self.assertFalse(square.is_on_board((-1, -1)))
+
+    def test_iter_squares_reading_order(self):
+        bitboard = square.square_to_mask(89) | square.square_to_mask(0) | square.square_to_mask(40)
+        self.assertEqual([0, 40, 89], list(square.iter_squares(bitboard)))
+        self.assertEqual([0, 40, 89], square.bitboard_to_squares(bitboard))
+        self.assertEqual([(0, 0), (4, 4), (8, 9)], list(square.iter_locations(bitboard)))
+        self.assertEqual([], square.bitboard_to_squares(0))
+
+    def test_squares_by_piece_class(self):
+        bit_boards = {'g': square.square_to_mask(4), 'G': square.square_to_mask(85), 'p': 0}
+        self.assertEqual({'g': [4], 'G': [85], 'p': []}, square.squares_by_piece_class(bit_boards))
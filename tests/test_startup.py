@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import unittest
+import engine
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(engine.__file__)))
+
+
+class TestStartup(unittest.TestCase):
+
+    def run_python(self, code):
+        # A fresh interpreter, so that the modules imported by other tests do not count.
+        return subprocess.run([sys.executable, '-c', code], cwd=SRC, check=True, capture_output=True, text=True).stdout
+
+    def test_engine_imports_without_numpy(self):
+        output = self.run_python('import sys\n'
+                                 'import engine.search, engine.tablebase, engine.ucci, engine.perft\n'
+                                 'from engine.chess_engine import ChessEngine\n'
+                                 'print(len(ChessEngine().generate_moves()), "numpy" in sys.modules)')
+        self.assertEqual('44 False', output.strip())
+
+    def test_default_board_state_is_built_on_first_use(self):
+        output = self.run_python('from engine.engine_constants import DEFAULT_BOARD_STATE\n'
+                                 'from engine.chess_engine import BitBoard\n'
+                                 'from engine.fen import DEFAULT_FEN\n'
+                                 'from_array = BitBoard(DEFAULT_BOARD_STATE, verbose=False).to_fen()\n'
+                                 'print(DEFAULT_BOARD_STATE.shape, from_array == BitBoard().to_fen() == DEFAULT_FEN)')
+        self.assertEqual('(10, 9) True', output.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
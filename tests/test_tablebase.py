@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from engine.chess_engine import BitBoard, ChessEngine
+from engine.piece_movement import generate_legal_moves, is_general_attacked
+from engine.search import MATE_SCORE, MATE_BOUND
+from engine.tablebase import Tablebase, TableLayout, generate_tablebase, canonical_signature, table_path, \
+    WIN, DRAW, LOSS, MIRROR_SQUARES
+from engine.square import iter_squares, SQUARE_MASKS
+
+
+def mirrored(bit_board):
+    bit_boards = {piece_class: sum(SQUARE_MASKS[MIRROR_SQUARES[square]] for square in iter_squares(board))
+                  for piece_class, board in bit_board.items()}
+    return BitBoard.from_bit_boards(bit_boards, bit_board.side_to_move)
+
+
+def preference(outcome):
+    # The fastest win first, then a draw, then the slowest loss.
+    result, plies = outcome
+    return result, -plies if result == WIN else plies
+
+
+class TestTablebase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        generate_tablebase('R', cls.directory.name, workers=2)
+        cls.tablebase = Tablebase(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def test_signatures(self):
+        self.assertEqual('HPaa', canonical_signature('aPaH'))
+        self.assertNotEqual(table_path('', 'R'), table_path('', 'r'))
+        for signature in ('Gr', 'RRR', 'x'):
+            with self.assertRaises(ValueError):
+                canonical_signature(signature)
+
+        self.assertTrue(os.path.exists(table_path(self.directory.name, '')))
+        self.assertEqual(3, self.tablebase.max_pieces)
+
+    def test_values_agree_with_successors(self):
+        # Every stored value must be the best outcome among the position's moves.
+        layout = TableLayout('R')
+        for index in range(0, layout.size, 7):
+            bit_board = layout.position(index)
+            if bit_board is None or is_general_attacked(bit_board, 'b' if bit_board.side_to_move == 'r' else 'r'):
+                continue
+
+            best = (LOSS, 0)
+            for move in generate_legal_moves(bit_board, bit_board.side_to_move):
+                bit_board.make_move(move)
+                result, plies = self.tablebase.probe(bit_board)
+                bit_board.unmake_move(move)
+                outcome = (DRAW, 0) if result == DRAW else (-result, plies + 1)
+                if preference(outcome) > preference(best):
+                    best = outcome
+
+            self.assertEqual(best, self.tablebase.probe(bit_board), bit_board.to_fen())
+
+    def test_mirrored_positions(self):
+        bit_board = BitBoard.from_fen('4k4/9/9/9/9/9/9/9/1R7/5K3 w')
+        self.assertEqual(self.tablebase.probe(mirrored(bit_board)), self.tablebase.probe(bit_board))
+        self.assertEqual(WIN, self.tablebase.probe(bit_board)[0])
+
+    def test_not_covered(self):
+        self.assertIsNone(self.tablebase.probe(BitBoard(verbose=False)))
+        # Black to move with the red general en prise: illegal.
+        self.assertIsNone(self.tablebase.probe(BitBoard.from_fen('4k4/9/9/9/9/9/9/9/9/3RK4 b')))
+
+    def test_search_uses_tablebase(self):
+        engine = ChessEngine(fen='3k5/9/9/9/9/9/9/9/1R7/4K4 w', transposition_table_mb=1,
+                             tablebase=self.directory.name)
+        result = engine.search(depth=5)
+        self.assertGreater(result.score, MATE_BOUND)
+
+        # The score is the tablebase's distance to mate after the chosen move, plus that move.
+        engine.make_move(result.best_move)
+        self.assertEqual((LOSS, MATE_SCORE - result.score - 1), self.tablebase.probe(engine.bit_board))
+
+
+if __name__ == '__main__':
+    unittest.main()
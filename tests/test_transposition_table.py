@@ -0,0 +1,72 @@
+import unittest
+from engine import transposition_table
+from engine.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_respects_memory_budget(self):
+        for size_mb in (0.01, 1, 3.5):
+            table = TranspositionTable(size_mb)
+            self.assertLessEqual(table.size_in_bytes, size_mb * 1024 * 1024)
+            self.assertGreater(table.n_buckets, 0)
+
+    def test_store_and_probe(self):
+        table = TranspositionTable(0.01)
+        self.assertIsNone(table.probe(12345))
+
+        table.store(12345, 77, -30, 4, EXACT)
+        self.assertEqual((77, -30, 4, EXACT), table.probe(12345))
+        self.assertIsNone(table.probe(12345 + table.n_buckets))
+
+        statistics = table.statistics()
+        self.assertEqual(3, statistics['probes'])
+        self.assertEqual(1, statistics['hits'])
+
+    def test_depth_preferred_and_always_replace(self):
+        table = TranspositionTable(0.01)
+        deep, shallow, other = 5, 5 + table.n_buckets, 5 + 2 * table.n_buckets
+
+        table.store(deep, 1, 10, 8, EXACT)
+        table.store(shallow, 2, 20, 2, LOWER_BOUND)
+        # The deep entry survives a shallower store to the same bucket, which goes to the always-replace slot.
+        self.assertEqual(1, table.probe(deep)[0])
+        self.assertEqual(2, table.probe(shallow)[0])
+
+        table.store(other, 3, 30, 1, UPPER_BOUND)
+        self.assertEqual(1, table.probe(deep)[0])
+        self.assertEqual(3, table.probe(other)[0])
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(1, table.collisions)
+
+    def test_aging_allows_replacement(self):
+        table = TranspositionTable(0.01)
+        old, new = 9, 9 + table.n_buckets
+
+        table.store(old, 1, 0, 10, EXACT)
+        table.new_search()
+        table.store(new, 2, 0, 1, EXACT)
+        table.store(new + table.n_buckets, 3, 0, 1, EXACT)
+
+        # The stale deep entry was demoted and then replaced.
+        self.assertIsNone(table.probe(old))
+        self.assertEqual(2, table.probe(new)[0])
+
+    def test_keeps_best_move_when_none_given(self):
+        table = TranspositionTable(0.01)
+        table.store(42, 99, 0, 3, EXACT)
+        table.store(42, 0, 5, 4, UPPER_BOUND)
+        self.assertEqual((99, 5, 4, UPPER_BOUND), table.probe(42))
+
+    def test_shared_buffer_and_clear(self):
+        buffer = bytearray(transposition_table.table_size_in_bytes(64))
+        table = TranspositionTable(buffer=buffer)
+        self.assertEqual(64, table.n_buckets)
+
+        table.store(3, 4, 5, 6, EXACT)
+        # A second table over the same memory sees the entry.
+        self.assertEqual((4, 5, 6, EXACT), TranspositionTable(buffer=buffer).probe(3))
+
+        table.clear()
+        self.assertIsNone(table.probe(3))
+        self.assertEqual(0.0, table.fill())
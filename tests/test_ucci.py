@@ -0,0 +1,130 @@
+import io
+import threading
+import time
+import unittest
+from engine.chess_engine import ChessEngine
+from engine.fen import DEFAULT_FEN
+from engine.moves import decode_move
+from engine.search import MATE_SCORE
+from engine.ucci import UcciServer, move_to_iccs, iccs_to_move, allocate_time, parse_go, uci_score
+
+
+class RecordingOutput(io.StringIO):
+    # Lets a test wait for a line to be written by the search thread.
+
+    def __init__(self):
+        super().__init__()
+        self.written = threading.Condition()
+
+    def write(self, text):
+        with self.written:
+            result = super().write(text)
+            self.written.notify_all()
+        return result
+
+    def wait_for(self, prefix, timeout=10):
+        with self.written:
+            found = self.written.wait_for(lambda: self.lines(prefix), timeout)
+        if not found:
+            raise AssertionError(f"no {prefix!r} line in {self.getvalue()!r}")
+        return found[-1]
+
+    def lines(self, prefix):
+        return [line for line in self.getvalue().splitlines() if line.startswith(prefix)]
+
+
+class TestUcci(unittest.TestCase):
+
+    def setUp(self):
+        self.output = RecordingOutput()
+        self.server = UcciServer(self.output)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_iccs_moves(self):
+        engine = ChessEngine(fen=DEFAULT_FEN)
+        move = iccs_to_move(engine, 'h2e2')
+        # The red cannon from (7, 7) to the central file.
+        self.assertEqual(((7 * 9 + 7), (7 * 9 + 4), 'C', None), decode_move(move))
+        self.assertEqual('h2e2', move_to_iccs(move))
+        with self.assertRaises(ValueError):
+            iccs_to_move(engine, 'h2h8')
+
+    def test_handshake_and_position(self):
+        self.server.handle('ucci')
+        self.server.handle('isready')
+        self.assertEqual(['ucciok'], self.output.lines('ucciok'))
+        self.assertEqual(['readyok'], self.output.lines('readyok'))
+
+        self.server.handle('position startpos moves h2e2 h9g7')
+        self.assertEqual('rnbakab1r/9/1c4nc1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RNBAKABNR w - - 2 2',
+                         self.server.engine.bit_board.to_fen())
+        self.server.handle('position fen 3k5/R8/8R/9/9/9/9/9/9/4K4 w')
+        self.assertEqual(0, len(self.server.engine.move_stack))
+
+    def test_go_depth_reports_info_and_best_move(self):
+        self.server.handle('position fen 3k5/R8/8R/9/9/9/9/9/9/4K4 w')
+        self.server.handle('go depth 2')
+        self.assertEqual('bestmove i7i9', self.output.wait_for('bestmove'))
+        info = self.output.lines('info depth 1')[0].split()
+        for field in ('score', 'time', 'nodes', 'nps', 'pv'):
+            self.assertIn(field, info)
+
+    def test_uci_session(self):
+        self.server.handle('uci')
+        self.assertEqual(['uciok'], self.output.lines('uciok'))
+        self.assertEqual(1, len(self.output.lines('id author')))
+
+        self.server.handle('position startpos moves h2e2')
+        self.server.handle('go depth 2')
+        self.output.wait_for('bestmove')
+        info = self.output.lines('info depth 2')[0].split()
+        self.assertEqual('cp', info[info.index('score') + 1])
+        int(info[info.index('score') + 2])
+
+        # Mated: the mate is reported in moves, and there is no move to play.
+        self.server.handle('position fen 3k5/R8/8R/9/9/9/9/9/9/4K4 w moves i7i9')
+        self.server.handle('go depth 2')
+        self.assertEqual('bestmove 0000', self.output.wait_for('bestmove 0000'))
+        self.assertEqual(['mate 1', 'mate 2', 'mate 0', 'mate -1', 'cp -250'],
+                         [uci_score(score) for score in (MATE_SCORE - 1, MATE_SCORE - 3, -MATE_SCORE, 2 - MATE_SCORE,
+                                                         -250)])
+
+    def test_stop_answers_quickly(self):
+        self.server.handle('position startpos')
+        self.server.handle('go infinite')
+        time.sleep(0.3)
+        self.assertEqual([], self.output.lines('bestmove'))
+
+        start = time.perf_counter()
+        self.server.handle('stop')
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertEqual(1, len(self.output.lines('bestmove')))
+
+    def test_ponder_waits_for_ponderhit(self):
+        self.server.handle('position fen 3k5/R8/8R/9/9/9/9/9/9/4K4 w')
+        self.server.handle('go ponder time 10000')
+        # The mate is found at once, but the move is held back until the ponder move is played.
+        time.sleep(0.1)
+        self.assertEqual([], self.output.lines('bestmove'))
+        self.server.handle('ponderhit')
+        self.assertEqual('bestmove i7i9', self.output.wait_for('bestmove'))
+
+    def test_time_management(self):
+        self.assertEqual({'time': 60.0, 'increment': 1.0, 'depth': 5, 'ponder': True},
+                         parse_go('ponder time 60000 increment 1000 depth 5'.split()))
+        self.assertAlmostEqual((60 - 0.05) / 30 + 0.8, allocate_time(60, 1))
+        self.assertAlmostEqual((10 - 0.05) / 5, allocate_time(10, 0, 5))
+        # A large increment never spends more than half the clock.
+        self.assertAlmostEqual((2 - 0.05) / 2, allocate_time(2, 30))
+
+        start = time.perf_counter()
+        self.server.handle('position startpos')
+        self.server.handle('go wtime 3000 btime 3000')
+        self.output.wait_for('bestmove')
+        self.assertLess(time.perf_counter() - start, allocate_time(3) + 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()